@@ -0,0 +1,26 @@
+import os
+import hmac
+
+import streamlit as st
+
+ADMIN_TOKEN_ENV = "ADMIN_TOKEN"
+
+def require_admin():
+    """
+    Stop the page unless the visitor entered the admin token (ADMIN_TOKEN
+    environment variable) in this session; without the variable admin pages
+    stay locked for everyone
+    """
+    token = os.environ.get(ADMIN_TOKEN_ENV, "")
+    if not token:
+        st.info(f"This page is for administrators. Start the app with {ADMIN_TOKEN_ENV} set to enable it.")
+        st.stop()
+    if st.session_state.get('admin_unlocked'):
+        return
+    entered = st.text_input("Admin token", type="password", key="admin_token_input")
+    if entered and hmac.compare_digest(entered.encode(), token.encode()):
+        st.session_state.admin_unlocked = True
+        return
+    if entered:
+        st.error("Wrong admin token.")
+    st.stop()
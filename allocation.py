@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+from ingredients import normalize_name
+
+ENERGY_PATH = "./catalog/cooking_energy.csv"
+POS_COLUMNS = ('order_id', 'item', 'quantity')
+CHUNK_ROWS = 500000
+# kgCO2e per order histogram: 0, then log bins from 1 g to 1 t (about 2% wide), then overflow
+ORDER_EDGES = np.concatenate([[0.0], np.logspace(-3, 3, 601), [np.inf]])
+
+def load_cooking_energy(path=ENERGY_PATH):
+    """
+    Cooking energy (MJ) of each recipe's own cooking step, per portion or kg
+    """
+    table = pd.read_csv(path)
+    return dict(zip(table['recipe'].str.strip().str.lower(), table['cooking_mj'].astype(float)))
+
+def cooking_energy(book, energy):
+    """
+    MJ per unit of every recipe in a RecipeBook, own cooking step plus the
+    energy of its sub-recipes (each recipe is walked once)
+    """
+    totals = {}
+
+    def walk(recipe):
+        if recipe not in totals:
+            totals[recipe] = energy.get(recipe, 0.0) + sum(
+                quantity * walk(name) for kind, name, quantity in book.components[recipe] if kind == 'recipe')
+        return totals[recipe]
+
+    for recipe in book.units:
+        walk(recipe)
+    return totals
+
+def _read_chunks(source, columns, chunksize):
+    # Yields chunks with the POS columns renamed to order_id/item/quantity
+    # Header names are matched case-insensitively; file-like sources are rewound
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    header = pd.read_csv(source, nrows=0).columns
+    lookup = {str(col).strip().lower(): col for col in header}
+    missing = [col for col in columns if col.lower() not in lookup]
+    if missing:
+        raise ValueError(f"Sales file is missing columns: {', '.join(missing)}")
+    rename = {lookup[col.lower()]: std for col, std in zip(columns, POS_COLUMNS)}
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    reader = pd.read_csv(source, usecols=list(rename), dtype={lookup[columns[0].lower()]: str, lookup[columns[1].lower()]: str},
+                         chunksize=chunksize)
+    for chunk in reader:
+        chunk = chunk.rename(columns=rename)
+        chunk['quantity'] = pd.to_numeric(chunk['quantity'], errors='coerce').fillna(0.0)
+        yield chunk
+
+def dish_volumes(source, columns=POS_COLUMNS, chunksize=CHUNK_ROWS):
+    """
+    Portions sold per POS item name, summed chunk by chunk so memory is bounded
+    by the number of distinct items rather than the number of line items
+    Returns (Series of portions by item, line items read)
+    """
+    volumes = pd.Series(dtype=float)
+    lines = 0
+    for chunk in _read_chunks(source, columns, chunksize):
+        lines += len(chunk)
+        volumes = volumes.add(chunk.groupby('item', sort=False)['quantity'].sum(), fill_value=0.0)
+    return volumes, lines
+
+def allocate(volumes, book, energy, scope1, scope2, scope3):
+    """
+    Split annual scope totals (kgCO2e) over the dishes sold
+    Scope 1 and 2 follow each dish's share of cooking energy (portions × MJ
+    per portion), Scope 3 its share of ingredient content (portions × recipe
+    kgCO2e). POS quantities are portions, so items that match no recipe, or a
+    recipe with a kg yield (sub-recipes such as batters), get nothing and are
+    flagged with allocated False.
+    Returns a DataFrame per POS item with portions, recipe, allocated,
+    scope1..3_kg, total_kg and kg_per_portion
+    """
+    recipes = {normalize_name(recipe): recipe for recipe in book.units}
+    table = pd.DataFrame({'item': volumes.index.astype(str), 'portions': volumes.to_numpy(dtype=float)})
+    found = [recipes.get(normalize_name(item)) for item in table['item']]
+    matches = [recipe if recipe is not None and book.units[recipe] == 'portion' else None for recipe in found]
+    table['recipe'] = found
+    table['allocated'] = [recipe is not None for recipe in matches]
+    mj = cooking_energy(book, energy)
+    portions = table['portions'].to_numpy()
+    energy_weight = portions * np.array([mj[r] if r else 0.0 for r in matches])
+    content_weight = portions * np.array([book.footprint(r) if r else 0.0 for r in matches])
+    if energy_weight.sum() <= 0:  # no cooking energy data, fall back to portions
+        energy_weight = portions * table['allocated'].to_numpy()
+
+    def share(weights):
+        total = weights.sum()
+        return weights / total if total > 0 else np.zeros_like(weights)
+
+    table['scope1_kg'] = scope1 * share(energy_weight)
+    table['scope2_kg'] = scope2 * share(energy_weight)
+    table['scope3_kg'] = scope3 * share(content_weight)
+    table['total_kg'] = table['scope1_kg'] + table['scope2_kg'] + table['scope3_kg']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table['kg_per_portion'] = np.where(table['portions'] > 0, table['total_kg'] / table['portions'], np.nan)
+    return table.sort_values('total_kg', ascending=False).reset_index(drop=True)
+
+def order_intensities(source, per_portion, columns=POS_COLUMNS, chunksize=CHUNK_ROWS):
+    """
+    Stream the sales file again and total kgCO2e per order from per-item
+    intensities (POS item name -> kg per portion)
+    Line items of one order must be consecutive, as in POS exports; an order
+    split across chunks is carried over. Order totals go into a fixed
+    log-spaced histogram, so percentiles are approximate (about 2%)
+    Returns a dict with orders, mean_kg, p50_kg, p90_kg, p99_kg, max_kg
+    """
+    counts = np.zeros(len(ORDER_EDGES) - 1, dtype=np.int64)
+    stats = {'orders': 0, 'total': 0.0, 'max': 0.0}
+
+    def emit(values):
+        if len(values):
+            counts[:] += np.bincount(np.searchsorted(ORDER_EDGES, values, side='right') - 1, minlength=len(counts))
+            stats['orders'] += len(values)
+            stats['total'] += float(values.sum())
+            stats['max'] = max(stats['max'], float(values.max()))
+
+    carry_id, carry_kg = None, 0.0
+    for chunk in _read_chunks(source, columns, chunksize):
+        if chunk.empty:
+            continue
+        codes, items = pd.factorize(chunk['item'], sort=False)
+        intensity = np.array([per_portion.get(item, 0.0) for item in items], dtype=float)
+        line_kg = chunk['quantity'].to_numpy() * np.append(intensity, 0.0)[codes]
+        sums = pd.Series(line_kg).groupby(chunk['order_id'].to_numpy(), sort=False).sum()
+        order_ids, order_kg = sums.index.to_numpy(), sums.to_numpy(copy=True)
+        if carry_id is not None:
+            if order_ids[0] == carry_id:
+                order_kg[0] += carry_kg
+            else:
+                emit(np.array([carry_kg]))
+        emit(order_kg[:-1])
+        carry_id, carry_kg = order_ids[-1], order_kg[-1]
+    if carry_id is not None:
+        emit(np.array([carry_kg]))
+
+    result = {'orders': stats['orders'], 'mean_kg': stats['total'] / stats['orders'] if stats['orders'] else 0.0,
+              'max_kg': stats['max']}
+    cumulative = np.cumsum(counts)
+    for q in (50, 90, 99):
+        if stats['orders']:
+            bin_index = int(np.searchsorted(cumulative, q / 100 * stats['orders']))
+            result[f'p{q}_kg'] = min(float(ORDER_EDGES[bin_index + 1]), stats['max'])
+        else:
+            result[f'p{q}_kg'] = 0.0
+    return result
+
+def allocate_sales(source, book, scope1, scope2, scope3, energy=None, columns=POS_COLUMNS, chunksize=CHUNK_ROWS):
+    """
+    Allocate a restaurant's annual scope totals (kgCO2e) to the dishes in a POS
+    sales export (CSV path or file) in two streaming passes
+    Returns (per-dish allocation table, per-order summary dict); the summary
+    also holds line items read and the share of portions that were allocated
+    """
+    energy = load_cooking_energy() if energy is None else energy
+    volumes, lines = dish_volumes(source, columns, chunksize)
+    dishes = allocate(volumes, book, energy, scope1, scope2, scope3)
+    per_portion = dict(zip(dishes['item'], dishes['kg_per_portion'].fillna(0.0)))
+    summary = order_intensities(source, per_portion, columns, chunksize)
+    summary['lines'] = lines
+    portions = dishes['portions'].sum()
+    summary['matched_share'] = float(dishes.loc[dishes['allocated'], 'portions'].sum() / portions) if portions else 0.0
+    return dishes, summary
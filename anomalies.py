@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+from functions import ACTIVITY_COLUMNS, calculate_emissions
+
+ANOMALY_METRICS = ACTIVITY_COLUMNS + ['scope1', 'scope2', 'scope3', 'total']
+Z_THRESHOLD = 3.5      # modified z-score cut-off (Iglewicz and Hoaglin)
+JUMP_MIN_CHANGE = 0.5  # a month-over-month jump must also be at least ±50%
+MIN_PEERS = 8          # smaller peer groups are not scored
+
+def _sorted_median(ordered):
+    # Median of each row of a last-axis-sorted array, NaN (sorted last) ignored;
+    # returns (median, valid count), all-NaN rows give NaN
+    valid = np.count_nonzero(~np.isnan(ordered), axis=-1)[..., None]
+    low = np.take_along_axis(ordered, np.maximum((valid - 1) // 2, 0), axis=-1)
+    high = np.take_along_axis(ordered, np.maximum(valid // 2, 0), axis=-1)
+    median = (low + high) / 2
+    median[valid == 0] = np.nan
+    return median[..., 0], valid[..., 0]
+
+def _nanmedian(values, axis):
+    # Vectorized NaN-ignoring median: one sort along the axis, moved last first
+    # as sorting contiguous rows is several times faster than a strided axis
+    ordered = np.ascontiguousarray(np.moveaxis(values, axis, -1))
+    ordered.sort(axis=-1)
+    return _sorted_median(ordered)
+
+def _robust_z(values, axis, min_count):
+    # (modified z-scores, median along the axis)
+    median, count = _nanmedian(values, axis)
+    median = np.expand_dims(median, axis)
+    deviation = values - median
+    moved = np.moveaxis(deviation, axis, -1)
+    spread = np.abs(moved, out=np.empty(moved.shape, dtype=moved.dtype))
+    spread.sort(axis=-1)
+    mad, _ = _sorted_median(spread)
+    mad[(mad == 0) | (count < min_count)] = np.nan
+    return deviation * np.expand_dims(0.6745 / mad, axis), median
+
+def robust_z(values, axis=0, min_count=MIN_PEERS):
+    """
+    Modified z-scores 0.6745 × (x - median) / MAD along an axis, NaN ignored
+    Slices with fewer than min_count values or a zero MAD give NaN
+    """
+    return _robust_z(values, axis, min_count)[0]
+
+def activity_cube(data, outlet_column='outlet', month_column='month', metrics=None):
+    """
+    Arrange rows into an outlets × months × metrics array (NaN where an outlet
+    has no row for a month); emissions per scope are added as metrics
+    Returns (outlet names, months, metric names, cube)
+    """
+    metrics = ANOMALY_METRICS if metrics is None else metrics
+    frame = data.reindex(columns=ACTIVITY_COLUMNS).astype(float)
+    emissions = calculate_emissions(frame.fillna(0))
+    values = pd.concat([frame, emissions], axis=1)[metrics].to_numpy(dtype=np.float64)
+    values[frame.isna().reindex(columns=metrics, fill_value=False).to_numpy()] = np.nan
+
+    outlet_codes, outlets = pd.factorize(data[outlet_column], sort=True)
+    if month_column in data.columns:
+        month_codes, months = pd.factorize(data[month_column], sort=True)
+    else:
+        month_codes, months = np.zeros(len(data), dtype=np.int64), pd.Index(['all'])
+    cube = np.full((len(outlets), len(months), len(metrics)), np.nan, dtype=np.float32)
+    cube[outlet_codes, month_codes] = values  # a repeated outlet-month keeps its last row
+    return list(outlets), list(months), list(metrics), cube
+
+def detect_anomalies(data, outlet_column='outlet', month_column='month', group_column=None, metrics=None,
+                     threshold=Z_THRESHOLD, min_jump=JUMP_MIN_CHANGE):
+    """
+    Flag suspect values in an outlet (× month) activity table
+    - peer: the value's robust z-score among outlets of the same peer group
+      (group_column, e.g. restaurant_type) in the same month is beyond threshold
+    - jump: the change from the outlet's previous month is beyond threshold
+      robust z-scores of its own month-over-month changes, and at least min_jump
+    Values are compared on a log scale, so 3× and ⅓ of the peers count alike;
+    zero and missing values are skipped (validate_restaurant_data covers them)
+    Returns one row per flag: outlet, month, metric, value, check, score and
+    reference (the peer median, or the previous month's value)
+    """
+    outlets, months, metrics, cube = activity_cube(data, outlet_column, month_column, metrics)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logs = np.log(np.where(cube > 0, cube, np.nan))
+
+    if group_column is not None:
+        first = data.drop_duplicates(outlet_column).set_index(outlet_column)[group_column]
+        # As strings, so outlets without a group form their own group ('nan') on every pandas version
+        group_codes, _ = pd.factorize(first.reindex(outlets).astype(str))
+    else:
+        group_codes = np.zeros(len(outlets), dtype=np.int64)
+    # Peers: outlets of one group in the same month, so a 36-month dataset is scored against each month's peers
+    peer_z = np.empty(logs.shape, dtype=np.float32)
+    peer_median = np.empty((group_codes.max() + 1,) + logs.shape[1:], dtype=np.float32)
+    for group in np.unique(group_codes):
+        rows = np.flatnonzero(group_codes == group)
+        peer_z[rows], median = _robust_z(logs[rows], 0, MIN_PEERS)
+        peer_median[group] = np.exp(median[0])
+    o, t, m = np.nonzero(np.abs(peer_z) > threshold)
+    flags = [_flag_table(o, t, m, 'peer', peer_z, peer_median[group_codes[o], t, m], cube, outlets, months, metrics)]
+
+    if len(months) > 2:
+        change = np.diff(logs, axis=1)
+        jump_z = robust_z(change, axis=1, min_count=3)
+        o, t, m = np.nonzero((np.abs(jump_z) > threshold) & (np.abs(change) > np.log1p(min_jump)))
+        flags.append(_flag_table(o, t + 1, m, 'jump', jump_z[o, t, m], cube[o, t, m], cube, outlets, months, metrics))
+    return pd.concat(flags, ignore_index=True).sort_values(['outlet', 'month', 'metric'], ignore_index=True)
+
+def _flag_table(o, t, m, check, scores, reference, cube, outlets, months, metrics):
+    if np.ndim(scores) == 3:
+        scores = scores[o, t, m]
+    return pd.DataFrame({
+        'outlet': np.asarray(outlets, dtype=object)[o],
+        'month': np.asarray(months, dtype=object)[t],
+        'metric': np.asarray(metrics, dtype=object)[m],
+        'value': cube[o, t, m].astype(np.float64),
+        'check': check,
+        'score': np.asarray(scores, dtype=np.float64),
+        'reference': np.asarray(reference, dtype=np.float64),
+    })
+
+def flagged_rows(flags):
+    """
+    One row per flagged outlet-month: number of flags and the metrics involved, most flags first
+    """
+    if flags.empty:
+        return pd.DataFrame(columns=['outlet', 'month', 'flags', 'metrics'])
+    summary = flags.groupby(['outlet', 'month'], sort=False).agg(
+        flags=('metric', 'size'), metrics=('metric', lambda m: ', '.join(sorted(set(m)))))
+    return summary.sort_values('flags', ascending=False).reset_index()
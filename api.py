@@ -0,0 +1,308 @@
+"""
+Local HTTP API for the restaurant emissions calculation
+
+    python api.py                    # serve on 127.0.0.1:8502
+    python api.py --bench            # start a server and load test it
+
+Endpoints (JSON in, JSON out):
+    GET  /health      models and factor tables loaded
+    POST /calculate   one restaurant's activity data -> Scope 1, 2, 3, total (kgCO2e/year) and fingerprint
+    POST /validate    one restaurant's activity data -> validate_restaurant_data result
+    POST /breakdown   personal footprint features (one object or a list) -> Travel, Energy, Waste, Diet
+    POST /batch       {"restaurants": [...], "validate": true} -> one result per restaurant and totals
+
+Activity fields are the ACTIVITY_COLUMNS of functions.py; missing fields count
+as 0 and an optional "id" is echoed back in each result.
+"""
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+import threading
+import http.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+from functions import ACTIVITY_COLUMNS, EMISSION_FACTORS, SCOPE_TERMS, calculate_emissions, create_sample_data, hesapla_batch, validate_restaurant_data
+from scope3 import category_matrix
+from fingerprints import code_version, factor_version, row_fingerprints
+
+API_HOST = os.environ.get("API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("API_PORT", 8502))
+MODEL_PATH = "./models/model.sav"
+SCALER_PATH = "./models/scale.sav"
+MAX_BODY_MB = 50
+MAX_BATCH = 50000
+RESULT_COLUMNS = ['scope1', 'scope2', 'scope3', 'total']
+
+# Load-test targets on one local process (see README "Calculation API")
+TARGETS = {
+    'calculate': {'clients': 8, 'requests': 2000, 'batch': 1, 'min_rps': 500, 'p95_ms': 25},
+    'batch': {'clients': 4, 'requests': 100, 'batch': 1000, 'min_rps': 15, 'p95_ms': 500},
+}
+
+class CalculationService:
+    """
+    Models and factor tables, loaded once when the server starts
+    The factor table is compiled into an activity × scope weight matrix, so a
+    request of any size is one matrix product without pandas overhead; it is
+    checked against calculate_emissions on the sample restaurants at startup
+    """
+
+    def __init__(self, model_path=MODEL_PATH, scaler_path=SCALER_PATH, factors=None):
+        with open(model_path, 'rb') as f:
+            self.model = pickle.load(f)
+        with open(scaler_path, 'rb') as f:
+            self.scaler = pickle.load(f)
+        self.features = list(self.scaler.feature_names_in_)
+        self.factors = dict(EMISSION_FACTORS if factors is None else factors)
+        category_matrix(self.factors)  # builds the cached Scope 3 category matrix
+
+        self.weights = np.zeros((len(ACTIVITY_COLUMNS), len(SCOPE_TERMS)))
+        for j, terms in enumerate(SCOPE_TERMS.values()):
+            for column, key in terms.items():
+                self.weights[ACTIVITY_COLUMNS.index(column), j] = self.factors[key]
+        self.staff = ACTIVITY_COLUMNS.index('staff_count')
+        self.commute = ACTIVITY_COLUMNS.index('avg_commute_km')
+        self.commute_factor = 365 * self.factors['commute_km']
+
+        samples = [create_sample_data(t) for t in ("Small Dosa Shop", "Medium Restaurant", "Large Restaurant", "Food Court Stall")]
+        expected = calculate_emissions(pd.DataFrame(samples), self.factors)[RESULT_COLUMNS].to_numpy()
+        if not np.allclose(self.calculate(samples), expected):
+            raise RuntimeError("Compiled factor matrix does not match calculate_emissions")
+
+    def activity_matrix(self, restaurants):
+        """
+        restaurants × ACTIVITY_COLUMNS array; missing and null fields are 0
+        """
+        if not isinstance(restaurants, list) or not all(isinstance(r, dict) for r in restaurants):
+            raise ValueError("Expected a JSON object per restaurant")
+        if len(restaurants) > MAX_BATCH:
+            raise ValueError(f"At most {MAX_BATCH} restaurants per request")
+        try:
+            values = np.array([[r.get(c, 0) for c in ACTIVITY_COLUMNS] for r in restaurants], dtype=float)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Activity values must be numbers ({e})")
+        return np.nan_to_num(values.reshape(len(restaurants), len(ACTIVITY_COLUMNS)), nan=0.0)
+
+    def calculate(self, restaurants, values=None):
+        """
+        scope1, scope2, scope3 and total (kgCO2e/year) per restaurant as an n × 4 array
+        """
+        values = self.activity_matrix(restaurants) if values is None else values
+        scopes = values @ self.weights
+        scopes[:, 2] += values[:, self.staff] * values[:, self.commute] * self.commute_factor
+        return np.column_stack([scopes, scopes.sum(axis=1)])
+
+    def results(self, restaurants, validate=False):
+        """
+        One JSON-ready dict per restaurant: its id (if given), scope totals, the
+        reproducibility fingerprint and optionally validation
+        """
+        values = self.activity_matrix(restaurants)
+        rows = [dict(zip(RESULT_COLUMNS, row)) for row in self.calculate(restaurants, values).tolist()]
+        for restaurant, row, fingerprint in zip(restaurants, rows, row_fingerprints(values + 0.0, self.factors)):
+            row['fingerprint'] = fingerprint
+            if 'id' in restaurant:
+                row['id'] = restaurant['id']
+        if validate:
+            for data, row in zip(values.tolist(), rows):
+                row['valid'], row['warnings'], row['errors'] = validate_restaurant_data(dict(zip(ACTIVITY_COLUMNS, data)))
+        return rows
+
+    def validate(self, restaurant):
+        values = self.activity_matrix([restaurant])[0]
+        is_valid, warnings, errors = validate_restaurant_data(dict(zip(ACTIVITY_COLUMNS, values.tolist())))
+        return {'valid': is_valid, 'warnings': warnings, 'errors': errors}
+
+    def breakdown(self, people):
+        """
+        Travel, Energy, Waste and Diet footprints for a list of feature dicts (missing features are 0)
+        """
+        if not isinstance(people, list) or not all(isinstance(p, dict) for p in people):
+            raise ValueError("Expected a JSON object of features per person")
+        if len(people) > MAX_BATCH:
+            raise ValueError(f"At most {MAX_BATCH} records per request")
+        try:
+            values = np.array([[p.get(c, 0) for c in self.features] for p in people], dtype=float)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Feature values must be numbers ({e})")
+        frame = pd.DataFrame(np.nan_to_num(values.reshape(len(people), len(self.features)), nan=0.0), columns=self.features)
+        return hesapla_batch(self.model, self.scaler, frame).to_dict('records')
+
+class APIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients reuse connections
+    disable_nagle_algorithm = True  # headers and body are separate writes; don't wait for delayed ACKs
+    service = None
+    quiet = True
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_MB * 1024 * 1024:
+            raise OverflowError(f"Request body is larger than {MAX_BODY_MB} MB")
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {'status': 'ok', 'activity_columns': len(ACTIVITY_COLUMNS), 'model_features': len(self.service.features),
+                             'factor_version': factor_version(self.service.factors), 'code_version': code_version()})
+        else:
+            self._send(404, {'error': f"Unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        handlers = {
+            '/calculate': self.calculate,
+            '/validate': self.validate,
+            '/breakdown': self.breakdown,
+            '/batch': self.batch,
+        }
+        if self.path not in handlers:
+            self._send(404, {'error': f"Unknown endpoint {self.path}"})
+            return
+        try:
+            payload = self._read_json()
+        except OverflowError as e:
+            self._send(413, {'error': str(e)})
+            self.close_connection = True
+            return
+        except json.JSONDecodeError as e:
+            self._send(400, {'error': f"Invalid JSON: {e}"})
+            return
+        try:
+            self._send(200, handlers[self.path](payload))
+        except ValueError as e:
+            self._send(400, {'error': str(e)})
+        except Exception as e:
+            self._send(500, {'error': f"{type(e).__name__}: {e}"})
+
+    def calculate(self, payload):
+        if not isinstance(payload, dict):
+            raise ValueError("Expected one restaurant as a JSON object")
+        return self.service.results([payload])[0]
+
+    def validate(self, payload):
+        if not isinstance(payload, dict):
+            raise ValueError("Expected one restaurant as a JSON object")
+        return self.service.validate(payload)
+
+    def breakdown(self, payload):
+        results = self.service.breakdown(payload if isinstance(payload, list) else [payload])
+        return results if isinstance(payload, list) else results[0]
+
+    def batch(self, payload):
+        if not isinstance(payload, dict) or 'restaurants' not in payload:
+            raise ValueError('Expected {"restaurants": [...]}')
+        results = self.service.results(payload['restaurants'], validate=bool(payload.get('validate')))
+        totals = {column: sum(row[column] for row in results) for column in RESULT_COLUMNS}
+        return {'count': len(results), 'totals': totals, 'results': results}
+
+def make_server(host=API_HOST, port=API_PORT, service=None, quiet=True):
+    """
+    Threaded HTTP server with the service loaded; port 0 picks a free port
+    """
+    handler = type('Handler', (APIHandler,), {'service': service or CalculationService(), 'quiet': quiet})
+    return ThreadingHTTPServer((host, port), handler)
+
+# --- Load test ---
+
+def _client(host, port, path, body, count, latencies, errors):
+    connection = http.client.HTTPConnection(host, port, timeout=60)
+    for _ in range(count):
+        started = time.perf_counter()
+        try:
+            connection.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=60)
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+
+def bench(host, port, name, clients, requests, batch, **_):
+    """
+    Send `requests` POSTs from `clients` keep-alive connections at once;
+    /calculate for batch 1, otherwise /batch with `batch` restaurants each
+    Returns throughput and latency percentiles
+    """
+    rng = np.random.default_rng(0)
+    types = ["Small Dosa Shop", "Medium Restaurant", "Large Restaurant", "Food Court Stall"]
+    restaurants = [dict(create_sample_data(types[i % 4]), id=i) for i in range(batch)]
+    for r in restaurants:
+        r['electricity'] *= float(rng.uniform(0.5, 1.5))
+    if batch == 1:
+        path, body = "/calculate", json.dumps(restaurants[0]).encode()
+    else:
+        path, body = "/batch", json.dumps({'restaurants': restaurants, 'validate': True}).encode()
+
+    latencies, errors = [], []
+    per_client = [requests // clients + (i < requests % clients) for i in range(clients)]
+    threads = [threading.Thread(target=_client, args=(host, port, path, body, n, latencies, errors)) for n in per_client]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    ms = np.array(latencies) * 1000
+    return {
+        'scenario': name, 'endpoint': path, 'batch': batch, 'clients': clients, 'requests': len(latencies),
+        'errors': len(errors), 'rps': len(latencies) / elapsed, 'restaurants_per_s': len(latencies) * batch / elapsed,
+        'p50_ms': float(np.percentile(ms, 50)), 'p95_ms': float(np.percentile(ms, 95)), 'p99_ms': float(np.percentile(ms, 99)),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP API for restaurant emissions")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    parser.add_argument("--bench", action="store_true", help="start a server on a free port and load test it against TARGETS")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    service = CalculationService()
+    if not args.bench:
+        server = make_server(args.host, args.port, service, quiet=not args.verbose)
+        print(f"Models and factors loaded in {time.perf_counter() - started:.2f}s, serving on http://{args.host}:{args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+        return 0
+
+    server = make_server("127.0.0.1", 0, service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    missed = False
+    for name, target in TARGETS.items():
+        bench(host, port, name, **dict(target, requests=target['clients'] * 5))  # warm-up
+        result = bench(host, port, name, **target)
+        ok = result['errors'] == 0 and result['rps'] >= target['min_rps'] and result['p95_ms'] <= target['p95_ms']
+        missed |= not ok
+        print(f"{name:<10} {result['endpoint']:<11} batch {result['batch']:>5}  {result['clients']} clients  "
+              f"{result['rps']:8.1f} req/s  {result['restaurants_per_s']:9.0f} restaurants/s  "
+              f"p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms  p99 {result['p99_ms']:7.1f} ms  "
+              f"errors {result['errors']}  target p95 <= {target['p95_ms']} ms, >= {target['min_rps']} req/s: {'met' if ok else 'MISSED'}")
+    server.shutdown()
+    return 1 if missed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import streamlit as st
+from streamlit import runtime
 import pandas as pd
 import numpy as np
 from streamlit.components.v1 import html
@@ -10,14 +11,74 @@ import matplotlib.pyplot as plt
 from PIL import Image, ImageDraw, ImageFont
 import base64
 from functions import *
+from benchmark import build_benchmark_index, generate_peer_profiles, rank_against_peers
+from storage import save_submission
+from jobs import JOB_POLL_SECONDS, get_job_queue
+from reports import build_excel_report, batch_emissions_csv, batch_recommendations_csv, outlet_cards_zip, outlet_audit_zip, audit_report_pdf
+from calc_graph import EmissionsGraph
+from cards import pie_svg
+from recommendations import recommend_reductions, summarize_plan
+from scope3 import scope3_categories, category_labels
+from ingredients import get_ingredient_catalog, ledger_summary, unmatched_items
+from recipes import RecipeBook, load_recipes
+from allocation import allocate_sales
+from anomalies import MIN_PEERS, detect_anomalies, flagged_rows
+from baselines import Baseline, compare_years, get_baseline_store, yoy_summary
+from fingerprints import fingerprint_columns
+from assets import banner_html, build_assets
+from units import accepted_units, normalize_units, template_column
+from smartmeter import LOAD_SHIFTS, MeterStore, average_day, ingest_readings, time_of_use_scope2
+from refrigerants import GWP, LEAK_RATES, normalize_gas, refrigerant_emissions, register_factors, register_summary, sample_register
+from memprofile import profile_rerun, profile_stage, profile_end
+from sessions import SNAPSHOT_KEYS, TOKEN_PATTERN, get_session_snapshots, restore_session, snapshot
+import uuid
+import time
+import hashlib
 import datetime
 import random
 import openpyxl
 
 st.set_page_config(layout="wide", page_title="Restaurant GHG Emissions Dashboard", page_icon="./media/favicon.ico")
 
+@st.cache_resource
+def get_benchmark_index():
+    # Built once per server process (about 20 ms) and shared by all sessions
+    return build_benchmark_index(generate_peer_profiles())
+
+@st.cache_resource
+def get_asset_manifest():
+    # Banner variants and font subsets, built (or checked) once per server process
+    try:
+        return build_assets()
+    except Exception:
+        # Unwritable directory, missing fontTools or an unreadable source: the page falls back to st.image
+        return None
+
+def table_key(table):
+    # Content hash of a table (values, index and column names), the cache key of the views built from it
+    digest = hashlib.blake2b(pd.util.hash_pandas_object(table, index=True).to_numpy().tobytes(), digest_size=16)
+    digest.update(repr(list(table.columns)).encode())
+    return digest.hexdigest()
+
+@st.cache_data(max_entries=16)
+def outlet_grid_csv(key, _outlet_table, _outlet_results):
+    # Results CSV of the outlet grid with Scope 3 categories and fingerprints, built once per table content (key)
+    categories = (scope3_categories(_outlet_table) / 1000).rename(columns=category_labels())
+    return pd.concat([_outlet_results, categories.add_prefix('Scope 3 - ').add_suffix(' (tCO₂e)'),
+                      fingerprint_columns(_outlet_table)], axis=1).to_csv(index=False)
+
+@st.cache_data(max_entries=16)
+def outlet_grid_anomalies(key, group_column, _outlet_table):
+    # Anomaly flags of the outlet grid, rerun only when the table content (key) or the peer group changes
+    return detect_anomalies(_outlet_table, group_column=group_column)
+
 # --- Banner ---
-st.image('./media/background_min.jpg', use_column_width=True)
+# Pre-encoded WebP variants at content-hashed static URLs, the browser picks a width
+banner = banner_html(alt="Restaurant GHG Emissions Dashboard", manifest=get_asset_manifest())
+if banner:
+    st.markdown(banner, unsafe_allow_html=True)
+else:
+    st.image('./media/background_min.jpg', use_column_width=True)
 
 # --- Show Current Date ---
 today = datetime.date.today()
@@ -40,17 +101,35 @@ st.markdown("""
 Welcome! This dashboard helps small-scale restaurants track their greenhouse gas (GHG) emissions for ISO 14064 audits and sustainability. Please enter your data for the past year. Each section below covers a different type of emission (Scope 1, 2, 3). If you need certification, please contact us after completing your data entry.
 """)
 
+restaurant_name = st.text_input("Restaurant name 🏪", key="restaurant_name", help="Required to save data, pledges and audit requests; keeps a history of your submissions for audits.")
+
+# The session token lives in the URL so a reload or server restart finds this session's saved data
+if 'session_token' not in st.session_state:
+    url_token = st.query_params.get("session", "")
+    st.session_state.session_token = url_token if TOKEN_PATTERN.fullmatch(url_token) else uuid.uuid4().hex
+st.query_params["session"] = st.session_state.session_token
+profile_rerun(st.session_state.session_token)
+restore_session(st.session_state.session_token)
+
+# Background jobs are limited per tenant: the restaurant, or this browser session if unnamed
+job_tenant = restaurant_name.strip() or st.session_state.session_token
+
+def track_job(job_id):
+    st.session_state.setdefault('job_ids', []).insert(0, job_id)
+
 # --- Tabs for Scopes and New Features ---
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
+tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
     "📊 Easy Data Entry",
     "🔥 Scope 1: Direct Emissions",
     "💡 Scope 2: Indirect Emissions from Energy",
     "🛵 Scope 3: Other Indirect Emissions",
     "🌳 Carbon Offset Projects",
-    "📜 Certification & Audit Contact"
+    "📜 Certification & Audit Contact",
+    "🍽️ Menu Footprints"
 ])
 
 # --- Easy Data Entry Tab ---
+profile_stage("Easy data entry")
 with tab1:
     st.markdown("""
 ## 📊 Easy Data Entry Methods
@@ -60,7 +139,7 @@ Choose the most convenient way to enter your restaurant's data:
     # Method selection
     entry_method = st.radio(
         "Select your preferred data entry method:",
-        ["📁 Upload CSV/Excel File", "📋 Quick Entry Form", "📥 Download Template", "📊 View Sample Data"],
+        ["📁 Upload CSV/Excel File", "📋 Quick Entry Form", "🗂️ Multi-Outlet Grid", "🧾 Purchase Ledger", "📥 Download Template", "📊 View Sample Data"],
         help="Choose the easiest method for you"
     )
     
@@ -80,8 +159,13 @@ Choose the most convenient way to enter your restaurant's data:
                     data = pd.read_csv(uploaded_file)
                 else:
                     data = pd.read_excel(uploaded_file)
+                # Unit-tagged columns (e.g. electricity[MWh], lpg_used_unit) are converted to the standard units
+                data, converted_units = normalize_units(data)
                 
                 st.success(f"✅ File uploaded successfully! Found {len(data)} records.")
+                if converted_units:
+                    st.info("Converted to standard units: " + "; ".join(
+                        f"{col} ({', '.join(map(str, units))})" for col, units in converted_units.items()))
                 st.dataframe(data.head())
                 
                 # Validate data
@@ -103,7 +187,20 @@ Choose the most convenient way to enter your restaurant's data:
                 if st.button("Process Uploaded Data"):
                     # Store in session state for use in other tabs
                     st.session_state.uploaded_data = data.iloc[0].to_dict()  # Use first row
+                    snapshot(st.session_state.session_token, 'uploaded_data')
                     st.success("Data processed! You can now view results in other tabs.")
+                    if len(data) > 1:
+                        st.session_state.outlet_table = data
+                        snapshot(st.session_state.session_token, 'outlet_table')
+                        st.info(f"All {len(data)} outlets are available in the Multi-Outlet Grid.")
+
+                # Multi-outlet files are calculated in the background
+                if len(data) > 1 and not missing_columns:
+                    if st.button(f"Calculate All {len(data)} Outlets in Background"):
+                        track_job(get_job_queue().submit(
+                            job_tenant, f"Emissions for {len(data)} outlets", batch_emissions_csv, data,
+                            filename=f"outlet_emissions_{datetime.date.today().strftime('%Y%m%d')}.csv"))
+                        st.success("Calculation started! Track its progress under Background Jobs below the results.")
                     
             except Exception as e:
                 st.error(f"Error reading file: {str(e)}")
@@ -158,8 +255,137 @@ Choose the most convenient way to enter your restaurant's data:
                 'customer_visits': customers_quick,
                 'takeaway_containers': 5000
             }
+            snapshot(st.session_state.session_token, 'quick_data')
             st.success("Quick data saved! View results in other tabs.")
     
+    elif entry_method == "🗂️ Multi-Outlet Grid":
+        st.markdown("### 🗂️ Multi-Outlet Grid")
+        st.info("Edit data for many outlets at once. Add or delete rows as needed, then click Apply Edits to update the totals.")
+
+        if 'outlet_table' not in st.session_state:
+            restaurant_types = ["Small Dosa Shop", "Medium Restaurant", "Large Restaurant", "Food Court Stall"]
+            st.session_state.outlet_table = pd.DataFrame(
+                [{'outlet': t, **create_sample_data(t)} for t in restaurant_types])
+
+        # The data editor only draws the rows in view and the form holds every
+        # edit until Apply Edits, so large tables cost one rerun per batch of edits
+        with st.form("outlet_grid"):
+            edited_table = st.data_editor(
+                st.session_state.outlet_table,
+                num_rows="dynamic",
+                height=400,
+                use_container_width=True,
+                hide_index=True
+            )
+            if st.form_submit_button("Apply Edits"):
+                st.session_state.outlet_table = edited_table
+                snapshot(st.session_state.session_token, 'outlet_table')
+
+        outlet_table = st.session_state.outlet_table
+        # Kept across reruns so applied edits only update the terms of the changed cells;
+        # added or deleted rows rebuild it
+        outlet_graph = st.session_state.get('outlet_graph')
+        if outlet_graph is None or not outlet_graph.index.equals(outlet_table.index):
+            outlet_graph = st.session_state.outlet_graph = EmissionsGraph(outlet_table)
+        else:
+            outlet_graph.sync(outlet_table)
+        outlet_results = outlet_graph.emissions() / 1000
+        grid_col1, grid_col2, grid_col3, grid_col4 = st.columns(4)
+        grid_col1.metric("Outlets", f"{len(outlet_table)}")
+        grid_col2.metric("Scope 1", f"{outlet_results['scope1'].sum():.1f} tCO₂e")
+        grid_col3.metric("Scope 2", f"{outlet_results['scope2'].sum():.1f} tCO₂e")
+        grid_col4.metric("Scope 3", f"{outlet_results['scope3'].sum():.1f} tCO₂e")
+        st.markdown(f"**Total across outlets: {outlet_results['total'].sum():.2f} tCO₂e/year**")
+
+        outlet_results.columns = ['Scope 1 (tCO₂e)', 'Scope 2 (tCO₂e)', 'Scope 3 (tCO₂e)', 'Total (tCO₂e)']
+        if 'outlet' in outlet_table.columns:
+            outlet_results.insert(0, 'Outlet', outlet_table['outlet'])
+        st.dataframe(outlet_results, height=300, use_container_width=True, hide_index=True)
+        # The CSV and the anomaly check are cached on the table content, so reruns without edits reuse them
+        outlet_table_key = table_key(outlet_table)
+        st.download_button(
+            label="📄 Download Outlet Results as CSV",
+            data=outlet_grid_csv(outlet_table_key, outlet_table, outlet_results),
+            file_name=f"outlet_emissions_{datetime.date.today().strftime('%Y%m%d')}.csv",
+            mime="text/csv"
+        )
+        with st.expander("🔎 Anomaly Check Before Audit"):
+            st.caption(f"Each value is compared with the same month's peers (robust median/MAD z-score, needs {MIN_PEERS}+ outlets per group), "
+                       "and with the outlet's own month-over-month changes when the table has a 'month' column.")
+            if 'outlet' in outlet_table.columns:
+                peer_options = [None] + [c for c in outlet_table.columns if c not in ACTIVITY_COLUMNS + ['outlet', 'month']]
+                peer_column = st.selectbox("Peer group", peer_options, key="anomaly_peer_column",
+                                           format_func=lambda c: "All outlets" if c is None else c)
+                anomaly_flags = outlet_grid_anomalies(outlet_table_key, peer_column, outlet_table)
+                if anomaly_flags.empty:
+                    st.success("No suspect values found.")
+                else:
+                    suspect_rows = flagged_rows(anomaly_flags)
+                    st.warning(f"{len(anomaly_flags)} suspect values in {len(suspect_rows)} outlet rows; check them before the numbers go to audit.")
+                    st.dataframe(suspect_rows, hide_index=True, use_container_width=True)
+                    st.dataframe(anomaly_flags, hide_index=True, use_container_width=True)
+                    st.download_button(
+                        label="📄 Download Anomaly Flags as CSV",
+                        data=anomaly_flags.to_csv(index=False),
+                        file_name=f"outlet_anomalies_{datetime.date.today().strftime('%Y%m%d')}.csv",
+                        mime="text/csv"
+                    )
+            else:
+                st.info("Add an 'outlet' column to check outlets against each other.")
+        if st.button("🖼️ Generate Share Cards for All Outlets"):
+            track_job(get_job_queue().submit(
+                job_tenant, f"Share cards for {len(outlet_table)} outlets", outlet_cards_zip, outlet_table.copy(),
+                filename=f"outlet_share_cards_{datetime.date.today().strftime('%Y%m%d')}.zip"))
+            st.success("Card rendering started! Track its progress under Background Jobs below the results.")
+        if st.button("📑 Generate PDF Audit Reports for All Outlets"):
+            track_job(get_job_queue().submit(
+                job_tenant, f"Audit reports for {len(outlet_table)} outlets", outlet_audit_zip, outlet_table.copy(),
+                filename=f"outlet_audit_reports_{datetime.date.today().strftime('%Y%m%d')}.zip"))
+            st.success("Report generation started! Track its progress under Background Jobs below the results.")
+        if st.button("💡 Generate Reduction Plans for All Outlets (20% target)"):
+            track_job(get_job_queue().submit(
+                job_tenant, f"Reduction plans for {len(outlet_table)} outlets", batch_recommendations_csv, outlet_table.copy(),
+                filename=f"outlet_reduction_plans_{datetime.date.today().strftime('%Y%m%d')}.csv"))
+            st.success("Planning started! Track its progress under Background Jobs below the results.")
+
+    elif entry_method == "🧾 Purchase Ledger":
+        st.markdown("### 🧾 Purchase Ledger")
+        st.info("Upload your purchase ledger (one row per purchase) with an 'item' column in your own words and a 'quantity' column in kg (liters for oils and drinks, pieces for eggs). Items are matched to our ingredient catalog.")
+
+        catalog = get_ingredient_catalog()
+        ledger_file = st.file_uploader("Upload ledger (CSV or Excel)", type=['csv', 'xlsx', 'xls'], key="ledger_file")
+        if ledger_file is not None:
+            try:
+                ledger = pd.read_csv(ledger_file) if ledger_file.name.endswith('.csv') else pd.read_excel(ledger_file)
+                ledger.columns = [str(col).strip().lower() for col in ledger.columns]
+                lines = catalog.ledger_footprint(ledger)
+                matched = lines['matched_item'].notna()
+
+                ledger_col1, ledger_col2, ledger_col3 = st.columns(3)
+                ledger_col1.metric("Ledger lines", f"{len(lines):,}")
+                ledger_col2.metric("Matched", f"{matched.mean() * 100 if len(lines) else 0:.1f}%")
+                ledger_col3.metric("Ingredient footprint", f"{lines['kgco2e'].sum() / 1000:.2f} tCO₂e")
+
+                by_category = ledger_summary(lines)
+                st.bar_chart(by_category['kgco2e'] / 1000)
+                st.markdown("#### Top items")
+                st.dataframe(ledger_summary(lines, by='matched_item').head(20), use_container_width=True)
+                unmatched = unmatched_items(lines)
+                if len(unmatched):
+                    with st.expander(f"⚠️ {len(unmatched)} item names not recognised"):
+                        st.dataframe(unmatched, hide_index=True, use_container_width=True)
+                st.download_button(
+                    label="📄 Download Matched Ledger as CSV",
+                    data=lines.to_csv(index=False),
+                    file_name=f"ledger_footprint_{datetime.date.today().strftime('%Y%m%d')}.csv",
+                    mime="text/csv"
+                )
+            except Exception as e:
+                st.error(f"Error reading ledger: {str(e)}")
+
+        with st.expander(f"📚 Ingredient catalog ({len(catalog.catalog)} items)"):
+            st.dataframe(catalog.catalog, hide_index=True, use_container_width=True)
+
     elif entry_method == "📥 Download Template":
         st.markdown("### 📥 Download Data Template")
         st.info("Download this template to prepare your data in the correct format.")
@@ -190,7 +416,8 @@ Choose the most convenient way to enter your restaurant's data:
             'takeaway_containers': [5000]
         }
         
-        template_df = pd.DataFrame(template_data)
+        # Headers carry their unit, e.g. electricity[kWh]; change the tag to enter another unit such as electricity[MWh]
+        template_df = pd.DataFrame(template_data).rename(columns=template_column)
         
         col1, col2 = st.columns(2)
         
@@ -260,7 +487,8 @@ Choose the most convenient way to enter your restaurant's data:
                         '1000-5000 orders/year',
                         '10000-25000 visits/year',
                         '3000-8000 containers/year'
-                    ]
+                    ],
+                    'Accepted Units': [', '.join(accepted_units(col)) for col in template_data]
                 })
                 instructions.to_excel(writer, sheet_name='Instructions', index=False)
             
@@ -277,6 +505,7 @@ Choose the most convenient way to enter your restaurant's data:
         ### 📋 Instructions:
         1. Download the template file
         2. Fill in your restaurant's data in the first row
+           - Bills in other units can be entered as they are: change the unit in the column header (e.g. `lpg_used[cylinder_19]`, `electricity[MWh]`), or add a `<column>_unit` column with a unit per row. The accepted units are listed in the Excel template
         3. Save the file
         4. Upload it back using the "Upload CSV/Excel File" option above
         """)
@@ -361,9 +590,11 @@ Choose the most convenient way to enter your restaurant's data:
                 'takeaway_containers': selected_data['customer_visits'] * 0.4  # Estimate
             }
             st.session_state.sample_data = complete_data
+            snapshot(st.session_state.session_token, 'sample_data')
             st.success(f"Sample data for {restaurant_type} loaded! View results in other tabs.")
 
 # --- Scope 1 ---
+profile_stage("Manual entry")
 with tab2:
     st.markdown("""
 ### 🔥 Scope 1: Direct Emissions
@@ -376,6 +607,50 @@ with tab2:
     lpg_used_manual = st.number_input("LPG/Natural Gas used for cooking (kg/year) 🥘", min_value=0.0, help="Total LPG or natural gas used for all cooking in a year.")
     generator_fuel_manual = st.number_input("Diesel/Petrol used in generators (liters/year) ⛽", min_value=0.0, help="Total diesel or petrol used for backup generators in a year.")
     refrigerant_leak_manual = st.number_input("Refrigerant leakage (kg/year) ❄️", min_value=0.0, help="Estimated refrigerant lost from fridges, cold storage, ACs in a year.")
+    with st.expander("❄️ Refrigerant Equipment Register"):
+        st.caption("List each fridge, cold room and AC with its gas and charge (kg). Enter the refrigerant topped up this year if you know it; "
+                   "otherwise the unit's leak rate (share of charge per year) or a typical rate for its equipment type is used.")
+        if 'refrigerant_register' not in st.session_state:
+            st.session_state.refrigerant_register = sample_register()
+        register_file = st.file_uploader("Upload register (CSV with unit, equipment, gas, charge_kg and optional topup_kg, leak_rate)", type=['csv'], key="register_file")
+        if register_file is not None and st.session_state.get('register_file_id') != register_file.file_id:
+            try:
+                uploaded_register = pd.read_csv(register_file)
+                uploaded_register.columns = [str(col).strip().lower() for col in uploaded_register.columns]
+                uploaded_register['gas'] = uploaded_register['gas'].map(normalize_gas)
+                st.session_state.refrigerant_register = uploaded_register
+                st.session_state.register_file_id = register_file.file_id
+                snapshot(st.session_state.session_token, 'refrigerant_register')
+            except Exception as e:
+                st.error(f"Error reading register: {str(e)}")
+        with st.form("refrigerant_register_form"):
+            edited_register = st.data_editor(
+                st.session_state.refrigerant_register,
+                num_rows="dynamic",
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    'equipment': st.column_config.SelectboxColumn("equipment", options=list(LEAK_RATES)),
+                    'gas': st.column_config.SelectboxColumn("gas", options=list(GWP)),
+                }
+            )
+            if st.form_submit_button("Apply Register Edits"):
+                st.session_state.refrigerant_register = edited_register
+                snapshot(st.session_state.session_token, 'refrigerant_register')
+        try:
+            register_lines = refrigerant_emissions(st.session_state.refrigerant_register)
+        except ValueError as e:
+            register_lines = None
+            st.error(str(e))
+        if register_lines is not None:
+            register_col1, register_col2 = st.columns(2)
+            register_col1.metric("Refrigerant leaked", f"{register_lines['leak_kg'].sum():.2f} kg/year")
+            register_col2.metric("Refrigerant emissions", f"{register_lines['kgco2e'].sum() / 1000:.2f} tCO₂e/year")
+            st.dataframe(register_summary(register_lines).round(3), use_container_width=True)
+            unknown_gases = sorted(set(register_lines.loc[register_lines['gwp'].isna(), 'gas_code']))
+            if unknown_gases:
+                st.warning(f"No GWP for {', '.join(unknown_gases)}; those units are not counted.")
+            st.checkbox("Use the register for refrigerant emissions (replaces the leakage figure)", key="use_refrigerant_register")
     owned_vehicle_fuel_manual = st.number_input("Fuel used by company-owned delivery vehicles (liters/year) 🚗", min_value=0.0, help="Total petrol/diesel used by restaurant-owned delivery vehicles in a year.")
 
 # --- Scope 2 ---
@@ -388,6 +663,48 @@ with tab3:
 """)
     electricity_manual = st.number_input("Purchased electricity (kWh/year) 💡", min_value=0.0, help="Total electricity used from the grid in a year.")
     chilled_water_manual = st.number_input("Purchased chilled water or steam (kWh or equivalent/year) 💧", min_value=0.0, help="If applicable. Leave as 0 if not used.")
+    meter_results = None
+    with st.expander("⏱️ Smart-Meter Data (Time-of-Use Scope 2)"):
+        st.caption("Upload one year of interval readings (CSV with timestamp and kwh columns, 15-minute or hourly; add an outlet column for several outlets). "
+                   "Scope 2 is then worked out hour by hour with a grid intensity that is lower at midday (solar) and higher at the evening peak, averaging the flat 0.82 kgCO₂e/kWh.")
+        meter_file = st.file_uploader("Upload meter readings (CSV)", type=['csv'], key="meter_file")
+        if meter_file is not None and st.session_state.get('meter_file_id') != meter_file.file_id:
+            try:
+                meter_readings = pd.read_csv(meter_file)
+                meter_readings.columns = [str(col).strip().lower() for col in meter_readings.columns]
+                meter_names, meter_matrix, meter_coverage, meter_dropped = ingest_readings(meter_readings)
+                MeterStore().save(st.session_state.session_token, meter_names, meter_matrix)
+                st.session_state.meter_file_id = meter_file.file_id
+                if meter_dropped:
+                    st.warning(f"The readings cover more than one year, so only the 12 months up to the latest reading were used ({meter_dropped:,} older readings ignored).")
+                if (meter_coverage < 0.95).any():
+                    st.warning(f"Some outlets have readings for less than 95% of the year's hours (lowest {meter_coverage.min() * 100:.0f}%); missing hours count as 0 kWh.")
+            except Exception as e:
+                st.error(f"Error reading meter data: {str(e)}")
+        meter_data = MeterStore().load(st.session_state.session_token)
+        if meter_data is not None:
+            meter_names, meter_matrix = meter_data
+            shift_col1, shift_col2 = st.columns(2)
+            shifts = {
+                'evening_to_midday': shift_col1.slider("Evening load moved to midday (%)", 0, 50, 20, 5, key="shift_evening") / 100,
+                'night_to_midday': shift_col2.slider("Night load moved to midday (%)", 0, 50, 0, 5, key="shift_night") / 100,
+            }
+            meter_results = time_of_use_scope2(meter_matrix, meter_names, shifts=shifts)
+            shift_saving = sum(meter_results[f'{name}_saving_kg'].sum() for name in shifts) / 1000
+            meter_col1, meter_col2, meter_col3 = st.columns(3)
+            meter_col1.metric("Metered electricity", f"{meter_results['kwh'].sum():,.0f} kWh/year")
+            meter_col2.metric("Scope 2 (hourly intensity)", f"{meter_results['scope2_tou_kg'].sum() / 1000:.2f} tCO₂e",
+                              delta=f"{(meter_results['scope2_tou_kg'] - meter_results['scope2_flat_kg']).sum() / 1000:+.2f} vs flat factor",
+                              delta_color="inverse")
+            meter_col3.metric("Saved by load shifting", f"{shift_saving:.2f} tCO₂e/year")
+            st.caption(" · ".join(spec['label'] for spec in LOAD_SHIFTS.values()))
+            st.line_chart(pd.DataFrame({'kWh per hour (average day)': average_day(meter_matrix)}))
+            if len(meter_names) > 1:
+                st.dataframe(meter_results.rename(columns={
+                    'outlet': 'Outlet', 'kwh': 'kWh/year', 'scope2_flat_kg': 'Scope 2 flat (kg)', 'scope2_tou_kg': 'Scope 2 hourly (kg)',
+                    'evening_to_midday_saving_kg': 'Evening shift saving (kg)', 'night_to_midday_saving_kg': 'Night shift saving (kg)'
+                }).round(1), use_container_width=True, hide_index=True)
+            st.checkbox("Use metered electricity for Scope 2", key="use_meter_data")
 
 # --- Scope 3 ---
 with tab4:
@@ -433,6 +750,7 @@ with tab4:
     leased_space = st.checkbox("Do you operate in a leased space or kitchen? 🏠")
 
 # --- Carbon Offset Projects ---
+profile_stage("Offsets and certification")
 with tab5:
     st.markdown("""
 ## 🌳 Carbon Offset Projects
@@ -466,8 +784,9 @@ Support these projects to offset your restaurant's carbon emissions and contribu
     project_choice = st.selectbox("Which project are you interested in?", [p['name'] for p in projects], key="offset_project")
     pledge = st.text_area("How would you like to support or collaborate?")
     if st.button("Submit Interest/Pledge", key="offset_submit"):
-        st.balloons()
-        st.success("Thank you for your interest! The project team will contact you soon.")
+        if save_submission('pledge', restaurant_name, {'name': name, 'email': email, 'project': project_choice, 'pledge': pledge}):
+            st.balloons()
+            st.success("Thank you for your interest! The project team will contact you soon.")
 
 # --- Certification & Audit Contact ---
 with tab6:
@@ -479,42 +798,66 @@ If you want your GHG emissions data certified, please contact our auditor for a
     contact_email = st.text_input("Your Email", key="cert_email")
     contact_message = st.text_area("Message (please describe your request or questions)", key="cert_message")
     if st.button("Contact Auditor", key="cert_submit"):
-        st.snow()
-        st.success("Thank you! The auditor will contact you soon regarding your certification request.")
+        if save_submission('audit_request', restaurant_name, {'name': contact_name, 'email': contact_email, 'message': contact_message}):
+            st.snow()
+            st.success("Thank you! The auditor will contact you soon regarding your certification request.")
 
-# --- Save or Submit Button ---
-if st.button("Save/Submit Data"):
-    st.balloons()
-    st.success("Your data has been saved! If you want your emissions data certified, please contact us for a virtual ISO 14064 audit.")
+# --- Menu Footprints ---
+with tab7:
     st.markdown("""
-    👉 [Go to Certification & Audit Contact tab](#certification--audit-contact)
-    """, unsafe_allow_html=True)
-
-# --- Indian Emission Factors (kg CO2e per unit) ---
-EMISSION_FACTORS = {
-    'lpg_kg': 2.983,         # 1 kg LPG ≈ 2.983 kg CO2e (India GHG Platform)
-    'diesel_l': 2.68,       # 1 liter diesel ≈ 2.68 kg CO2e
-    'petrol_l': 2.31,       # 1 liter petrol ≈ 2.31 kg CO2e
-    'refrigerant_kg': 1300, # R134a GWP ≈ 1300 (example, update as needed)
-    'electricity_kwh': 0.82,# 1 kWh grid electricity ≈ 0.82 kg CO2e (India avg)
-    'rice_kg': 2.7,         # 1 kg rice ≈ 2.7 kg CO2e (India, incl. methane)
-    'lentils_kg': 0.9,      # 1 kg lentils ≈ 0.9 kg CO2e
-    'vegetables_kg': 0.5,   # 1 kg vegetables ≈ 0.5 kg CO2e
-    'milk_l': 1.4,          # 1 liter milk ≈ 1.4 kg CO2e
-    'ghee_kg': 8.0,         # 1 kg ghee ≈ 8.0 kg CO2e
-    'spices_kg': 1.5,       # 1 kg spices ≈ 1.5 kg CO2e
-    'oil_l': 3.3,           # 1 liter cooking oil ≈ 3.3 kg CO2e
-    'food_waste_kg': 1.9,   # 1 kg food waste ≈ 1.9 kg CO2e (landfill, India)
-    'packaging_kg': 2.5,    # 1 kg packaging ≈ 2.5 kg CO2e (mixed)
-    'km_transport': 0.15,   # 1 km by small truck ≈ 0.15 kg CO2e
-    'commute_km': 0.12,     # 1 km by bus ≈ 0.12 kg CO2e
-    'business_travel_km': 0.15, # 1 km by taxi ≈ 0.15 kg CO2e
-    'delivery_order': 0.3,  # 1 delivery order ≈ 0.3 kg CO2e (bike/scooter)
-    'customer_visit': 0.2,  # 1 customer visit ≈ 0.2 kg CO2e (short trip)
-    'takeaway_container': 0.05 # 1 container ≈ 0.05 kg CO2e
-}
+## 🍽️ Menu Footprints
+Carbon footprint of each dish on the menu, built up from its ingredients and sub-recipes (batters, sambar, chutneys, gravies). Try a different emission factor for an ingredient to see which dishes change.
+""")
+    recipe_file = st.file_uploader("Upload your recipes (CSV with recipe, yield_unit, component, quantity)", type=['csv'], key="recipe_file")
+    st.caption("One row per component: quantity per portion (or per kg for a yield_unit of kg) in the ingredient's catalog unit, or in kg/portions of another recipe.")
+    recipe_source = recipe_file.file_id if recipe_file is not None else 'default'
+    if st.session_state.get('recipe_source') != recipe_source:
+        try:
+            recipe_table = pd.read_csv(recipe_file) if recipe_file is not None else load_recipes()
+            st.session_state.recipe_book = RecipeBook(recipe_table, get_ingredient_catalog())
+            st.session_state.recipe_source = recipe_source
+        except Exception as e:
+            st.error(f"Error reading recipes: {str(e)}")
+    book = st.session_state.get('recipe_book')
+
+    if book is not None:
+        with st.expander("🔁 What-if: change an ingredient's emission factor"):
+            what_if_item = st.selectbox("Ingredient", sorted(book.factors), key="recipe_factor_item")
+            what_if_unit = book.catalog.units[book.catalog.resolve(what_if_item)[0]]
+            what_if_factor = st.number_input(f"kgCO₂e per {what_if_unit}", min_value=0.0, value=book.factors[what_if_item],
+                                             format="%.3f", key=f"recipe_factor_{what_if_item}")
+            if st.button("Apply factor", key="recipe_factor_apply"):
+                evaluated = book.evaluations
+                changed = book.set_factor(what_if_item, what_if_factor)
+                book.footprints()
+                st.success(f"Recalculated {book.evaluations - evaluated} of {len(book.units)} recipes: {', '.join(changed) or 'none'}")
+
+        dish_table = book.footprints(dishes_only=True)
+        st.markdown("### Footprint per Portion (kgCO₂e)")
+        st.bar_chart(dish_table.set_index('recipe')['kgco2e'])
+        selected_dish = st.selectbox("Dish breakdown", dish_table['recipe'], key="recipe_dish")
+        dish_col1, dish_col2 = st.columns(2)
+        dish_col1.metric("Footprint", f"{book.footprint(selected_dish):.3f} kgCO₂e / {book.units[selected_dish]}")
+        sub_recipes = [name for kind, name, _ in book.components[selected_dish] if kind == 'recipe']
+        dish_col2.metric("Sub-recipes", len(sub_recipes))
+        if sub_recipes:
+            st.caption(f"Includes: {', '.join(sub_recipes)}")
+        st.dataframe(book.breakdown(selected_dish).reset_index().round(4), use_container_width=True, hide_index=True)
+        st.download_button(
+            "⬇️ Download recipe footprints (CSV)",
+            data=book.footprints().to_csv(index=False).encode('utf-8'),
+            file_name="recipe_footprints.csv",
+            mime="text/csv",
+            key="recipe_download"
+        )
+
+# --- Save or Submit Button ---
+# The submission is stored once emissions are calculated below
+save_clicked = st.button("Save/Submit Data")
+save_status = st.container()
 
 # --- Calculate Emissions ---
+profile_stage("Calculation and results")
 # Get data from various sources (manual entry, uploaded file, quick entry, or sample data)
 data_source = None
 if 'uploaded_data' in st.session_state:
@@ -601,39 +944,41 @@ else:
     customer_visits = customer_visits_manual
     takeaway_containers = takeaway_containers_manual
 
+# Smart-meter totals replace the electricity figure when chosen
+if st.session_state.get('use_meter_data') and meter_results is not None:
+    electricity = meter_results['kwh'].sum()
+
+# The equipment register replaces the single leakage figure: its leaked kg is the activity value,
+# and its kgCO2e per leaked kg is this restaurant's refrigerant factor
+site_factors = EMISSION_FACTORS
+if st.session_state.get('use_refrigerant_register') and register_lines is not None:
+    refrigerant_leak = register_lines['leak_kg'].sum()
+    site_factors = register_factors(register_lines)
+
 # Only calculate and display if we're running in Streamlit
-if st._is_running_with_streamlit:
+if runtime.exists():
     # Calculate emissions
-    # Scope 1
-    scope1 = (
-        lpg_used * EMISSION_FACTORS['lpg_kg'] +
-        generator_fuel * EMISSION_FACTORS['diesel_l'] +
-        refrigerant_leak * EMISSION_FACTORS['refrigerant_kg'] +
-        owned_vehicle_fuel * EMISSION_FACTORS['petrol_l']
-    )
-    # Scope 2
-    scope2 = (
-        electricity * EMISSION_FACTORS['electricity_kwh'] +
-        chilled_water * EMISSION_FACTORS['electricity_kwh']
-    )
-    # Scope 3
-    scope3 = (
-        rice_kg * EMISSION_FACTORS['rice_kg'] +
-        lentils_kg * EMISSION_FACTORS['lentils_kg'] +
-        vegetables_kg * EMISSION_FACTORS['vegetables_kg'] +
-        milk_liters * EMISSION_FACTORS['milk_l'] +
-        ghee_kg * EMISSION_FACTORS['ghee_kg'] +
-        spices_kg * EMISSION_FACTORS['spices_kg'] +
-        oil_liters * EMISSION_FACTORS['oil_l'] +
-        upstream_transport_km * EMISSION_FACTORS['km_transport'] +
-        food_waste_kg * EMISSION_FACTORS['food_waste_kg'] +
-        packaging_waste_kg * EMISSION_FACTORS['packaging_kg'] +
-        staff_count * avg_commute_km * 365 * EMISSION_FACTORS['commute_km'] +
-        business_travel_km * EMISSION_FACTORS['business_travel_km'] +
-        third_party_deliveries * EMISSION_FACTORS['delivery_order'] +
-        customer_visits * EMISSION_FACTORS['customer_visit'] +
-        takeaway_containers * EMISSION_FACTORS['takeaway_container']
-    )
+    activity_data = {
+        'lpg_used': lpg_used, 'generator_fuel': generator_fuel,
+        'refrigerant_leak': refrigerant_leak, 'owned_vehicle_fuel': owned_vehicle_fuel,
+        'electricity': electricity, 'chilled_water': chilled_water,
+        'rice_kg': rice_kg, 'lentils_kg': lentils_kg, 'vegetables_kg': vegetables_kg,
+        'milk_liters': milk_liters, 'ghee_kg': ghee_kg, 'spices_kg': spices_kg,
+        'oil_liters': oil_liters, 'upstream_transport_km': upstream_transport_km,
+        'food_waste_kg': food_waste_kg, 'packaging_waste_kg': packaging_waste_kg,
+        'staff_count': staff_count, 'avg_commute_km': avg_commute_km,
+        'business_travel_km': business_travel_km, 'third_party_deliveries': third_party_deliveries,
+        'customer_visits': customer_visits, 'takeaway_containers': takeaway_containers
+    }
+    # Kept across reruns so an edited field only updates the terms it feeds; rebuilt when the factors change
+    if 'emissions_graph' not in st.session_state or st.session_state.emissions_graph.factors != site_factors:
+        st.session_state.emissions_graph = EmissionsGraph(activity_data, site_factors)
+    else:
+        st.session_state.emissions_graph.update_row(0, activity_data)
+    emissions = st.session_state.emissions_graph.emissions().iloc[0]
+    scope1 = emissions['scope1']
+    scope2 = emissions['scope2']
+    scope3 = emissions['scope3']
     # Convert to tonnes
     scope1_t = scope1 / 1000
     scope2_t = scope2 / 1000
@@ -641,18 +986,168 @@ if st._is_running_with_streamlit:
     total_t = scope1_t + scope2_t + scope3_t
 
     # Display results
+    tou_note = ""
+    if meter_results is not None:
+        tou_note = f" (hourly grid intensity from smart-meter data: {meter_results['scope2_tou_kg'].sum() / 1000:.2f} tCO₂e)"
     st.markdown(f"""
     ---
     ## 🧮 Total GHG Emissions: **{total_t:.2f} tCO₂e/year**
     - 🔥 Scope 1: {scope1_t:.2f} tCO₂e
-    - 💡 Scope 2: {scope2_t:.2f} tCO₂e
+    - 💡 Scope 2: {scope2_t:.2f} tCO₂e{tou_note}
     - 🛵 Scope 3: {scope3_t:.2f} tCO₂e
     ---
     """)
 
+    # Scope 3 split into the 15 GHG Protocol categories
+    scope3_by_category = (scope3_categories(activity_data).iloc[0] / 1000).rename(category_labels())
+    if scope3_t > 0:
+        with st.expander("📑 Scope 3 by GHG Protocol Category"):
+            reported = scope3_by_category[scope3_by_category > 0]
+            st.bar_chart(reported.rename("tCO₂e/year"))
+            st.dataframe(scope3_by_category.rename("tCO₂e/year").round(3), use_container_width=True)
+
+    # Base year and year-over-year change, restated when the factor table changes
+    if total_t > 0:
+        with st.expander("📅 Base Year & Year-over-Year Comparison (ISO 14064)"):
+            if not restaurant_name.strip():
+                st.info("Enter your restaurant name at the top of the page to store a base year.")
+            else:
+                baseline_store = get_baseline_store()
+                yoy_sources = {"This restaurant's results": activity_data}
+                if 'outlet_table' in st.session_state and 'outlet' in st.session_state.outlet_table.columns:
+                    yoy_sources["Multi-Outlet Grid"] = st.session_state.outlet_table
+                yoy_source = st.radio("Compare", list(yoy_sources), horizontal=True, key="yoy_source")
+                yoy_factors = site_factors if yoy_source == "This restaurant's results" else EMISSION_FACTORS
+                stored = baseline_store.load(restaurant_name, yoy_factors)
+                if stored is not None:
+                    reported, restated, recomputed = stored
+                    if recomputed:
+                        st.info(f"The emission factors changed since the {reported.year} base year was stored: "
+                                f"{len(recomputed)} of {len(reported.outlets)} outlets were recalculated with the current factors.")
+                    restate = st.checkbox("Restate the base year with the current emission factors", value=True, key="yoy_restate",
+                                          help="Like-for-like comparison. Untick to compare against the base year as reported and see the effect of factor changes.")
+                    comparison = compare_years(restated if restate else reported, yoy_sources[yoy_source], yoy_factors)
+                    by_scope = yoy_summary(comparison)
+                    by_scope[by_scope.columns[:-1]] /= 1000
+                    yoy_cols = st.columns(3)
+                    for col, scope in zip(yoy_cols, ['scope1', 'scope2', 'scope3']):
+                        if scope in by_scope.index:
+                            col.metric(f"Scope {scope[-1]} vs {reported.year}", f"{by_scope.loc[scope, 'current_kg']:.2f} tCO₂e",
+                                       f"{by_scope.loc[scope, 'change_kg']:+.2f} t", delta_color="inverse")
+                    st.markdown("**Change per scope (tCO₂e), split into activity change and factor change**")
+                    st.dataframe(by_scope.rename(columns={
+                        'base_kg': f'Base year {reported.year}', 'current_kg': 'Current', 'change_kg': 'Change',
+                        'activity_effect_kg': 'Activity change', 'factor_effect_kg': 'Factor change', 'change_pct': 'Change %'
+                    }).round(3), use_container_width=True)
+                    by_driver = yoy_summary(comparison, by='driver') / 1000
+                    by_driver = by_driver.reindex(by_driver['change_kg'].abs().sort_values(ascending=False).index)
+                    st.bar_chart(by_driver[['activity_effect_kg', 'factor_effect_kg']].head(10).rename(
+                        columns={'activity_effect_kg': 'Activity change', 'factor_effect_kg': 'Factor change'}))
+                    st.download_button(
+                        label="📄 Download Year-over-Year Comparison as CSV",
+                        data=comparison.to_csv(index=False),
+                        file_name=f"yoy_comparison_{datetime.date.today().strftime('%Y%m%d')}.csv",
+                        mime="text/csv"
+                    )
+                base_col1, base_col2 = st.columns([1, 2])
+                base_year = base_col1.number_input("Base year", min_value=2000, max_value=2100,
+                                                   value=datetime.date.today().year - 1, step=1, key="base_year")
+                if base_col2.button("📌 Store current data as base year", key="store_base_year"):
+                    baseline_store.save(restaurant_name, Baseline(yoy_sources[yoy_source], base_year, yoy_factors))
+                    st.success(f"Base year {base_year} stored for {restaurant_name.strip()}.")
+                    st.rerun()
+
+    # Annual totals allocated to the dishes sold, from a POS sales export
+    if total_t > 0 and st.session_state.get('recipe_book') is not None:
+        with st.expander("🧾 Allocate Emissions to Dishes (POS Sales)"):
+            st.caption("Upload a year of POS line items (CSV with order_id, item and quantity columns; items of one order on consecutive rows). "
+                       "Scope 1 and 2 are shared by cooking energy, Scope 3 by recipe ingredients. Item names are matched to the recipes in the Menu Footprints tab.")
+            sales_file = st.file_uploader("Upload POS sales (CSV)", type=['csv'], key="sales_file")
+            if sales_file is not None:
+                try:
+                    dish_allocation, order_summary = allocate_sales(sales_file, st.session_state.recipe_book, scope1, scope2, scope3)
+                    sales_col1, sales_col2, sales_col3 = st.columns(3)
+                    sales_col1.metric("Orders", f"{order_summary['orders']:,}")
+                    sales_col2.metric("kgCO₂e per order", f"{order_summary['mean_kg']:.2f}")
+                    sales_col3.metric("Portions matched to recipes", f"{order_summary['matched_share'] * 100:.1f}%")
+                    st.caption(f"Per order: median {order_summary['p50_kg']:.2f}, 90th percentile {order_summary['p90_kg']:.2f}, "
+                               f"99th percentile {order_summary['p99_kg']:.2f} kgCO₂e ({order_summary['lines']:,} line items)")
+                    st.dataframe(dish_allocation.drop(columns='allocated').rename(columns={
+                        'item': 'Item', 'portions': 'Portions', 'recipe': 'Recipe', 'scope1_kg': 'Scope 1 (kg)',
+                        'scope2_kg': 'Scope 2 (kg)', 'scope3_kg': 'Scope 3 (kg)', 'total_kg': 'Total (kg)',
+                        'kg_per_portion': 'kgCO₂e per portion'
+                    }).round(3), use_container_width=True, hide_index=True)
+                    unallocated = dish_allocation.loc[dish_allocation['recipe'].isna(), 'item']
+                    if len(unallocated):
+                        st.warning(f"No recipe for {len(unallocated)} items, so they were not allocated: {', '.join(unallocated[:10])}")
+                    per_kg = dish_allocation.loc[dish_allocation['recipe'].notna() & ~dish_allocation['allocated'], 'item']
+                    if len(per_kg):
+                        st.warning(f"{len(per_kg)} items match a recipe with a kg yield, so their POS quantities cannot be read as portions "
+                                   f"and they were not allocated: {', '.join(per_kg[:10])}. Add a per-portion recipe for them")
+                    st.download_button(
+                        "⬇️ Download dish allocation (CSV)",
+                        data=dish_allocation.to_csv(index=False).encode('utf-8'),
+                        file_name="dish_allocation.csv",
+                        mime="text/csv",
+                        key="sales_download"
+                    )
+                except Exception as e:
+                    st.error(f"Error reading sales file: {str(e)}")
+
+    # Peer benchmarking
+    if total_t > 0:
+        ranks = rank_against_peers(get_benchmark_index(), activity_data, st.session_state.emissions_graph.emissions()).iloc[0]
+        st.markdown("### 📈 How You Compare to Peer Restaurants")
+        st.caption("Peers are 5,000 modelled restaurants drawn around the sample restaurant types, not surveyed restaurants.")
+        bench_col1, bench_col2 = st.columns(2)
+        with bench_col1:
+            if customer_visits > 0:
+                st.metric("kgCO₂e per customer visit", f"{total_t * 1000 / customer_visits:.2f}")
+                st.caption(f"Lower than {100 - ranks['kg_per_visit']:.0f}% of modelled peer restaurants")
+        with bench_col2:
+            if rice_kg > 0:
+                st.metric("kgCO₂e per kg of rice", f"{total_t * 1000 / rice_kg:.2f}")
+                st.caption(f"Lower than {100 - ranks['kg_per_rice_kg']:.0f}% of modelled peer restaurants")
+
+        with st.expander("🥧 Emissions Breakdown"):
+            st.markdown(pie_svg(card_breakdown(activity_data, site_factors).iloc[0].to_dict()), unsafe_allow_html=True)
+
+    # Reduction recommendations
+    recommendation_lines = []
+    if total_t > 0:
+        st.markdown("### 💡 Reduction Recommendations")
+        target_pct = st.slider("Reduction target (%)", min_value=5, max_value=50, value=20, step=5)
+        target_t = total_t * target_pct / 100
+        plan = recommend_reductions(activity_data, target_t, factors=site_factors)
+        plan_summary = summarize_plan(plan, activity_data, target_t).iloc[0]
+        if plan.empty:
+            st.info("No actions in the catalog reduce emissions for this data.")
+        else:
+            st.dataframe(plan[['label', 'reduction_t', 'annual_cost_inr']].rename(columns={
+                'label': 'Action', 'reduction_t': 'Reduction (tCO₂e/year)', 'annual_cost_inr': 'Net cost (₹/year)'
+            }), hide_index=True)
+            st.caption("Net cost includes savings on fuel, electricity and purchases; negative means the action pays for itself.")
+            if plan_summary['target_met']:
+                net_cost = plan_summary['annual_cost_inr']
+                st.success(f"Cuts {plan_summary['reduction_t']:.2f} tCO₂e/year (target {target_t:.2f}) "
+                           + (f"and saves ₹{-net_cost:,.0f}/year" if net_cost < 0 else f"for a net ₹{net_cost:,.0f}/year"))
+            else:
+                st.warning(f"The catalog reaches {plan_summary['reduction_t']:.2f} of the {target_t:.2f} tCO₂e/year target")
+            recommendation_lines = [f"Recommendation: {row.label} (-{row.reduction_t:.2f} tCO₂e, ₹{row.annual_cost_inr:,.0f}/year)"
+                                    for row in plan.itertuples()]
+
     # Data export section
+    profile_stage("Export and jobs")
     st.markdown("### 📤 Export Your Data")
 
+    # Every export records which inputs, factor table and code produced its numbers
+    reproducibility = fingerprint_columns(activity_data, site_factors).iloc[0]
+    reproducibility_items = [
+        ('Result fingerprint', reproducibility['fingerprint']),
+        ('Factor table version', reproducibility['factor_version']),
+        ('Code version', reproducibility['code_version'])
+    ]
+
     # Create data for export
     export_data = {
         'Restaurant Data': {
@@ -683,15 +1178,23 @@ if st._is_running_with_streamlit:
             'Scope 1 Emissions (tCO2e/year)': scope1_t,
             'Scope 2 Emissions (tCO2e/year)': scope2_t,
             'Scope 3 Emissions (tCO2e/year)': scope3_t,
-            'Total Emissions (tCO2e/year)': total_t
+            **{f'Scope 3 - {label} (tCO2e/year)': value for label, value in scope3_by_category.items()},
+            'Total Emissions (tCO2e/year)': total_t,
+            **dict(reproducibility_items)
         }
     }
 
+    if site_factors is not EMISSION_FACTORS:
+        # Physical kg leaked per gas from the equipment register, and the refrigerant factor they give
+        for gas, leak_kg in register_summary(register_lines)['leak_kg'].items():
+            export_data['Restaurant Data'][f'Refrigerant leakage, {gas} (kg/year)'] = leak_kg
+        export_data['Restaurant Data']['Refrigerant factor (kgCO2e/kg leaked)'] = site_factors['refrigerant_kg']
+
     col1, col2 = st.columns(2)
 
     with col1:
         # Export as CSV
-        export_df = pd.DataFrame(list(export_data['Restaurant Data'].items()), 
+        export_df = pd.DataFrame(list(export_data['Restaurant Data'].items()) + reproducibility_items,
                                 columns=['Parameter', 'Value'])
         csv_export = export_df.to_csv(index=False)
         st.download_button(
@@ -702,55 +1205,76 @@ if st._is_running_with_streamlit:
         )
 
     with col2:
-        # Export as Excel with multiple sheets
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            # Restaurant data sheet
-            pd.DataFrame(list(export_data['Restaurant Data'].items()), 
-                        columns=['Parameter', 'Value']).to_excel(writer, sheet_name='Restaurant Data', index=False)
-            
-            # Emissions results sheet
-            pd.DataFrame(list(export_data['Emissions Results'].items()), 
-                        columns=['Parameter', 'Value']).to_excel(writer, sheet_name='Emissions Results', index=False)
-            
-            # Summary sheet
-            if total_t > 0:
-                scope1_pct = scope1_t / total_t * 100
-                scope2_pct = scope2_t / total_t * 100
-                scope3_pct = scope3_t / total_t * 100
+        # Excel report is built by the background job queue
+        if total_t > 0:
+            scope1_pct = scope1_t / total_t * 100
+            scope2_pct = scope2_t / total_t * 100
+            scope3_pct = scope3_t / total_t * 100
+        else:
+            scope1_pct = scope2_pct = scope3_pct = 0
+
+        summary_lines = [
+            f"Total GHG Emissions: {total_t:.2f} tCO₂e/year",
+            f"Scope 1 (Direct): {scope1_t:.2f} tCO₂e ({scope1_pct:.1f}%)",
+            f"Scope 2 (Energy): {scope2_t:.2f} tCO₂e ({scope2_pct:.1f}%)",
+            f"Scope 3 (Value Chain): {scope3_t:.2f} tCO₂e ({scope3_pct:.1f}%)",
+            f"Date: {datetime.date.today().strftime('%B %d, %Y')}",
+            f"Restaurant Type: {'Custom Data' if data_source else 'Manual Entry'}"
+        ] + recommendation_lines
+        if st.button("📊 Generate Excel Report"):
+            track_job(get_job_queue().submit(
+                job_tenant, "Excel report", build_excel_report, export_data, summary_lines,
+                filename=f"restaurant_emissions_report_{datetime.date.today().strftime('%Y%m%d')}.xlsx"))
+        if st.button("📑 Generate PDF Audit Report"):
+            track_job(get_job_queue().submit(
+                job_tenant, "PDF audit report", audit_report_pdf, dict(activity_data), restaurant_name.strip() or "Restaurant", site_factors,
+                filename=f"restaurant_audit_report_{datetime.date.today().strftime('%Y%m%d')}.pdf"))
+
+    # Background jobs for this session
+    if st.session_state.get('job_ids'):
+        st.markdown("### ⏳ Background Jobs")
+        job_queue = get_job_queue()
+        for job_id in st.session_state.job_ids:
+            job = job_queue.status(job_id)
+            if job is None:
+                continue
+            artifact = job_queue.artifact(job_id) if job['status'] == 'done' else None
+            if artifact is not None:
+                content, filename = artifact
+                st.download_button(f"⬇️ Download {job['name']}", data=content, file_name=filename, key=f"job_{job_id}")
+            elif job['status'] == 'done':
+                st.info(f"{job['name']}: the result has expired, please generate it again.")
+            elif job['status'] == 'failed':
+                st.error(f"{job['name']} failed: {job['error']}")
             else:
-                scope1_pct = scope2_pct = scope3_pct = 0
-
-            summary_data = {
-                'Summary': [
-                    f"Total GHG Emissions: {total_t:.2f} tCO₂e/year",
-                    f"Scope 1 (Direct): {scope1_t:.2f} tCO₂e ({scope1_pct:.1f}%)",
-                    f"Scope 2 (Energy): {scope2_t:.2f} tCO₂e ({scope2_pct:.1f}%)",
-                    f"Scope 3 (Value Chain): {scope3_t:.2f} tCO₂e ({scope3_pct:.1f}%)",
-                    f"Date: {datetime.date.today().strftime('%B %d, %Y')}",
-                    f"Restaurant Type: {'Custom Data' if data_source else 'Manual Entry'}"
-                ]
-            }
-            pd.DataFrame(summary_data).to_excel(writer, sheet_name='Summary', index=False)
-        
-        buffer.seek(0)
-        st.download_button(
-            label="📊 Export as Excel Report",
-            data=buffer,
-            file_name=f"restaurant_emissions_report_{datetime.date.today().strftime('%Y%m%d')}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+                st.progress(job['progress'], text=f"{job['name']}: {job['message'] or job['status']}")
+        if not JOB_POLL_SECONDS:
+            st.button("🔄 Refresh Job Status")
+
+    # Store the submission
+    if save_clicked:
+        with save_status:
+            if save_submission('data', restaurant_name, {
+                    **activity_data,
+                    'scope1_t': scope1_t, 'scope2_t': scope2_t, 'scope3_t': scope3_t, 'total_t': total_t}):
+                st.balloons()
+                st.success("Your data has been saved! If you want your emissions data certified, please contact us for a virtual ISO 14064 audit.")
+                st.markdown("""
+                👉 [Go to Certification & Audit Contact tab](#certification--audit-contact)
+                """, unsafe_allow_html=True)
 
     # Clear data option
     if st.button("🗑️ Clear All Data"):
         # Clear session state
-        for key in ['uploaded_data', 'quick_data', 'sample_data']:
+        for key in SNAPSHOT_KEYS:
             if key in st.session_state:
                 del st.session_state[key]
+        get_session_snapshots().delete(st.session_state.session_token)
         st.success("Data cleared! Refresh the page to start over.")
         st.rerun()
 
 # --- Colorful Footer ---
+profile_stage("Footer")
 st.markdown("""
 ---
 <center>
@@ -762,3 +1286,10 @@ st.markdown("""
     <span style='color:green;'>Let's make food greener, together!</span>
 </center>
 """, unsafe_allow_html=True)
+
+profile_end(st.session_state)
+
+# Rerun while this session's background jobs are queued or running, so progress and downloads appear by themselves
+if JOB_POLL_SECONDS and st.session_state.get('job_ids') and get_job_queue().pending(st.session_state.job_ids):
+    time.sleep(JOB_POLL_SECONDS)
+    st.rerun()
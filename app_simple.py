@@ -4,11 +4,26 @@ import numpy as np
 import io
 import datetime
 import openpyxl
+from assets import banner_html, build_assets
 
 st.set_page_config(layout="wide", page_title="Carbon Calculator", page_icon="./media/favicon.ico")
 
+@st.cache_resource
+def get_asset_manifest():
+    # Banner variants and font subsets, built (or checked) once per server process
+    try:
+        return build_assets()
+    except Exception:
+        # Unwritable directory, missing fontTools or an unreadable source: the page falls back to st.image
+        return None
+
 # --- Banner ---
-st.image('./media/background_min.jpg', use_column_width=True)
+# Pre-encoded WebP variants at content-hashed static URLs, the browser picks a width
+banner = banner_html(alt="Carbon Calculator", manifest=get_asset_manifest())
+if banner:
+    st.markdown(banner, unsafe_allow_html=True)
+else:
+    st.image('./media/background_min.jpg', use_column_width=True)
 
 # --- Simple Header ---
 st.markdown("""
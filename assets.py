@@ -0,0 +1,170 @@
+import os
+import re
+import sys
+import json
+import string
+import hashlib
+import argparse
+from functools import lru_cache
+
+from PIL import Image
+
+# Served by Streamlit's static file serving (server.enableStaticServing) at app/static/assets/
+ASSETS_DIR = "./static/assets"
+ASSETS_URL = "app/static/assets"
+MANIFEST = "manifest.json"
+# Names of the files build_assets writes: <name>-<source hash>[-<width>].<ext>
+BUILT_FILE = re.compile(r'(.+)-[0-9a-f]{10}(?:-\d+)?\.(?:webp|jpg|ttf)')
+
+# Responsive banner variants: widths in px, the browser picks one through srcset
+BANNERS = {
+    'banner': {'source': "./media/background_min.jpg", 'widths': [480, 960, 1440, 1920], 'fallback_width': 960},
+}
+WEBP_QUALITY = 78
+JPEG_QUALITY = 82
+
+# Fonts subset to the glyphs drawn with them; text outside the subset falls back to the full font
+FONTS = {
+    'arialuni': {'source': "./style/arialuni.ttf", 'text': string.printable + "₀₁₂₃₄₅₆₇₈₉₹°–—·×"},
+}
+
+def _digest(spec, settings):
+    # Hash of the source file and everything that shapes the output, so a new
+    # source or new settings give new file names (and new URLs)
+    digest = hashlib.sha256(json.dumps([spec, settings], sort_keys=True).encode())
+    with open(spec['source'], 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()[:10]
+
+def _write_json(value, path):
+    with open(path, 'w') as f:
+        json.dump(value, f, indent=1)
+
+def _save_atomic(save, path):
+    save(path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+def build_banner(name, spec, out_dir, digest):
+    """
+    Encode the WebP width variants and a progressive JPEG fallback of one banner
+    File names carry the source hash, so their URLs never change content
+    """
+    image = Image.open(spec['source']).convert('RGB')
+    entry = {'source_hash': digest, 'webp': {}, 'aspect': image.height / image.width}
+    for width in sorted({min(w, image.width) for w in spec['widths']}):
+        resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        filename = f"{name}-{digest}-{width}.webp"
+        _save_atomic(lambda p: resized.save(p, 'WEBP', quality=WEBP_QUALITY, method=6), os.path.join(out_dir, filename))
+        entry['webp'][str(width)] = filename
+    width = min(spec['fallback_width'], image.width)
+    fallback = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+    entry['jpeg'] = f"{name}-{digest}-{width}.jpg"
+    _save_atomic(lambda p: fallback.save(p, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True),
+                 os.path.join(out_dir, entry['jpeg']))
+    return entry
+
+def build_font(name, spec, out_dir, digest):
+    """
+    Subset a TrueType font to the characters of spec['text'] (fontTools, a matplotlib dependency)
+    """
+    from fontTools import subset
+    options = subset.Options()
+    options.name_IDs = ['*']
+    options.notdef_outline = True
+    font = subset.load_font(spec['source'], options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=spec['text'])
+    subsetter.subset(font)
+    filename = f"{name}-{digest}.ttf"
+    _save_atomic(lambda p: subset.save_font(font, p, options), os.path.join(out_dir, filename))
+    return {'source_hash': digest, 'file': filename, 'text': spec['text']}
+
+def build_assets(out_dir=ASSETS_DIR, force=False):
+    """
+    Build every banner variant and font subset whose source changed since the
+    last build (or all of them with force), remove outdated built files and
+    write the manifest. Other files in out_dir are left alone. Returns the manifest
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    previous = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path) as f:
+            previous = json.load(f)
+
+    manifest = {'banners': {}, 'fonts': {}}
+    settings = {'banners': [WEBP_QUALITY, JPEG_QUALITY], 'fonts': []}
+    for group, specs, build in (('banners', BANNERS, build_banner), ('fonts', FONTS, build_font)):
+        for name, spec in specs.items():
+            digest = _digest(spec, settings[group])
+            entry = previous.get(group, {}).get(name)
+            fresh = entry and entry['source_hash'] == digest and all(
+                os.path.exists(os.path.join(out_dir, f)) for f in _entry_files(entry))
+            if not fresh:
+                entry = build(name, spec, out_dir, digest)
+            manifest[group][name] = entry
+
+    keep = {f for group in manifest.values() for entry in group.values() for f in _entry_files(entry)} | {MANIFEST}
+    for filename in os.listdir(out_dir):
+        built = BUILT_FILE.fullmatch(filename)
+        if filename not in keep and built and (built.group(1) in BANNERS or built.group(1) in FONTS):
+            os.remove(os.path.join(out_dir, filename))
+    _save_atomic(lambda p: _write_json(manifest, p), manifest_path)
+    load_manifest.cache_clear()
+    return manifest
+
+def _entry_files(entry):
+    return list(entry.get('webp', {}).values()) + [entry[key] for key in ('jpeg', 'file') if key in entry]
+
+@lru_cache(maxsize=1)
+def load_manifest(out_dir=ASSETS_DIR):
+    """
+    The last build's manifest, or None if the assets were never built
+    """
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def banner_html(name='banner', alt="", manifest=None):
+    """
+    A <picture> with the WebP variants in a srcset and the JPEG fallback, full width
+    Returns None if the banner was not built
+    """
+    manifest = load_manifest() if manifest is None else manifest
+    entry = (manifest or {}).get('banners', {}).get(name)
+    if entry is None:
+        return None
+    srcset = ", ".join(f"{ASSETS_URL}/{filename} {width}w" for width, filename in entry['webp'].items())
+    return (f'<picture><source type="image/webp" srcset="{srcset}" sizes="100vw">'
+            f'<img src="{ASSETS_URL}/{entry["jpeg"]}" alt="{alt}" '
+            f'style="width:100%;height:auto;aspect-ratio:{1 / entry["aspect"]:.4f}" decoding="async"></picture>')
+
+def font_path(name, text=""):
+    """
+    Path of the subset font if it covers every character of text, else of the full font
+    """
+    entry = (load_manifest() or {}).get('fonts', {}).get(name)
+    if entry is not None and set(text) <= set(entry['text']):
+        path = os.path.join(ASSETS_DIR, entry['file'])
+        if os.path.exists(path):
+            return path
+    return FONTS[name]['source']
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the banner variants and font subsets into static/assets")
+    parser.add_argument("--out-dir", default=ASSETS_DIR)
+    parser.add_argument("--force", action="store_true", help="rebuild everything, even unchanged sources")
+    args = parser.parse_args(argv)
+    manifest = build_assets(args.out_dir, args.force)
+    for group, sources in ((manifest['banners'], BANNERS), (manifest['fonts'], FONTS)):
+        for name, entry in group.items():
+            before = os.path.getsize(sources[name]['source'])
+            for filename in _entry_files(entry):
+                size = os.path.getsize(os.path.join(args.out_dir, filename))
+                print(f"{filename:40s} {size / 1024:8.1f} KB  ({size / before * 100:.1f}% of {os.path.basename(sources[name]['source'])})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
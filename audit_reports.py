@@ -0,0 +1,287 @@
+import io
+import os
+import zlib
+import argparse
+import datetime
+import multiprocessing
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+from functions import (ACTIVITY_COLUMNS, EMISSION_FACTORS, EMISSION_FACTOR_SOURCES, SCOPE_TERMS, calculate_emission_terms,
+                       card_breakdown, validate_restaurant_data)
+from cards import render_card, unique_file_stems
+from fingerprints import code_version, factor_version, fingerprints
+
+# PDFs are written directly (text, rules and one JPEG per page set), with the
+# standard Helvetica fonts so nothing is embedded and no PDF library is needed
+PAGE_SIZE = (595, 842)  # A4 in points
+MARGIN = 40
+TEAL = "0.012 0.620 0.557"
+CHART_BOX = (395, 590, 160)  # x, y, size of the share card on page 1
+CHART_JPEG_QUALITY = 80
+MAX_VALIDATION_LINES = 14
+
+# Label and unit of every emission term, in SCOPE_TERMS order
+TERM_LABELS = {
+    'lpg_used': ("LPG", "kg"), 'generator_fuel': ("Generator diesel", "L"),
+    'refrigerant_leak': ("Refrigerant leakage", "kg"), 'owned_vehicle_fuel': ("Owned vehicle petrol", "L"),
+    'electricity': ("Grid electricity", "kWh"), 'chilled_water': ("Chilled water", "kWh"),
+    'rice_kg': ("Rice", "kg"), 'lentils_kg': ("Lentils", "kg"), 'vegetables_kg': ("Vegetables", "kg"),
+    'milk_liters': ("Milk", "L"), 'ghee_kg': ("Ghee", "kg"), 'spices_kg': ("Spices", "kg"),
+    'oil_liters': ("Cooking oil", "L"), 'upstream_transport_km': ("Upstream transport", "km"),
+    'food_waste_kg': ("Food waste", "kg"), 'packaging_waste_kg': ("Packaging waste", "kg"),
+    'business_travel_km': ("Business travel", "km"), 'third_party_deliveries': ("Third-party deliveries", "orders"),
+    'customer_visits': ("Customer visits", "visits"), 'takeaway_containers': ("Takeaway containers", "containers"),
+    'staff_commute': ("Staff commuting", "km"),
+}
+# Rows of the emission terms table: (driver, label, unit, factor key)
+TERM_ROWS = [(column, *TERM_LABELS[column], factor_key) for terms in SCOPE_TERMS.values() for column, factor_key in terms.items()]
+TERM_ROWS.append(('staff_commute', *TERM_LABELS['staff_commute'], 'commute_km'))
+TERM_SCOPES = {column: scope for scope, terms in SCOPE_TERMS.items() for column in terms}
+TERM_SCOPES['staff_commute'] = 'scope3'
+
+# --- PDF primitives ---
+
+# WinAnsi (cp1252) covers the base fonts; a few symbols of the factor notes are spelled out
+PDF_CHARS = str.maketrans({'≈': '~', '₹': 'Rs ', '→': '->', **{chr(0x2080 + i): str(i) for i in range(10)}})
+# Helvetica advance widths (1/1000 em) of the characters used in numbers
+NUMBER_WIDTHS = {**dict.fromkeys("0123456789", 556), '.': 278, ',': 278, '-': 333, ' ': 278, '%': 889}
+
+def _pdf_string(text):
+    raw = str(text).translate(PDF_CHARS).encode('cp1252', 'replace')
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+def _text(x, y, text, size=9, bold=False, color=None):
+    fill = f"{color} rg " if color else ""
+    return f"BT {fill}/F{2 if bold else 1} {size} Tf {x:.1f} {y:.1f} Td ".encode() + _pdf_string(text) + b" Tj ET\n"
+
+def _number(right, y, text, size=9, bold=False):
+    # Right-aligned number, measured with the Helvetica widths
+    width = sum(NUMBER_WIDTHS.get(c, 556) for c in text) * size / 1000
+    return _text(right - width, y, text, size, bold)
+
+def _rule(x1, y, x2, gray=0.75, width=0.5):
+    return f"{gray} G {width} w {x1} {y} m {x2} {y} l S\n".encode()
+
+def _stream(content, dictionary=b""):
+    data = zlib.compress(content, 6)
+    return b"<< /Length %d /Filter /FlateDecode %s>>\nstream\n" % (len(data), dictionary) + data + b"\nendstream"
+
+def _pdf_file(objects):
+    # Objects are numbered 1..n in list order; 1 is the catalog and the last the info dictionary
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, len(objects), xref))
+    return out.getvalue()
+
+# --- Shared templates (built once per process) ---
+
+FONT_OBJECTS = [b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % font
+                for font in (b"Helvetica", b"Helvetica-Bold")]
+
+# Column positions of the terms table
+TERM_COLUMNS = {'activity': MARGIN, 'scope': 180, 'quantity': 320, 'unit': 326, 'factor': 440, 'kg': 555}
+TERMS_TOP = 548
+ROW_HEIGHT = 12.5
+
+@lru_cache(maxsize=1)
+def page1_template():
+    """
+    Everything on page 1 that is the same for every outlet, as a compressed content stream
+    """
+    width, height = PAGE_SIZE
+    ops = [f"{TEAL} rg 0 {height - 72} {width} 72 re f\n".encode(),
+           _text(MARGIN, height - 42, "GHG Emissions Audit Report", 18, True, "1 1 1"),
+           _text(MARGIN, height - 58, "GHG Protocol Scope 1, 2 and 3 inventory of restaurant operations", 9, False, "1 1 1"),
+           _text(MARGIN, 705, "Emissions by scope", 11, True, TEAL),
+           _text(MARGIN, 688, "Scope", 8, True), _number(255, 688, "tCO2e", 8, True), _number(310, 688, "Share", 8, True)]
+    for i, label in enumerate(["Scope 1 (direct)", "Scope 2 (purchased energy)", "Scope 3 (value chain)", "Total"]):
+        ops.append(_text(MARGIN, 672 - 16 * i, label, 9, label == "Total"))
+    ops += [_rule(MARGIN, 684, 310, 0.3), _rule(MARGIN, 630, 310, 0.3),
+            _text(MARGIN, TERMS_TOP + 18, "Emission terms (quantity × factor)", 11, True, TEAL)]
+    top = TERMS_TOP
+    ops += [_text(TERM_COLUMNS['activity'], top, "Activity", 8, True), _text(TERM_COLUMNS['scope'], top, "Scope", 8, True),
+            _number(TERM_COLUMNS['quantity'], top, "Quantity / year", 8, True), _text(TERM_COLUMNS['unit'], top, "Unit", 8, True),
+            _number(TERM_COLUMNS['factor'], top, "kgCO2e / unit", 8, True), _number(TERM_COLUMNS['kg'], top, "kgCO2e / year", 8, True),
+            _rule(MARGIN, top - 4, width - MARGIN, 0.3)]
+    for i, (driver, label, unit, _) in enumerate(TERM_ROWS):
+        y = top - ROW_HEIGHT * (i + 1)
+        ops += [_text(TERM_COLUMNS['activity'], y, label, 8), _text(TERM_COLUMNS['scope'], y, TERM_SCOPES[driver].replace('scope', 'Scope '), 8),
+                _text(TERM_COLUMNS['unit'], y, unit, 8)]
+    bottom = top - ROW_HEIGHT * (len(TERM_ROWS) + 1)
+    ops += [_rule(MARGIN, bottom + ROW_HEIGHT - 4, width - MARGIN, 0.3), _text(TERM_COLUMNS['activity'], bottom, "Total", 8, True),
+            _text(MARGIN, bottom - 26, "Data validation", 11, True, TEAL),
+            _rule(MARGIN, 52, width - MARGIN, 0.75), _number(width - MARGIN, 30, "Page 1 of 2", 7)]
+    return _stream(b"".join(ops))
+
+@lru_cache(maxsize=4)
+def page2_stream(factors_key):
+    """
+    Page 2, the emission factors used and their sources, as a compressed
+    content stream shared by every outlet reported under one factor table
+    """
+    factors = dict(factors_key)
+    width, height = PAGE_SIZE
+    ops = [f"{TEAL} rg 0 {height - 40} {width} 40 re f\n".encode(),
+           _text(MARGIN, height - 26, "Emission factors and sources", 14, True, "1 1 1"),
+           _text(MARGIN, height - 62, f"Factor table version {factor_version(factors)}, calculation code version {code_version()}", 9),
+           _text(MARGIN, height - 86, "Factor", 8, True), _number(250, height - 86, "kgCO2e / unit", 8, True),
+           _text(262, height - 86, "Source / basis", 8, True), _rule(MARGIN, height - 90, width - MARGIN, 0.3)]
+    for i, (key, value) in enumerate(factors.items()):
+        y = height - 104 - 14 * i
+        note = EMISSION_FACTOR_SOURCES.get(key, "")
+        if key in EMISSION_FACTORS and value != EMISSION_FACTORS[key]:
+            note = f"custom value (default {EMISSION_FACTORS[key]:g}: {note})" if note else "custom value"
+        ops += [_text(MARGIN, y, key, 8), _number(250, y, f"{value:g}", 8), _text(262, y, note[:75], 8)]
+    y = height - 104 - 14 * len(factors) - 10
+    ops += [_rule(MARGIN, y, width - MARGIN, 0.3),
+            _text(MARGIN, y - 16, "Staff commuting is staff × one-way commute km × 365 days × commute_km.", 8),
+            _text(MARGIN, y - 28, "Each result carries a fingerprint of its inputs, factor table and code; the same inputs reproduce it.", 8),
+            _rule(MARGIN, 52, width - MARGIN, 0.75), _number(width - MARGIN, 30, "Page 2 of 2", 7)]
+    return _stream(b"".join(ops))
+
+@lru_cache(maxsize=256)
+def chart_image(breakdown, value):
+    """
+    The chart() share card of a breakdown as a JPEG image XObject, cached per
+    rounded breakdown (identical outlets share one render)
+    """
+    card = render_card(dict(breakdown), value, caption="Annual Emission", unit="tCO₂e", decimals=1)
+    flat = Image.new('RGB', card.size, (255, 255, 255))
+    flat.paste(card, mask=card.getchannel('A'))
+    buffer = io.BytesIO()
+    flat.save(buffer, 'JPEG', quality=CHART_JPEG_QUALITY)
+    data = buffer.getvalue()
+    return (b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB /BitsPerComponent 8 "
+            b"/Filter /DCTDecode /Length %d >>\nstream\n" % (card.width, card.height, len(data)) + data + b"\nendstream")
+
+# --- Reports ---
+
+def audit_inputs(data, factors=None, date=None):
+    """
+    Per-outlet report inputs, computed for all outlets at once
+    Returns a list of dicts (name, activity, quantities, term emissions, chart
+    breakdown, fingerprint) to pass to audit_pdf
+    """
+    factors = dict(EMISSION_FACTORS if factors is None else factors)
+    date = date or datetime.date.today().isoformat()
+    values = data.reindex(columns=ACTIVITY_COLUMNS, fill_value=0).apply(lambda c: c.astype(float)).fillna(0)
+    quantities = values.copy()
+    quantities['staff_commute'] = values['staff_count'] * values['avg_commute_km'] * 365
+    quantities = quantities[[driver for driver, _, _, _ in TERM_ROWS]].to_numpy()
+    emissions = calculate_emission_terms(data, factors)[[driver for driver, _, _, _ in TERM_ROWS]].to_numpy()
+    breakdowns = (card_breakdown(data, factors) / 1000).round(3)
+    prints = fingerprints(data, factors).to_numpy()
+    names = data['outlet'].astype(str).to_numpy() if 'outlet' in data.columns else [f"outlet_{i + 1}" for i in range(len(data))]
+    records = values.to_dict('records')
+    return [{'name': name, 'activity': activity, 'quantities': q.tolist(), 'emissions': e.tolist(),
+             'breakdown': tuple(breakdown.items()), 'fingerprint': fingerprint, 'date': date}
+            for name, activity, q, e, (_, breakdown), fingerprint
+            in zip(names, records, quantities, emissions, breakdowns.iterrows(), prints)]
+
+def audit_pdf(report, factors=None):
+    """
+    Render one outlet's audit report (an audit_inputs entry) as PDF bytes
+    Page 1: scope table, share card chart, emission terms and validation
+    warnings; page 2: the emission factors and their sources
+    """
+    factors = dict(EMISSION_FACTORS if factors is None else factors)
+    width, height = PAGE_SIZE
+    emissions = np.asarray(report['emissions'])
+    scopes = np.array([TERM_SCOPES[driver] for driver, _, _, _ in TERM_ROWS])
+    totals = [emissions[scopes == scope].sum() / 1000 for scope in SCOPE_TERMS]
+    total = sum(totals)
+
+    ops = [_text(MARGIN, 745, report['name'][:44], 14, True),  # clear of the chart
+           _text(MARGIN, 730, f"Reporting date {report['date']}  ·  annual activity data", 9)]
+    for i, value in enumerate(totals + [total]):
+        y = 672 - 16 * i
+        ops += [_number(255, y, f"{value:,.2f}", 9, i == 3),
+                _number(310, y, f"{value / total * 100:.1f}%" if total > 0 else "-", 9, i == 3)]
+    x, y, size = CHART_BOX
+    ops.append(f"q {size} 0 0 {size} {x} {y} cm /Chart Do Q\n".encode())
+    for i, ((_, _, _, key), quantity, kg) in enumerate(zip(TERM_ROWS, report['quantities'], emissions)):
+        y = TERMS_TOP - ROW_HEIGHT * (i + 1)
+        coefficient = factors[key]
+        ops += [_number(TERM_COLUMNS['quantity'], y, f"{quantity:,.1f}", 8),
+                _number(TERM_COLUMNS['factor'], y, f"{coefficient:,.3f}", 8),
+                _number(TERM_COLUMNS['kg'], y, f"{kg:,.1f}", 8)]
+    bottom = TERMS_TOP - ROW_HEIGHT * (len(TERM_ROWS) + 1)
+    ops.append(_number(TERM_COLUMNS['kg'], bottom, f"{emissions.sum():,.1f}", 8, True))
+
+    _, warnings, errors = validate_restaurant_data(report['activity'])
+    lines = [("Error", message) for message in errors] + [("Warning", message) for message in warnings]
+    y = bottom - 44
+    if not lines:
+        ops.append(_text(MARGIN, y, "All activity values are within the expected ranges.", 8))
+    for i, (kind, message) in enumerate(lines[:MAX_VALIDATION_LINES]):
+        if i == MAX_VALIDATION_LINES - 1 and len(lines) > MAX_VALIDATION_LINES:
+            kind, message = "Note", f"{len(lines) - i} more findings not shown"
+        ops += [_text(MARGIN, y - 11 * i, kind, 8, True, "0.75 0.1 0.1" if kind == "Error" else None),
+                _text(MARGIN + 42, y - 11 * i, message[:110], 8)]
+    ops.append(_text(MARGIN, 40, f"Fingerprint {report['fingerprint']}  ·  factor table {factor_version(factors)}  ·  code {code_version()}", 7))
+
+    info = b"<< /Title %s /Producer (Carbon Footprint Restaurants) /CreationDate (D:%s) >>" % (
+        _pdf_string(f"GHG Emissions Audit Report - {report['name']}"), report['date'].replace('-', '').encode())
+    resources = b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> /XObject << /Chart 5 0 R >> >>"
+    media_box = b"/MediaBox [0 0 %d %d]" % PAGE_SIZE
+    return _pdf_file([
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [8 0 R 10 0 R] /Count 2 >>",
+        *FONT_OBJECTS,
+        chart_image(report['breakdown'], round(total, 1)),
+        page1_template(),
+        _stream(b"".join(ops)),
+        b"<< /Type /Page /Parent 2 0 R %s %s /Contents [6 0 R 7 0 R] >>" % (media_box, resources),
+        page2_stream(tuple(factors.items())),
+        b"<< /Type /Page /Parent 2 0 R %s %s /Contents 9 0 R >>" % (media_box, resources),
+        info,
+    ])
+
+def _render_audit_file(job):
+    path, report, factors = job
+    with open(path + ".tmp", 'wb') as f:
+        f.write(audit_pdf(report, factors))
+    os.replace(path + ".tmp", path)
+    return path
+
+def render_audits_batch(reports, out_dir, factors=None, workers=None, chunksize=16):
+    """
+    Write the audit report of every audit_inputs entry to out_dir across a
+    process pool. Workers write their PDFs straight to disk and keep only the
+    shared templates and a bounded chart cache, so memory does not grow with
+    the number of outlets
+    Returns the list of written paths
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    reports = list(reports)
+    stems = unique_file_stems(report['name'] for report in reports)
+    jobs = [(os.path.join(out_dir, f"{stem}.pdf"), report, factors) for stem, report in zip(stems, reports)]
+    # spawn keeps workers clean when called from a threaded server
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(_render_audit_file, jobs, chunksize=chunksize))
+
+if __name__ == "__main__":
+    import time
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Write a PDF audit report for every outlet in a CSV/Excel file")
+    parser.add_argument("data", help="Outlet activity file (one row per outlet, optional 'outlet' name column)")
+    parser.add_argument("out_dir", help="Directory to write the reports to")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.data) if args.data.endswith('.csv') else pd.read_excel(args.data)
+    start = time.perf_counter()
+    paths = render_audits_batch(audit_inputs(data), args.out_dir, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {len(paths)} audit reports in {elapsed:.1f}s ({len(paths) / elapsed:.0f} reports/s)")
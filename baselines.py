@@ -0,0 +1,194 @@
+import os
+import re
+import copy
+import json
+import datetime
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from functions import ACTIVITY_COLUMNS, EMISSION_FACTORS
+from calc_graph import build_terms
+from fingerprints import factor_version
+
+BASELINES_DIR = "./data/baselines"
+
+def _outlet_table(activity):
+    # Activity rows indexed by outlet name: a dict is one outlet named 'Restaurant'
+    if isinstance(activity, dict):
+        activity = pd.DataFrame([activity], index=['Restaurant'])
+    elif 'outlet' in activity.columns:
+        activity = activity.set_index(activity['outlet'].astype(str))
+    else:
+        activity = activity.set_index(activity.index.astype(str))
+    activity = activity[~activity.index.duplicated(keep='last')]
+    return activity.reindex(columns=ACTIVITY_COLUMNS, fill_value=0).apply(pd.to_numeric, errors='coerce').fillna(0.0)
+
+def term_quantities(activity, factors=None):
+    """
+    Split emissions into terms of quantity × coefficient (the calc_graph terms)
+    Returns (outlet names, drivers, scopes, quantities (outlets × terms), coefficients)
+    The driver of a term is its activity column, or 'staff_commute' for staff × commute distance
+    """
+    table = _outlet_table(activity)
+    terms = build_terms(factors)
+    values = table.to_numpy(dtype=np.float64)
+    column = {col: i for i, col in enumerate(ACTIVITY_COLUMNS)}
+    quantities = np.column_stack([values[:, [column[c] for c in inputs]].prod(axis=1) for _, inputs, _ in terms])
+    drivers = [inputs[0] if len(inputs) == 1 else 'staff_commute' for _, inputs, _ in terms]
+    scopes = [scope for scope, _, _ in terms]
+    return list(table.index), drivers, scopes, quantities, np.array([coef for _, _, coef in terms])
+
+class Baseline:
+    """
+    Base-year activity per outlet with its emissions per term under one factor table
+    The emissions are kept per outlet and term, so a factor table change only
+    recomputes the outlets that use a changed factor
+    """
+
+    def __init__(self, activity, year, factors=None):
+        self.year = int(year)
+        self.factors = dict(EMISSION_FACTORS if factors is None else factors)
+        self.version = factor_version(self.factors)
+        self.activity = _outlet_table(activity)
+        self.outlets, self.drivers, self.scopes, self.quantities, self.coefficients = term_quantities(self.activity, self.factors)
+        self.emissions = self.quantities * self.coefficients
+
+    def scope_totals(self):
+        """
+        kgCO2e per outlet and scope in the calculate_emissions layout
+        """
+        table = pd.DataFrame(self.emissions, index=self.outlets, columns=self.drivers).T.groupby(self.scopes).sum().T
+        table['total'] = table.sum(axis=1)
+        return table
+
+    def recalculate(self, factors):
+        """
+        Base year restated with another factor table (ISO 14064 base-year recalculation)
+        Only outlets with activity in a term whose coefficient changed are recomputed
+        Returns (restated Baseline, names of the recomputed outlets)
+        """
+        coefficients = np.array([coef for _, _, coef in build_terms(factors)])
+        changed = np.flatnonzero(coefficients != self.coefficients)
+        rows = np.flatnonzero((self.quantities[:, changed] != 0).any(axis=1))
+        restated = copy.copy(self)
+        restated.factors = dict(factors)
+        restated.version = factor_version(factors)
+        restated.coefficients = coefficients
+        restated.emissions = self.emissions.copy()
+        restated.emissions[np.ix_(rows, changed)] = self.quantities[np.ix_(rows, changed)] * coefficients[changed]
+        return restated, [self.outlets[i] for i in rows]
+
+def compare_years(baseline, activity, factors=None):
+    """
+    Year-over-year change per outlet and activity driver against a baseline
+    Each term is quantity × coefficient, so its change splits exactly into
+      activity_effect = Δquantity × mean coefficient of the two years
+      factor_effect = Δcoefficient × mean quantity of the two years
+    Outlets only in one of the two years (boundary changes) count as 0 in the other
+    Returns one row per outlet and driver with emissions in either year
+    """
+    factors = EMISSION_FACTORS if factors is None else factors
+    outlets, drivers, scopes, quantities, coefficients = term_quantities(activity, factors)
+    union = pd.Index(baseline.outlets).union(pd.Index(outlets), sort=False)
+    base_q = pd.DataFrame(baseline.quantities, index=baseline.outlets).reindex(union, fill_value=0.0).to_numpy()
+    current_q = pd.DataFrame(quantities, index=outlets).reindex(union, fill_value=0.0).to_numpy()
+    base_kg = pd.DataFrame(baseline.emissions, index=baseline.outlets).reindex(union, fill_value=0.0).to_numpy()
+    current_kg = current_q * coefficients
+
+    in_current, in_base = pd.Index(outlets).get_indexer(union) >= 0, pd.Index(baseline.outlets).get_indexer(union) >= 0
+    status = np.where(~in_current, 2, np.where(in_base, 0, 1))
+    row, term = np.nonzero((base_kg != 0) | (current_kg != 0))
+    base_q, current_q = base_q[row, term], current_q[row, term]
+    result = pd.DataFrame({
+        'outlet': pd.Categorical.from_codes(row, union),
+        'status': pd.Categorical.from_codes(status[row], ['both', 'new', 'closed']),
+        'scope': pd.Categorical(np.asarray(scopes, dtype=object)[term]),
+        'driver': pd.Categorical(np.asarray(drivers, dtype=object)[term]),
+        'base_kg': base_kg[row, term],
+        'current_kg': current_kg[row, term],
+        'activity_effect_kg': (current_q - base_q) * (baseline.coefficients[term] + coefficients[term]) / 2,
+        'factor_effect_kg': (coefficients[term] - baseline.coefficients[term]) * (base_q + current_q) / 2,
+    })
+    result.insert(6, 'change_kg', result['current_kg'] - result['base_kg'])
+    return result
+
+def yoy_summary(comparison, by='scope'):
+    """
+    Base-year and current kgCO2e, change and its attribution per scope (or driver, outlet)
+    """
+    summary = comparison.groupby(by, observed=True)[['base_kg', 'current_kg', 'change_kg', 'activity_effect_kg', 'factor_effect_kg']].sum()
+    summary['change_pct'] = summary['change_kg'] / summary['base_kg'].replace(0, np.nan) * 100
+    return summary
+
+class BaselineStore:
+    """
+    Base years saved per restaurant under data/baselines/<name>/
+    Activity is stored as Parquet next to the factor table it was reported with.
+    Loaded baselines are cached in memory per factor version, so a restated base
+    year is computed once per factor table change, not on every rerun
+    """
+
+    def __init__(self, directory=BASELINES_DIR):
+        self.directory = directory
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _dir(self, name):
+        slug = re.sub(r'[^0-9a-z]+', '-', name.strip().lower()).strip('-')
+        if not slug:
+            raise ValueError("A restaurant name is needed to store a base year")
+        return os.path.join(self.directory, slug)
+
+    def save(self, name, baseline):
+        base_dir = self._dir(name)
+        os.makedirs(base_dir, exist_ok=True)
+        activity_path, meta_path = os.path.join(base_dir, "activity.parquet"), os.path.join(base_dir, "meta.json")
+        activity = baseline.activity.rename_axis('outlet').reset_index()
+        activity.to_parquet(activity_path + ".tmp", index=False, compression="zstd")
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump({'year': baseline.year, 'version': baseline.version, 'factors': baseline.factors,
+                       'saved_at': datetime.datetime.now().isoformat(timespec='seconds')}, f, indent=1)
+        os.replace(activity_path + ".tmp", activity_path)
+        os.replace(meta_path + ".tmp", meta_path)
+        with self._lock:
+            self._cache = {key: value for key, value in self._cache.items() if key[0] != base_dir}
+
+    def load(self, name, factors=None):
+        """
+        The stored base year, restated with factors when given (cached per factor version)
+        Returns (Baseline as reported, Baseline under factors, recomputed outlet names), or None
+        """
+        base_dir = self._dir(name)
+        meta_path = os.path.join(base_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        stamp = os.path.getmtime(meta_path)
+        with self._lock:
+            reported_key = (base_dir, stamp, None)
+            if reported_key not in self._cache:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+                activity = pd.read_parquet(os.path.join(base_dir, "activity.parquet"))
+                self._cache[reported_key] = Baseline(activity, meta['year'], meta['factors']), []
+            reported = self._cache[reported_key][0]
+            key = (base_dir, stamp, None if factors is None else factor_version(factors))
+            if key not in self._cache:
+                self._cache[key] = reported.recalculate(factors)
+            restated, recomputed = self._cache[key]
+        return reported, restated, recomputed
+
+    def delete(self, name):
+        base_dir = self._dir(name)
+        for filename in ("activity.parquet", "meta.json"):
+            path = os.path.join(base_dir, filename)
+            if os.path.exists(path):
+                os.remove(path)
+        with self._lock:
+            self._cache = {key: value for key, value in self._cache.items() if key[0] != base_dir}
+
+@st.cache_resource
+def get_baseline_store():
+    # One store (and its cache of restated base years) per server process
+    return BaselineStore()
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+from functions import calculate_emissions
+from synthetic import generate_chunk
+
+# Intensity metrics ranked against peers: name -> (numerator, denominator column)
+BENCHMARK_METRICS = {
+    'kg_per_visit': ('total', 'customer_visits'),
+    'kg_per_rice_kg': ('total', 'rice_kg'),
+}
+
+def generate_peer_profiles(n_peers=5000, seed=42):
+    """
+    Modelled peer restaurants: clean synthetic.py draws around the
+    create_sample_data archetypes, not surveyed restaurants
+    Returns a DataFrame with restaurant_type and the activity columns
+    """
+    peers = generate_chunk(np.random.default_rng(seed), n_peers, outlier_rate=0.0)
+    return peers.drop(columns=['outlet_id', 'outlier'])
+
+def emission_intensities(data, emissions=None):
+    """
+    Compute the benchmark intensity metrics for one or many restaurants
+    Rows with a zero denominator get NaN for that metric
+    """
+    if isinstance(data, dict):
+        data = pd.DataFrame([data])
+    if emissions is None:
+        emissions = calculate_emissions(data)
+    intensities = pd.DataFrame(index=data.index)
+    for metric, (numerator, denominator) in BENCHMARK_METRICS.items():
+        base = data[denominator].astype(float).where(data[denominator] > 0)
+        intensities[metric] = emissions[numerator] / base
+    return intensities
+
+def build_benchmark_index(peers):
+    """
+    Build the percentile index from a peer DataFrame
+    Returns a dict of metric -> sorted float64 array of peer intensities
+    """
+    intensities = emission_intensities(peers)
+    return {metric: np.sort(intensities[metric].dropna().to_numpy(dtype=np.float64))
+            for metric in BENCHMARK_METRICS}
+
+def percentile_rank(sorted_values, value):
+    """
+    Percentage of peers with an intensity at or below value (binary search)
+    Ties count half so identical outlets land in the middle of their group
+    Accepts a scalar or an array of values
+    """
+    if len(sorted_values) == 0:
+        return np.full(np.shape(value), np.nan) if np.ndim(value) else np.nan
+    below = np.searchsorted(sorted_values, value, side='left')
+    at_or_below = np.searchsorted(sorted_values, value, side='right')
+    return (below + at_or_below) / 2 / len(sorted_values) * 100
+
+def rank_against_peers(index, data, emissions=None):
+    """
+    Rank one or many restaurants against the peer index
+    Returns a DataFrame of percentiles per metric (NaN where the metric is undefined)
+    """
+    intensities = emission_intensities(data, emissions)
+    ranks = pd.DataFrame(index=intensities.index)
+    for metric, sorted_values in index.items():
+        values = intensities[metric].to_numpy(dtype=np.float64)
+        pct = percentile_rank(sorted_values, np.nan_to_num(values))
+        ranks[metric] = np.where(np.isnan(values), np.nan, pct)
+    return ranks
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+from functions import ACTIVITY_COLUMNS, EMISSION_FACTORS, SCOPE_TERMS, calculate_emissions
+
+SCOPES = list(SCOPE_TERMS)
+
+def build_terms(factors=None):
+    """
+    List the terms of the scope sums as (scope, input columns, coefficient)
+    Every term is coefficient × product of its inputs, which covers the linear
+    factor terms and the staff × commute distance term
+    """
+    factors = EMISSION_FACTORS if factors is None else factors
+    terms = []
+    for scope, scope_terms in SCOPE_TERMS.items():
+        for column, factor_key in scope_terms.items():
+            terms.append((scope, (column,), factors[factor_key]))
+    terms.append(('scope3', ('staff_count', 'avg_commute_km'), 365 * factors['commute_km']))
+    return terms
+
+class EmissionsGraph:
+    """
+    Dependency-aware emissions calculation for a table of outlets
+    Each activity field knows the terms it feeds, so an edit recomputes only
+    those terms and moves the outlet's scope sums, its total and the fleet
+    totals by the difference instead of recomputing everything
+    """
+
+    def __init__(self, data, factors=None):
+        if isinstance(data, dict):
+            data = pd.DataFrame([data])
+        self.index = data.index
+        self.factors = EMISSION_FACTORS if factors is None else factors
+        self.values = data.reindex(columns=ACTIVITY_COLUMNS, fill_value=0).fillna(0).to_numpy(dtype=np.float64, copy=True)
+        self._column = {col: i for i, col in enumerate(ACTIVITY_COLUMNS)}
+
+        terms = build_terms(self.factors)
+        self._term_scope = np.array([SCOPES.index(scope) for scope, _, _ in terms])
+        self._term_inputs = [[self._column[col] for col in inputs] for _, inputs, _ in terms]
+        self._term_coef = np.array([coef for _, _, coef in terms])
+        self._dependents = {i: [] for i in range(len(ACTIVITY_COLUMNS))}
+        for t, inputs in enumerate(self._term_inputs):
+            for c in inputs:
+                self._dependents[c].append(t)
+        self.refresh()
+
+    def refresh(self):
+        """
+        Full recomputation of every term and sum (also clears accumulated rounding)
+        """
+        self.term_values = np.column_stack([
+            coef * self.values[:, inputs].prod(axis=1)
+            for inputs, coef in zip(self._term_inputs, self._term_coef)
+        ])
+        self.scope_sums = np.zeros((len(self.values), len(SCOPES)))
+        for s in range(len(SCOPES)):
+            self.scope_sums[:, s] = self.term_values[:, self._term_scope == s].sum(axis=1)
+        self.totals = self.scope_sums.sum(axis=1)
+        self.fleet_scope_sums = self.scope_sums.sum(axis=0)
+
+    def dependents(self, field):
+        """
+        Return the (scope, inputs) of every term that field feeds
+        """
+        return [(SCOPES[self._term_scope[t]], [ACTIVITY_COLUMNS[c] for c in self._term_inputs[t]])
+                for t in self._dependents[self._column[field]]]
+
+    def update(self, row, field, value):
+        """
+        Set one field of one outlet (row position) and propagate the change
+        """
+        c = self._column[field]
+        # Blank fields count as 0, as in __init__ and calculate_emissions
+        value = 0.0 if value is None or pd.isna(value) else float(value)
+        if self.values[row, c] == value:
+            return
+        self.values[row, c] = value
+        for t in self._dependents[c]:
+            new = self._term_coef[t] * self.values[row, self._term_inputs[t]].prod()
+            delta = new - self.term_values[row, t]
+            self.term_values[row, t] = new
+            s = self._term_scope[t]
+            self.scope_sums[row, s] += delta
+            self.totals[row] += delta
+            self.fleet_scope_sums[s] += delta
+
+    def update_row(self, row, data_dict):
+        """
+        Apply a dict of field values to one outlet, only changed fields propagate
+        """
+        for field, value in data_dict.items():
+            if field in self._column:
+                self.update(row, field, value)
+
+    def sync(self, data):
+        """
+        Bring the graph in line with an edited copy of its table: only the
+        changed cells propagate. The table must have the same rows (index)
+        """
+        if not self.index.equals(data.index):
+            raise ValueError("The table's rows changed, build a new EmissionsGraph")
+        values = data.reindex(columns=ACTIVITY_COLUMNS, fill_value=0).fillna(0).to_numpy(dtype=np.float64)
+        for row, c in zip(*np.nonzero(values != self.values)):
+            self.update(row, ACTIVITY_COLUMNS[c], values[row, c])
+
+    def emissions(self):
+        """
+        Return a DataFrame in the calculate_emissions layout (kgCO2e)
+        """
+        result = pd.DataFrame(self.scope_sums, columns=SCOPES, index=self.index)
+        result['total'] = self.totals
+        return result
+
+    def fleet_totals(self):
+        totals = dict(zip(SCOPES, self.fleet_scope_sums))
+        totals['total'] = self.fleet_scope_sums.sum()
+        return totals
+
+    def verify(self, rtol=1e-9):
+        """
+        Check the incremental sums against a full calculate_emissions run
+        """
+        full = calculate_emissions(pd.DataFrame(self.values, columns=ACTIVITY_COLUMNS, index=self.index), self.factors)
+        return np.allclose(self.emissions().to_numpy(), full.to_numpy(), rtol=rtol, atol=1e-6)
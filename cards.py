@@ -0,0 +1,219 @@
+import os
+import re
+import argparse
+from html import escape
+import multiprocessing
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import matplotlib
+from PIL import Image, ImageDraw, ImageFont
+from assets import font_path
+
+CARD_COLORS = ["#29ad9f", "#1dc8b8", "#99d9d9", "#b4e3dd"]
+CARD_SIZE = (700, 700)
+
+# Card layout, drawn directly at CARD_SIZE (the artwork was designed on the 1080 px background)
+CARD_SCALE = CARD_SIZE[0] / 1080
+PIE_CENTER = (358, 457)
+PIE_RADIUS = 200
+CAPTION_XY = (round(370 * CARD_SCALE), round(250 * CARD_SCALE))
+OVERLAY_CENTER = (350, 454)
+OVERLAY_SIZE = round(370 * CARD_SCALE)
+EXPLODE = 0.03
+LABEL_DISTANCE = 0.75
+LABEL_OPACITY = 0xad / 255  # black labels at "#000000ad"
+SHADOW_OFFSET = (-0.02, -0.02)  # pie units, darkened 70% at half opacity
+SUPERSAMPLE = 2  # wedge polygons are drawn at 2× and box-filtered for smooth edges
+
+@lru_cache(maxsize=None)
+def _font(path, size):
+    return ImageFont.truetype(font=path, size=size)
+
+@lru_cache(maxsize=None)
+def _label_font():
+    return _font(os.path.join(matplotlib.get_data_path(), "fonts", "ttf", "DejaVuSans-Bold.ttf"),
+                 round(20 * 100 / 72 * CARD_SCALE))
+
+def _caption_font(text):
+    # The glyph subset built by assets.py when it covers the text, the full Unicode font otherwise
+    return _font(font_path('arialuni', text), round(50 * CARD_SCALE))
+
+@lru_cache(maxsize=None)
+def _card_background(caption):
+    # Title and caption are the same on every card, draw them once per process
+    background = Image.open("./media/default.png").convert('RGBA').resize(CARD_SIZE)
+    draw = ImageDraw.Draw(background)
+    draw.text(xy=(round(320 * CARD_SCALE), round(50 * CARD_SCALE)), text=f"  How big is your\nCarbon Footprint?",
+              font=_font("./style/ArchivoBlack-Regular.ttf", round(50 * CARD_SCALE)),
+              fill="#039e8e", stroke_width=1, stroke_fill="#039e8e")
+    draw.text(xy=CAPTION_XY, text=f"{caption} \n\n", font=_caption_font(caption),
+              fill="#039e8e", stroke_width=1, stroke_fill="#039e8e")
+    return background
+
+@lru_cache(maxsize=None)
+def _overlay():
+    return Image.open("./media/ayak.png").convert('RGBA').resize((OVERLAY_SIZE, OVERLAY_SIZE), Image.LANCZOS)
+
+@lru_cache(maxsize=None)
+def _unit_circle(samples=720):
+    theta = np.linspace(0, 2 * np.pi, samples + 1)
+    return theta, np.column_stack([np.cos(theta), np.sin(theta)])
+
+def wedge_geometry(values):
+    """
+    Compute the pie wedges in unit coordinates (y up, counter-clockwise from
+    3 o'clock, like matplotlib) with the 3% explode applied
+    Returns a list of (polygon vertices, label position) per slice
+    """
+    values = np.asarray(values, dtype=np.float64)
+    total = values.sum()
+    fracs = values / total if total > 0 else np.full(len(values), 1 / len(values))
+    bounds = np.concatenate([[0], np.cumsum(fracs)]) * 2 * np.pi
+    mids = (bounds[:-1] + bounds[1:]) / 2
+    directions = np.column_stack([np.cos(mids), np.sin(mids)])
+    theta, circle = _unit_circle()
+
+    wedges = []
+    for start, end, direction in zip(bounds[:-1], bounds[1:], directions):
+        inner = (theta > start) & (theta < end)
+        arc = np.vstack([[np.cos(start), np.sin(start)], circle[inner], [np.cos(end), np.sin(end)]])
+        offset = EXPLODE * direction
+        wedges.append((np.vstack([[0.0, 0.0], arc]) + offset, offset + LABEL_DISTANCE * direction))
+    return wedges
+
+def _hex_rgb(color):
+    return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+
+def _draw_pie(card, breakdown):
+    wedges = wedge_geometry(list(breakdown.values()))
+    colors = [_hex_rgb(CARD_COLORS[i % len(CARD_COLORS)]) for i in range(len(wedges))]
+
+    # Only the square around the pie is rasterized at the supersampled size.
+    # Transparent white keeps the box-filtered edges from darkening
+    half = int(PIE_RADIUS * (1 + EXPLODE + 0.05)) + 2
+    size = 2 * half * SUPERSAMPLE
+    layer = Image.new('RGBA', (size, size), (255, 255, 255, 0))
+    draw = ImageDraw.Draw(layer)
+    center = np.array([size / 2, size / 2])
+    scale = PIE_RADIUS * SUPERSAMPLE * np.array([1, -1])
+    for (polygon, _), color in zip(wedges, colors):
+        shadow = tuple(round(0.3 * c) for c in color) + (128,)
+        draw.polygon((center + (polygon + SHADOW_OFFSET) * scale).ravel().tolist(), fill=shadow)
+    for (polygon, _), color in zip(wedges, colors):
+        draw.polygon((center + polygon * scale).ravel().tolist(), fill=color + (255,))
+    layer = layer.reduce(SUPERSAMPLE)
+
+    origin = (PIE_CENTER[0] - half, PIE_CENTER[1] - half)
+    layer.alpha_composite(_overlay(), dest=(OVERLAY_CENTER[0] - origin[0] - OVERLAY_SIZE // 2,
+                                            OVERLAY_CENTER[1] - origin[1] - OVERLAY_SIZE // 2))
+    # Labels sit inside their own wedge, so the translucent black is pre-blended with it
+    draw = ImageDraw.Draw(layer)
+    for label, (_, position), color in zip(breakdown.keys(), wedges, colors):
+        fill = tuple(round(c * (1 - LABEL_OPACITY)) for c in color) + (255,)
+        xy = (half + position[0] * PIE_RADIUS, half - position[1] * PIE_RADIUS)
+        draw.text(xy, str(label), font=_label_font(), fill=fill, anchor="mm")
+    card.alpha_composite(layer, dest=origin)
+
+def render_card(breakdown, value, caption="Monthly Emission", unit="kgCO₂e", decimals=0):
+    """
+    Render the "How big is your Carbon Footprint?" share card
+    breakdown is a dict of slice label -> emissions, value the headline number
+    Returns a 700×700 RGBA PIL image, drawn at its final size (no resize pass)
+    """
+    card = _card_background(caption).copy()
+    draw = ImageDraw.Draw(card)
+    # Leading blank lines put the value where the cached caption's third line goes
+    text = f"\n\n   {value:.{decimals}f} {unit}"
+    draw.text(xy=CAPTION_XY, text=text, font=_caption_font(text),
+              fill="#039e8e", stroke_width=1, stroke_fill="#039e8e")
+    _draw_pie(card, breakdown)
+    return card
+
+def pie_svg(breakdown, size=420):
+    """
+    Emit the breakdown pie as a standalone SVG document (wedges, shadows and labels)
+    """
+    wedges = wedge_geometry(list(breakdown.values()))
+    radius = size / 2 / (1 + EXPLODE + 0.05)
+    c = size / 2
+    to_svg = lambda points: " ".join(f"{c + x * radius:.1f},{c - y * radius:.1f}" for x, y in points)
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" viewBox="0 0 {size} {size}">']
+    for i, (polygon, _) in enumerate(wedges):
+        shadow = "#%02x%02x%02x" % tuple(round(0.3 * v) for v in _hex_rgb(CARD_COLORS[i % len(CARD_COLORS)]))
+        parts.append(f'<polygon points="{to_svg(polygon + SHADOW_OFFSET)}" fill="{shadow}" fill-opacity="0.5"/>')
+    for i, (polygon, _) in enumerate(wedges):
+        parts.append(f'<polygon points="{to_svg(polygon)}" fill="{CARD_COLORS[i % len(CARD_COLORS)]}"/>')
+    for label, (_, (x, y)) in zip(breakdown.keys(), wedges):
+        parts.append(f'<text x="{c + x * radius:.1f}" y="{c - y * radius:.1f}" text-anchor="middle" '
+                     f'dominant-baseline="central" font-family="DejaVu Sans, sans-serif" font-weight="bold" '
+                     f'font-size="{size / 24:.0f}" fill="#000000" fill-opacity="{LABEL_OPACITY:.2f}">{escape(str(label))}</text>')
+    parts.append('</svg>')
+    return "".join(parts)
+
+def file_stem(name):
+    """
+    File name stem of an outlet name: letters, digits, '_', '.' and '-' only
+    """
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', str(name)).strip('_') or 'outlet'
+
+def unique_file_stems(names):
+    """
+    Distinct file name stems for a list of outlet names, in order
+    Repeats get _2, _3, ... after their base stem, skipping stems already taken
+    """
+    stems, used, counts = [], set(), {}
+    for name in names:
+        stem = base = file_stem(name)
+        while stem in used:
+            counts[base] = counts.get(base, 1) + 1
+            stem = f"{base}_{counts[base]}"
+        used.add(stem)
+        stems.append(stem)
+    return stems
+
+# Fast encoder settings for batch output
+SAVE_OPTIONS = {
+    'png': {'compress_level': 1},
+    'webp': {'lossless': True, 'method': 0},
+}
+
+def _render_card_file(job):
+    path, breakdown, value, options, fmt = job
+    render_card(breakdown, value, **options).save(path, fmt.upper(), **SAVE_OPTIONS.get(fmt.lower(), {}))
+    return path
+
+def render_cards_batch(cards, out_dir, fmt="png", workers=None, chunksize=8, **options):
+    """
+    Render many share cards across a process pool and write them to out_dir
+    cards is an iterable of (name, breakdown, value); options go to render_card
+    Returns the list of written paths
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    cards = list(cards)
+    stems = unique_file_stems(name for name, _, _ in cards)
+    jobs = [(os.path.join(out_dir, f"{stem}.{fmt.lower()}"), breakdown, value, options, fmt)
+            for stem, (_, breakdown, value) in zip(stems, cards)]
+    # spawn keeps workers clean when called from a threaded server
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(_render_card_file, jobs, chunksize=chunksize))
+
+if __name__ == "__main__":
+    import time
+    import pandas as pd
+    from reports import outlet_cards
+
+    parser = argparse.ArgumentParser(description="Render share cards for every outlet in a CSV/Excel file")
+    parser.add_argument("data", help="Outlet activity file (one row per outlet, optional 'outlet' name column)")
+    parser.add_argument("out_dir", help="Directory to write the cards to")
+    parser.add_argument("--format", default="png", choices=["png", "webp"])
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.data) if args.data.endswith('.csv') else pd.read_excel(args.data)
+    start = time.perf_counter()
+    paths = render_cards_batch(outlet_cards(data), args.out_dir, fmt=args.format, workers=args.workers,
+                               caption="Annual Emission", unit="tCO₂e", decimals=1)
+    elapsed = time.perf_counter() - start
+    print(f"Rendered {len(paths)} cards in {elapsed:.1f}s ({len(paths) / elapsed:.0f} cards/s)")
@@ -0,0 +1,169 @@
+import os
+import json
+import hashlib
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from functions import ACTIVITY_COLUMNS, EMISSION_FACTORS, calculate_emissions
+
+FINGERPRINT_VERSION = 1
+# Source files whose content defines the calculation (scope terms, factors, formulas)
+CALCULATION_MODULES = ['functions.py']
+CHUNK_ROWS = 4096  # average rows per Merkle leaf
+
+def factor_version(factors=None):
+    """
+    Short content hash of an emission factor table, changes whenever any factor does
+    """
+    factors = EMISSION_FACTORS if factors is None else factors
+    canonical = json.dumps({key: float(value) for key, value in factors.items()}, sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:12]
+
+@lru_cache(maxsize=1)
+def code_version():
+    """
+    Short content hash of the calculation source files, independent of git
+    """
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in CALCULATION_MODULES:
+        with open(os.path.join(directory, name), 'rb') as f:
+            # Line endings differ between checkouts, the code does not
+            digest.update(f.read().replace(b'\r\n', b'\n'))
+    return digest.hexdigest()[:12]
+
+def canonical_rows(data):
+    """
+    Activity values as a C-contiguous little-endian float64 matrix, one row per
+    restaurant in ACTIVITY_COLUMNS order, read the way calculate_emissions reads
+    them: missing columns and values are 0, and -0.0 becomes 0.0
+    """
+    if isinstance(data, dict):
+        data = pd.DataFrame([data])
+    values = data.reindex(columns=ACTIVITY_COLUMNS, fill_value=0).apply(pd.to_numeric, errors='coerce').fillna(0)
+    return np.ascontiguousarray(values.to_numpy(dtype='<f8') + 0.0)
+
+def _row_hashes(matrix):
+    # 64-bit hash per row (multiply-xorshift mixing of the raw float bits), only
+    # used for chunk boundaries and row matching, never reported
+    bits = matrix.view('<u8')
+    hashes = np.full(len(bits), 0x9E3779B97F4A7C15, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for column in bits.T:
+            hashes ^= column
+            hashes *= np.uint64(0xBF58476D1CE4E5B9)
+            hashes ^= hashes >> np.uint64(31)
+    return hashes
+
+def row_fingerprints(matrix, factors=None):
+    """
+    Fingerprints (32-character hex) of the rows of a canonical_rows matrix
+    """
+    matrix = np.ascontiguousarray(matrix, dtype='<f8')
+    context = hashlib.blake2b(digest_size=16)
+    context.update(f"{FINGERPRINT_VERSION}|{factor_version(factors)}|{code_version()}|".encode())
+    buffer, width = matrix.reshape(-1).view(np.uint8), matrix.shape[1] * 8
+    digests = []
+    for start in range(0, len(buffer), width):
+        digest = context.copy()
+        digest.update(buffer[start:start + width])
+        digests.append(digest.hexdigest())
+    return digests
+
+def fingerprints(data, factors=None):
+    """
+    Fingerprint of every result row: a hash of its canonical input row, the
+    factor table and the calculation code. The same inputs give the same
+    fingerprint on any machine, so an auditor can check a reported number by
+    recomputing it (see verify_fingerprint)
+    Returns a Series of 32-character hex strings aligned with data
+    """
+    index = data.index if isinstance(data, pd.DataFrame) else None
+    return pd.Series(row_fingerprints(canonical_rows(data), factors), index=index, name='fingerprint', dtype=object)
+
+def fingerprint_columns(data, factors=None):
+    """
+    fingerprint, factor_version and code_version columns to store next to exported results
+    """
+    return pd.DataFrame({
+        'fingerprint': fingerprints(data, factors),
+        'factor_version': factor_version(factors),
+        'code_version': code_version(),
+    })
+
+def fingerprint_results(data, factors=None):
+    """
+    calculate_emissions with the fingerprint columns of every row
+    """
+    return pd.concat([calculate_emissions(data, factors), fingerprint_columns(data, factors)], axis=1)
+
+def verify_fingerprint(row, fingerprint, factors=None):
+    """
+    True if an input row reproduces a reported fingerprint with these factors and this code
+    """
+    return fingerprints(row if isinstance(row, pd.DataFrame) else pd.DataFrame([row]), factors).iloc[0] == fingerprint
+
+class MerkleTree:
+    """
+    Hash tree over the canonical rows of a (possibly multi-million-row) submission
+    Leaves are chunks of rows whose boundaries depend on the row contents
+    (a row ends a chunk when its 64-bit hash is 0 modulo chunk_rows), so an
+    inserted or deleted row changes one leaf instead of shifting every later
+    chunk. Equal roots mean equal submissions; otherwise diff() compares only
+    the rows inside leaves the other tree lacks
+    """
+
+    def __init__(self, data, key=None, chunk_rows=CHUNK_ROWS):
+        matrix = canonical_rows(data)
+        if key is not None:
+            # The key (e.g. outlet name) is part of each row's content
+            keys = np.array([str(k) for k in data[key].to_numpy(dtype=object)], dtype=object)
+            key_hash = pd.util.hash_array(keys, categorize=False).view('<f8')
+            matrix = np.ascontiguousarray(np.column_stack([key_hash, matrix]))
+        self.rows = len(matrix)
+        self.row_hashes = _row_hashes(matrix)
+        ends = np.flatnonzero(self.row_hashes % chunk_rows == 0) + 1
+        if not len(ends) or ends[-1] != self.rows:
+            ends = np.append(ends, self.rows)
+        self.bounds = np.column_stack([np.r_[0, ends[:-1]], ends]) if self.rows else np.empty((0, 2), dtype=np.int64)
+
+        buffer, width = matrix.reshape(-1).view(np.uint8), matrix.shape[1] * 8
+        leaves = [hashlib.blake2b(buffer[start * width:end * width], digest_size=16).digest() for start, end in self.bounds]
+        self.levels = [leaves]
+        while len(self.levels[-1]) > 1:
+            level = self.levels[-1]
+            self.levels.append([hashlib.blake2b(b''.join(level[i:i + 2]), digest_size=16).digest()
+                                for i in range(0, len(level), 2)])
+
+    @property
+    def root(self):
+        return self.levels[-1][0].hex() if self.rows else hashlib.blake2b(b'', digest_size=16).hexdigest()
+
+    @property
+    def leaves(self):
+        return self.levels[0]
+
+    def changed_chunks(self, other):
+        """
+        Positions of this tree's leaves that do not occur in other
+        """
+        known = set(other.leaves)
+        return [i for i, leaf in enumerate(self.leaves) if leaf not in known]
+
+    def diff(self, other):
+        """
+        Rows that differ between two submissions, touching only the changed chunks
+        Returns (row positions only in self, row positions only in other)
+        """
+        if self.root == other.root:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        mine = self._chunk_rows(self.changed_chunks(other))
+        theirs = other._chunk_rows(other.changed_chunks(self))
+        mine_hashes, their_hashes = self.row_hashes[mine], other.row_hashes[theirs]
+        return mine[~np.isin(mine_hashes, their_hashes)], theirs[~np.isin(their_hashes, mine_hashes)]
+
+    def _chunk_rows(self, chunks):
+        if not chunks:
+            return np.array([], dtype=np.int64)
+        return np.concatenate([np.arange(*self.bounds[i]) for i in chunks])
@@ -1,9 +1,9 @@
 from streamlit.components.v1 import html
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
-import matplotlib.pyplot as plt
 import io
 import pandas as pd
+from cards import render_card
 
 def click_element(element):
     open_script = f"<script type = 'text/javascript'>window.parent.document.querySelector('[id^=tabs-bui][id$=-{element}]').click();</script>"
@@ -63,104 +63,212 @@ def input_preprocessing(data):
     data["Energy efficiency"] = data["Energy efficiency"].map({'No':0, 'Sometimes':1, "Yes":2})
     return data
 
-def hesapla(model,ss, sample_df):
-    copy_df = sample_df.copy()
-    travels = copy_df[["Frequency of Traveling by Air",
-                         "Vehicle Monthly Distance Km",
-                         'Transport_private',
-                          'Transport_public',
-                          'Transport_walk/bicycle',
-                          'Vehicle Type_None',
-                          'Vehicle Type_diesel',
-                          'Vehicle Type_electric',
-                          'Vehicle Type_hybrid',
-                          'Vehicle Type_lpg',
-                          'Vehicle Type_petrol']]
-    copy_df[list(set(copy_df.columns) - set(travels.columns))] = 0
-    travel = np.exp(model.predict(ss.transform(copy_df)))
-
-    copy_df = sample_df.copy()
-    energys = copy_df[[ 'Heating Energy Source_coal','How Often Shower', 'How Long TV PC Daily Hour',
-                         'Heating Energy Source_electricity','How Long Internet Daily Hour',
-                         'Heating Energy Source_natural gas',
-                         'Cooking_with_stove',
-                          'Cooking_with_oven',
-                          'Cooking_with_microwave',
-                          'Cooking_with_grill',
-                          'Cooking_with_airfryer',
-                         'Heating Energy Source_wood','Energy efficiency']]
-    copy_df[list(set(copy_df.columns) - set(energys.columns))] = 0
-    energy = np.exp(model.predict(ss.transform(copy_df)))
+# Features each footprint category keeps when its share is predicted (the others are zeroed)
+HESAPLA_GROUPS = {
+    "Travel": ["Frequency of Traveling by Air",
+               "Vehicle Monthly Distance Km",
+               'Transport_private',
+               'Transport_public',
+               'Transport_walk/bicycle',
+               'Vehicle Type_None',
+               'Vehicle Type_diesel',
+               'Vehicle Type_electric',
+               'Vehicle Type_hybrid',
+               'Vehicle Type_lpg',
+               'Vehicle Type_petrol'],
+    "Energy": ['Heating Energy Source_coal', 'How Often Shower', 'How Long TV PC Daily Hour',
+               'Heating Energy Source_electricity', 'How Long Internet Daily Hour',
+               'Heating Energy Source_natural gas',
+               'Cooking_with_stove',
+               'Cooking_with_oven',
+               'Cooking_with_microwave',
+               'Cooking_with_grill',
+               'Cooking_with_airfryer',
+               'Heating Energy Source_wood', 'Energy efficiency'],
+    "Waste": ['Do You Recyle_Paper', 'How Many New Clothes Monthly',
+              'Waste Bag Size',
+              'Waste Bag Weekly Count',
+              'Do You Recyle_Plastic',
+              'Do You Recyle_Glass',
+              'Do You Recyle_Metal',
+              'Social Activity'],
+    "Diet": ['Diet_omnivore',
+             'Diet_pescatarian',
+             'Diet_vegan',
+             'Diet_vegetarian', 'Monthly Grocery Bill', 'Transport_private',
+             'Transport_public',
+             'Transport_walk/bicycle',
+             'Heating Energy Source_coal',
+             'Heating Energy Source_electricity',
+             'Heating Energy Source_natural gas',
+             'Heating Energy Source_wood'],
+}
 
-    copy_df = sample_df.copy()
-    wastes = copy_df[[  'Do You Recyle_Paper','How Many New Clothes Monthly',
-                         'Waste Bag Size',
-                         'Waste Bag Weekly Count',
-                         'Do You Recyle_Plastic',
-                         'Do You Recyle_Glass',
-                         'Do You Recyle_Metal',
-                         'Social Activity',]]
-    copy_df[list(set(copy_df.columns) - set(wastes.columns))] = 0
-    waste = np.exp(model.predict(ss.transform(copy_df)))
+def hesapla_batch(model, ss, sample_df):
+    """
+    Travel, Energy, Waste and Diet footprint of every row of sample_df
+    One model prediction per category for all rows
+    """
+    result = {}
+    for name, keep in HESAPLA_GROUPS.items():
+        copy_df = sample_df.copy()
+        copy_df[list(set(copy_df.columns) - set(keep))] = 0
+        result[name] = np.exp(model.predict(ss.transform(copy_df)))
+    return pd.DataFrame(result, index=sample_df.index)
 
-    copy_df = sample_df.copy()
-    diets = copy_df[[ 'Diet_omnivore',
-                     'Diet_pescatarian',
-                     'Diet_vegan',
-                     'Diet_vegetarian', 'Monthly Grocery Bill','Transport_private',
-                     'Transport_public',
-                     'Transport_walk/bicycle',
-                      'Heating Energy Source_coal',
-                      'Heating Energy Source_electricity',
-                      'Heating Energy Source_natural gas',
-                      'Heating Energy Source_wood',
-                      ]]
-    copy_df[list(set(copy_df.columns) - set(diets.columns))] = 0
-    diet = np.exp(model.predict(ss.transform(copy_df)))
-    hesap = {"Travel": travel[0], "Energy": energy[0], "Waste": waste[0], "Diet": diet[0]}
+def hesapla(model,ss, sample_df):
+    hesap = hesapla_batch(model, ss, sample_df).iloc[0].to_dict()
 
     return hesap
 
 def chart(model, scaler,sample_df, prediction):
     p = hesapla(model, scaler,sample_df)
-    bbox_props = dict(boxstyle="round", facecolor="white", edgecolor="white", alpha=0.7)
+    card = render_card(p, prediction)
+    data3 = io.BytesIO()
+    card.save(data3, "PNG")
+    return data3
 
-    plt.figure(figsize=(10, 10))
-    patches, texts = plt.pie(x=p.values(),
-                             labels=p.keys(),
-                             explode=[0.03] * 4,
-                             labeldistance=0.75,
-                             colors=["#29ad9f", "#1dc8b8", "#99d9d9", "#b4e3dd" ], shadow=True,
-                             textprops={'fontsize': 20, 'weight': 'bold', "color": "#000000ad"})
-    for text in texts:
-        text.set_horizontalalignment('center')
+# --- Indian Emission Factors (kg CO2e per unit) ---
+EMISSION_FACTORS = {
+    'lpg_kg': 2.983,         # 1 kg LPG ≈ 2.983 kg CO2e (India GHG Platform)
+    'diesel_l': 2.68,       # 1 liter diesel ≈ 2.68 kg CO2e
+    'petrol_l': 2.31,       # 1 liter petrol ≈ 2.31 kg CO2e
+    'refrigerant_kg': 1300, # R134a GWP ≈ 1300 (example, update as needed)
+    'electricity_kwh': 0.82,# 1 kWh grid electricity ≈ 0.82 kg CO2e (India avg)
+    'rice_kg': 2.7,         # 1 kg rice ≈ 2.7 kg CO2e (India, incl. methane)
+    'lentils_kg': 0.9,      # 1 kg lentils ≈ 0.9 kg CO2e
+    'vegetables_kg': 0.5,   # 1 kg vegetables ≈ 0.5 kg CO2e
+    'milk_l': 1.4,          # 1 liter milk ≈ 1.4 kg CO2e
+    'ghee_kg': 8.0,         # 1 kg ghee ≈ 8.0 kg CO2e
+    'spices_kg': 1.5,       # 1 kg spices ≈ 1.5 kg CO2e
+    'oil_l': 3.3,           # 1 liter cooking oil ≈ 3.3 kg CO2e
+    'food_waste_kg': 1.9,   # 1 kg food waste ≈ 1.9 kg CO2e (landfill, India)
+    'packaging_kg': 2.5,    # 1 kg packaging ≈ 2.5 kg CO2e (mixed)
+    'km_transport': 0.15,   # 1 km by small truck ≈ 0.15 kg CO2e
+    'commute_km': 0.12,     # 1 km by bus ≈ 0.12 kg CO2e
+    'business_travel_km': 0.15, # 1 km by taxi ≈ 0.15 kg CO2e
+    'delivery_order': 0.3,  # 1 delivery order ≈ 0.3 kg CO2e (bike/scooter)
+    'customer_visit': 0.2,  # 1 customer visit ≈ 0.2 kg CO2e (short trip)
+    'takeaway_container': 0.05 # 1 container ≈ 0.05 kg CO2e
+}
 
-    data = io.BytesIO()
-    plt.savefig(data, transparent=True)
+# Source or basis of every emission factor, printed next to it in the PDF audit report
+EMISSION_FACTOR_SOURCES = {
+    'lpg_kg':             '1 kg LPG ≈ 2.983 kg CO2e (India GHG Platform)',
+    'diesel_l':           '1 liter diesel ≈ 2.68 kg CO2e',
+    'petrol_l':           '1 liter petrol ≈ 2.31 kg CO2e',
+    'refrigerant_kg':     'R134a GWP ≈ 1300 (example, update as needed)',
+    'electricity_kwh':    '1 kWh grid electricity ≈ 0.82 kg CO2e (India avg)',
+    'rice_kg':            '1 kg rice ≈ 2.7 kg CO2e (India, incl. methane)',
+    'lentils_kg':         '1 kg lentils ≈ 0.9 kg CO2e',
+    'vegetables_kg':      '1 kg vegetables ≈ 0.5 kg CO2e',
+    'milk_l':             '1 liter milk ≈ 1.4 kg CO2e',
+    'ghee_kg':            '1 kg ghee ≈ 8.0 kg CO2e',
+    'spices_kg':          '1 kg spices ≈ 1.5 kg CO2e',
+    'oil_l':              '1 liter cooking oil ≈ 3.3 kg CO2e',
+    'food_waste_kg':      '1 kg food waste ≈ 1.9 kg CO2e (landfill, India)',
+    'packaging_kg':       '1 kg packaging ≈ 2.5 kg CO2e (mixed)',
+    'km_transport':       '1 km by small truck ≈ 0.15 kg CO2e',
+    'commute_km':         '1 km by bus ≈ 0.12 kg CO2e',
+    'business_travel_km': '1 km by taxi ≈ 0.15 kg CO2e',
+    'delivery_order':     '1 delivery order ≈ 0.3 kg CO2e (bike/scooter)',
+    'customer_visit':     '1 customer visit ≈ 0.2 kg CO2e (short trip)',
+    'takeaway_container': '1 container ≈ 0.05 kg CO2e'
+}
 
-    background = Image.open("./media/default.png")
-    draw = ImageDraw.Draw(background)
-    font1 = ImageFont.truetype(font="./style/ArchivoBlack-Regular.ttf", size=50)
-    font = ImageFont.truetype(font="./style/arialuni.ttf", size=50)
-    draw.text(xy=(320, 50), text=f"  How big is your\nCarbon Footprint?", font=font1, fill="#039e8e", stroke_width=1, stroke_fill="#039e8e")
-    draw.text(xy=(370, 250), text=f"Monthly Emission \n\n   {prediction:.0f} kgCO₂e", font=font, fill="#039e8e", stroke_width=1, stroke_fill="#039e8e")
-    data_back = io.BytesIO()
-    background.save(data_back, "PNG")
-    background = Image.open(data_back).convert('RGBA')
-    piechart = Image.open(data)
-    ayak = Image.open("./media/ayak.png").resize((370, 370))
-    bg_width, bg_height = piechart.size
-    ov_width, ov_height = ayak.size
-    x = (bg_width - ov_width) // 2
-    y = (bg_height - ov_height) // 2
-    piechart.paste(ayak, (x, y), ayak.convert('RGBA'))
-    background.paste(piechart, (40, 200), piechart.convert('RGBA'))
-    data2 = io.BytesIO()
-    background.save(data2, "PNG")
-    background = Image.open(data2).resize((700, 700))
-    data3 = io.BytesIO()
-    background.save(data3, "PNG")
-    return data3
+# Activity columns used by the upload template, session data and calculations
+ACTIVITY_COLUMNS = [
+    'lpg_used', 'generator_fuel', 'refrigerant_leak', 'owned_vehicle_fuel',
+    'electricity', 'chilled_water', 'rice_kg', 'lentils_kg', 'vegetables_kg',
+    'milk_liters', 'ghee_kg', 'spices_kg', 'oil_liters', 'upstream_transport_km',
+    'food_waste_kg', 'packaging_waste_kg', 'staff_count', 'avg_commute_km',
+    'business_travel_km', 'third_party_deliveries', 'customer_visits', 'takeaway_containers'
+]
+
+# Linear terms of each scope: activity column -> emission factor key
+SCOPE_TERMS = {
+    'scope1': {
+        'lpg_used': 'lpg_kg',
+        'generator_fuel': 'diesel_l',
+        'refrigerant_leak': 'refrigerant_kg',
+        'owned_vehicle_fuel': 'petrol_l',
+    },
+    'scope2': {
+        'electricity': 'electricity_kwh',
+        'chilled_water': 'electricity_kwh',
+    },
+    'scope3': {
+        'rice_kg': 'rice_kg',
+        'lentils_kg': 'lentils_kg',
+        'vegetables_kg': 'vegetables_kg',
+        'milk_liters': 'milk_l',
+        'ghee_kg': 'ghee_kg',
+        'spices_kg': 'spices_kg',
+        'oil_liters': 'oil_l',
+        'upstream_transport_km': 'km_transport',
+        'food_waste_kg': 'food_waste_kg',
+        'packaging_waste_kg': 'packaging_kg',
+        'business_travel_km': 'business_travel_km',
+        'third_party_deliveries': 'delivery_order',
+        'customer_visits': 'customer_visit',
+        'takeaway_containers': 'takeaway_container',
+    },
+}
+
+def calculate_emissions(data, factors=None):
+    """
+    Calculate Scope 1, 2 and 3 emissions for one or many restaurants
+    Accepts a dict (one restaurant) or a DataFrame with one row per restaurant;
+    missing activity columns count as 0
+    Returns a DataFrame with scope1, scope2, scope3 and total in kgCO2e
+    """
+    factors = EMISSION_FACTORS if factors is None else factors
+    if isinstance(data, dict):
+        data = pd.DataFrame([data])
+    values = data.reindex(columns=ACTIVITY_COLUMNS, fill_value=0).fillna(0).astype(float)
+
+    result = pd.DataFrame(index=data.index)
+    for scope, terms in SCOPE_TERMS.items():
+        weights = np.array([factors[key] for key in terms.values()])
+        result[scope] = values[list(terms)].to_numpy() @ weights
+    # Staff commuting: staff × one-way km × 365 days
+    result['scope3'] += values['staff_count'] * values['avg_commute_km'] * 365 * factors['commute_km']
+    result['total'] = result['scope1'] + result['scope2'] + result['scope3']
+    return result
+
+def calculate_emission_terms(data, factors=None):
+    """
+    Emissions of every individual term in kgCO2e, one column per activity column
+    (plus 'staff_commute' for staff × commute distance)
+    Rows sum to calculate_emissions(data)['total']
+    """
+    factors = EMISSION_FACTORS if factors is None else factors
+    if isinstance(data, dict):
+        data = pd.DataFrame([data])
+    values = data.reindex(columns=ACTIVITY_COLUMNS, fill_value=0).fillna(0).astype(float)
+
+    terms = pd.DataFrame(index=data.index)
+    for scope_terms in SCOPE_TERMS.values():
+        for column, factor_key in scope_terms.items():
+            terms[column] = values[column] * factors[factor_key]
+    terms['staff_commute'] = values['staff_count'] * values['avg_commute_km'] * 365 * factors['commute_km']
+    return terms
+
+# Slices of the outlet share card: label -> emission terms
+CARD_GROUPS = {
+    'Fuel': list(SCOPE_TERMS['scope1']),
+    'Energy': list(SCOPE_TERMS['scope2']),
+    'Food': ['rice_kg', 'lentils_kg', 'vegetables_kg', 'milk_liters', 'ghee_kg', 'spices_kg', 'oil_liters'],
+    'Other': ['upstream_transport_km', 'food_waste_kg', 'packaging_waste_kg', 'staff_commute',
+              'business_travel_km', 'third_party_deliveries', 'customer_visits', 'takeaway_containers'],
+}
+
+def card_breakdown(data, factors=None):
+    """
+    Group the emission terms into the four share card slices (kgCO2e)
+    """
+    terms = calculate_emission_terms(data, factors)
+    return pd.DataFrame({label: terms[columns].sum(axis=1) for label, columns in CARD_GROUPS.items()})
 
 def validate_restaurant_data(data_dict):
     """
@@ -0,0 +1,144 @@
+import re
+import difflib
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+CATALOG_PATH = "./catalog/ingredients.csv"
+
+# Words in ledger item names that do not identify the ingredient
+STOPWORDS = {
+    'fresh', 'organic', 'premium', 'quality', 'pure', 'loose', 'pack', 'packet', 'pkt', 'bag', 'box',
+    'brand', 'grade', 'best', 'local', 'special', 'super', 'select', 'daily', 'the', 'of', 'and', 'a',
+    'kg', 'kgs', 'g', 'gm', 'gms', 'gram', 'grams', 'l', 'lt', 'ltr', 'ltrs', 'litre', 'litres', 'liter',
+    'liters', 'ml', 'pc', 'pcs', 'piece', 'pieces', 'no', 'nos', 'x',
+}
+FUZZY_CUTOFF = 0.8
+FUZZY_MIN_LENGTH = 6  # shorter names are too close to each other for typo matching
+
+def _singular(token):
+    if len(token) <= 3 or token.endswith('ss'):
+        return token
+    if token.endswith('aves'):
+        return token[:-3] + 'f'
+    if token.endswith('ies'):
+        return token[:-3] + 'y'
+    if token.endswith(('oes', 'ches', 'shes')):
+        return token[:-2]
+    if token.endswith('s'):
+        return token[:-1]
+    return token
+
+@lru_cache(maxsize=200000)
+def normalize_name(name):
+    """
+    Canonical form of an item name: lowercase ASCII words without pack sizes,
+    numbers, filler words or plural endings ("Fresh Tomatoes 5kg" -> "tomato")
+    """
+    text = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode().lower()
+    text = re.sub(r'\d+(\.\d+)?', ' ', text)
+    tokens = [_singular(t) for t in re.findall(r'[a-z]+', text) if t not in STOPWORDS]
+    return ' '.join(tokens)
+
+class IngredientCatalog:
+    """
+    Ingredient emission factors with a hash index over item names and aliases
+    Ledger item names are resolved by exact normalized lookup, then by the
+    longest catalog name whose words all appear in the item, then by fuzzy
+    matching; resolutions are cached per distinct name
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog.reset_index(drop=True)
+        # A trailing sentinel row lets position -1 (unmatched) take NaN/None in joins
+        self.items = np.append(self.catalog['item'].to_numpy(dtype=object), None)
+        self.categories = np.append(self.catalog['category'].to_numpy(dtype=object), None)
+        self.units = np.append(self.catalog['unit'].to_numpy(dtype=object), None)
+        self.factors = np.append(self.catalog['kgco2e_per_unit'].to_numpy(dtype=np.float64), np.nan)
+
+        self.index = {}
+        for pos, item in enumerate(self.catalog['item']):
+            self.index.setdefault(normalize_name(item), pos)
+        for pos, aliases in enumerate(self.catalog['aliases']):
+            for alias in filter(None, str(aliases).split('|')):
+                self.index.setdefault(normalize_name(alias), pos)
+        self._keys = list(self.index)
+        self._by_token = {}
+        for key in self._keys:
+            for token in key.split():
+                self._by_token.setdefault(token, []).append(key)
+        self.resolve = lru_cache(maxsize=100000)(self._resolve)
+
+    @classmethod
+    def from_csv(cls, path=CATALOG_PATH):
+        return cls(pd.read_csv(path, keep_default_na=False))
+
+    def _resolve(self, name):
+        # Returns (catalog position or -1, how it matched)
+        key = normalize_name(name)
+        if not key:
+            return -1, 'none'
+        if key in self.index:
+            return self.index[key], 'exact'
+        tokens = set(key.split())
+        contained = [k for t in tokens for k in self._by_token.get(t, ()) if set(k.split()) <= tokens]
+        if contained:
+            best = max(contained, key=lambda k: (len(k.split()), len(k)))
+            return self.index[best], 'words'
+        close = difflib.get_close_matches(key, self._keys, n=1, cutoff=FUZZY_CUTOFF) if len(key) >= FUZZY_MIN_LENGTH else []
+        if close:
+            return self.index[close[0]], 'fuzzy'
+        return -1, 'none'
+
+    def match(self, names):
+        """
+        Resolve item names to catalog positions (-1 if unknown) and match methods
+        Each distinct name is resolved once
+        """
+        codes, uniques = pd.factorize(pd.Series(names, dtype=object).fillna('').astype(str), sort=False)
+        resolved = [self.resolve(name) for name in uniques]
+        positions = np.array([pos for pos, _ in resolved], dtype=np.int64)
+        methods = np.array([method for _, method in resolved], dtype=object)
+        return positions[codes], methods[codes]
+
+    def ledger_footprint(self, ledger, item_column='item', quantity_column='quantity'):
+        """
+        Join a purchase ledger (one row per line, quantity in the catalog unit)
+        to the catalog; returns the ledger with matched_item, category, unit,
+        match, kgco2e_per_unit and kgco2e columns (NaN where unmatched)
+        """
+        missing = [c for c in (item_column, quantity_column) if c not in ledger.columns]
+        if missing:
+            raise ValueError(f"Ledger is missing columns: {', '.join(missing)}")
+        positions, methods = self.match(ledger[item_column].to_numpy())
+        lines = ledger.copy()
+        lines['matched_item'] = self.items[positions]
+        lines['category'] = self.categories[positions]
+        lines['unit'] = self.units[positions]
+        lines['match'] = methods
+        lines['kgco2e_per_unit'] = self.factors[positions]
+        lines['kgco2e'] = pd.to_numeric(lines[quantity_column], errors='coerce').to_numpy() * lines['kgco2e_per_unit'].to_numpy()
+        return lines
+
+def ledger_summary(lines, by='category'):
+    """
+    Total kgCO2e and ledger lines per category (or matched_item) of a joined ledger
+    """
+    matched = lines[lines['matched_item'].notna()]
+    summary = matched.groupby(by)['kgco2e'].agg(['sum', 'size']).rename(columns={'sum': 'kgco2e', 'size': 'lines'})
+    return summary.sort_values('kgco2e', ascending=False)
+
+def unmatched_items(lines, item_column='item'):
+    """
+    Distinct ledger names that did not resolve, with how many lines use them
+    """
+    unmatched = lines.loc[lines['matched_item'].isna(), item_column]
+    return unmatched.value_counts().rename_axis(item_column).reset_index(name='lines')
+
+@st.cache_resource
+def get_ingredient_catalog():
+    # Loaded and indexed once per server process
+    return IngredientCatalog.from_csv()
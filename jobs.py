@@ -0,0 +1,204 @@
+import os
+import time
+import sqlite3
+import threading
+import datetime
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import streamlit as st
+
+JOBS_DB_PATH = "./data/jobs.db"
+ARTIFACT_DIR = "./data/artifacts"
+
+# Concurrency limits, override with environment variables
+MAX_WORKERS = int(os.environ.get("JOB_MAX_WORKERS", 4))
+MAX_JOBS_PER_TENANT = int(os.environ.get("JOB_MAX_PER_TENANT", 2))
+# Finished jobs and their artifacts are deleted after this many hours
+JOB_TTL_HOURS = float(os.environ.get("JOB_TTL_HOURS", 24))
+# Sessions with queued or running jobs rerun this often to show progress (0 shows a refresh button instead)
+JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", 2))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    tenant TEXT NOT NULL,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    artifact TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_tenant ON jobs (tenant, created_at);
+"""
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec='seconds')
+
+class JobQueue:
+    """
+    Background job queue for heavy work (batch calculations, reports, charts)
+    Jobs run on a thread pool; their state lives in a SQLite table so any
+    session can poll progress and download the finished artifact.
+    Each tenant runs at most max_per_tenant jobs at once and waiting tenants
+    are served round-robin, so one large tenant cannot starve the others.
+    Finished jobs older than the TTL are evicted with their artifacts.
+    """
+
+    def __init__(self, path=JOBS_DB_PATH, artifact_dir=ARTIFACT_DIR,
+                 max_workers=MAX_WORKERS, max_per_tenant=MAX_JOBS_PER_TENANT,
+                 ttl_hours=JOB_TTL_HOURS, evict_every=600):
+        self.artifact_dir = artifact_dir
+        self.max_workers = max_workers
+        self.max_per_tenant = max_per_tenant
+        self.ttl = ttl_hours * 3600
+        self.evict_every = evict_every
+        self._last_eviction = 0
+        os.makedirs(artifact_dir, exist_ok=True)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        with self._db:
+            self._db.executescript(SCHEMA)
+            # Callables are not persisted, so jobs cut off by a restart cannot resume
+            self._db.execute("UPDATE jobs SET status = 'failed', error = 'Interrupted by server restart' "
+                             "WHERE status IN ('queued', 'running')")
+
+        self._lock = threading.Lock()
+        self._waiting = OrderedDict()  # tenant -> deque of (job_id, func, args, kwargs)
+        self._running = {}  # tenant -> number of running jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.evict_expired()
+
+    def _execute(self, query, params=()):
+        with self._db_lock, self._db:
+            return self._db.execute(query, params).fetchall()
+
+    def submit(self, tenant, name, func, *args, filename="result.bin", **kwargs):
+        """
+        Queue func(*args, progress=callback, **kwargs) and return its job id immediately
+        func reports progress with callback(fraction, message) and returns the artifact bytes
+        """
+        self._maybe_evict()
+        job_id = uuid.uuid4().hex
+        self._execute("INSERT INTO jobs (id, tenant, name, status, artifact, created_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                      (job_id, tenant, name, f"{job_id}_{filename}", _now()))
+        with self._lock:
+            self._waiting.setdefault(tenant, deque()).append((job_id, func, args, kwargs))
+            self._dispatch()
+        return job_id
+
+    def _dispatch(self):
+        # Called with self._lock held: start waiting jobs while there is capacity
+        while sum(self._running.values()) < self.max_workers:
+            tenant = next((t for t in self._waiting if self._running.get(t, 0) < self.max_per_tenant), None)
+            if tenant is None:
+                return
+            job_id, func, args, kwargs = self._waiting[tenant].popleft()
+            # Rotate the tenant to the back so others get the next free slot
+            if self._waiting[tenant]:
+                self._waiting.move_to_end(tenant)
+            else:
+                del self._waiting[tenant]
+            self._running[tenant] = self._running.get(tenant, 0) + 1
+            self._executor.submit(self._run, tenant, job_id, func, args, kwargs)
+
+    def _run(self, tenant, job_id, func, args, kwargs):
+        def progress(fraction, message=None):
+            self._execute("UPDATE jobs SET progress = ?, message = ? WHERE id = ?",
+                          (min(max(float(fraction), 0.0), 1.0), message, job_id))
+
+        self._execute("UPDATE jobs SET status = 'running' WHERE id = ?", (job_id,))
+        try:
+            result = func(*args, progress=progress, **kwargs)
+            if isinstance(result, str):
+                result = result.encode('utf-8')
+            artifact = self._execute("SELECT artifact FROM jobs WHERE id = ?", (job_id,))[0][0]
+            with open(os.path.join(self.artifact_dir, artifact), 'wb') as f:
+                f.write(result)
+            self._execute("UPDATE jobs SET status = 'done', progress = 1, finished_at = ? WHERE id = ?",
+                          (_now(), job_id))
+        except Exception as e:
+            self._execute("UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                          (str(e), _now(), job_id))
+        finally:
+            with self._lock:
+                self._running[tenant] -= 1
+                if not self._running[tenant]:
+                    del self._running[tenant]
+                self._dispatch()
+
+    def status(self, job_id):
+        """
+        Return the job row as a dict, or None for an unknown id
+        """
+        rows = self._execute("SELECT id, tenant, name, status, progress, message, artifact, error, created_at, finished_at "
+                             "FROM jobs WHERE id = ?", (job_id,))
+        if not rows:
+            return None
+        keys = ['id', 'tenant', 'name', 'status', 'progress', 'message', 'artifact', 'error', 'created_at', 'finished_at']
+        return dict(zip(keys, rows[0]))
+
+    def tenant_jobs(self, tenant, limit=50):
+        rows = self._execute("SELECT id, name, status, progress, created_at, finished_at FROM jobs "
+                             "WHERE tenant = ? ORDER BY created_at DESC LIMIT ?", (tenant, limit))
+        return pd.DataFrame(rows, columns=['id', 'name', 'status', 'progress', 'created_at', 'finished_at'])
+
+    def artifact(self, job_id):
+        """
+        Return (bytes, filename) of a finished job, or None if it is not done
+        """
+        job = self.status(job_id)
+        if job is None or job['status'] != 'done':
+            return None
+        try:
+            with open(os.path.join(self.artifact_dir, job['artifact']), 'rb') as f:
+                return f.read(), job['artifact'].split('_', 1)[1]
+        except FileNotFoundError:
+            return None
+
+    def evict_expired(self):
+        """
+        Delete jobs that finished more than the TTL ago and their artifacts, and
+        artifact files older than the TTL that no job refers to
+        Returns the number of artifact files removed
+        """
+        self._last_eviction = time.time()
+        cutoff = self._last_eviction - self.ttl
+        finished_before = datetime.datetime.fromtimestamp(cutoff).isoformat(timespec='seconds')
+        expired = {artifact for (artifact,) in self._execute(
+            "SELECT artifact FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (finished_before,))}
+        self._execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (finished_before,))
+        known = {artifact for (artifact,) in self._execute("SELECT artifact FROM jobs")}
+        removed = 0
+        for filename in os.listdir(self.artifact_dir):
+            if filename in known:
+                continue
+            path = os.path.join(self.artifact_dir, filename)
+            if filename in expired or os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        return removed
+
+    def _maybe_evict(self):
+        if time.time() - self._last_eviction > self.evict_every:
+            self.evict_expired()
+
+    def pending(self, job_ids):
+        """
+        True while any of the jobs is queued or running
+        """
+        return any((self.status(job_id) or {}).get('status') in ('queued', 'running') for job_id in job_ids)
+
+@st.cache_resource
+def get_job_queue():
+    # One pool per server process, shared by all sessions
+    return JobQueue()
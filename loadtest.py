@@ -0,0 +1,311 @@
+import io
+import os
+import sys
+import time
+import json
+import heapq
+import random
+import argparse
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+import jobs
+import memprofile
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+DEFAULT_FLOWS = ["sample", "quick", "upload", "export"]
+PERCENTILES = [50, 90, 95, 99]
+
+# The export flow polls its job itself, so the app's own poll (sleep, then rerun)
+# is switched off and reruns measure script time only
+jobs.JOB_POLL_SECONDS = 0
+
+# AppTest drives st.file_uploader only in newer Streamlit releases
+UPLOAD_DRIVEN = hasattr(AppTest, "file_uploader")
+UPLOAD_NOTE = ("Upload flow: the CSV goes through st.file_uploader and the app's parsing" if UPLOAD_DRIVEN else
+               "Upload flow: this Streamlit's AppTest cannot drive st.file_uploader, so upload and CSV parsing "
+               "are NOT measured; the parsed table is stored in session state and only the grid is replayed")
+
+def rss_mb():
+    """
+    Resident memory of this process in MB (Linux /proc, peak RSS elsewhere)
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+def _button(at, label):
+    return next(b for b in at.button if b.label.startswith(label))
+
+# --- Flows ---
+# A flow is a generator over one user's AppTest session. It yields
+# (step, action) where action runs one rerun; yielding None means
+# "nothing to do yet" (e.g. waiting on a background job) and lets other users go first
+
+def sample_flow(at, rng, upload_csv):
+    yield "select", lambda: at.radio[0].set_value("📊 View Sample Data").run()
+    restaurant_type = rng.choice(at.selectbox[0].options)
+    yield "choose_type", lambda: at.selectbox[0].set_value(restaurant_type).run()
+    yield "load", lambda: _button(at, "Use ").click().run()
+
+def quick_flow(at, rng, upload_csv):
+    yield "select", lambda: at.radio[0].set_value("📋 Quick Entry Form").run()
+    inputs = {n.label: n for n in at.number_input}
+    for label in ["LPG used (kg/year)", "Electricity (kWh/year)", "Rice (kg/year)"]:
+        inputs[label].set_value(float(inputs[label].value) * rng.uniform(0.7, 1.3))
+    yield "calculate", lambda: _button(at, "Calculate with Quick Data").click().run()
+
+def upload_flow(at, rng, upload_csv):
+    if UPLOAD_DRIVEN:
+        yield "select", lambda: at.radio[0].set_value("📁 Upload CSV/Excel File").run()
+        yield "upload", lambda: at.file_uploader[0].set_value(("outlets.csv", upload_csv, "text/csv")).run()
+        yield "process", lambda: _button(at, "Process Uploaded Data").click().run()
+        yield "open_grid", lambda: at.radio[0].set_value("🗂️ Multi-Outlet Grid").run()
+    else:
+        # Stored the way "Process Uploaded Data" does it, see UPLOAD_NOTE
+        def inject():
+            data = pd.read_csv(io.BytesIO(upload_csv))
+            at.session_state["uploaded_data"] = data.iloc[0].to_dict()
+            at.session_state["outlet_table"] = data
+            at.radio[0].set_value("🗂️ Multi-Outlet Grid").run()
+        yield "inject_table", inject
+    yield "apply_edits", lambda: _button(at, "Apply Edits").click().run()
+
+def export_flow(at, rng, upload_csv, timeout=30):
+    if not any(b.label == "📊 Generate Excel Report" for b in at.button):
+        yield from sample_flow(at, rng, upload_csv)
+    yield "generate_report", lambda: _button(at, "📊 Generate Excel Report").click().run()
+    # Poll like the app's auto-refresh until the download button shows up
+    deadline = time.perf_counter() + timeout
+    while not any(b.label.startswith("⬇️ Download Excel report") for b in at.get("download_button")):
+        if time.perf_counter() > deadline:
+            raise TimeoutError("Excel report was not ready in time")
+        yield None
+        yield "poll", lambda: at.run()
+
+FLOWS = {
+    "sample": sample_flow,
+    "quick": quick_flow,
+    "upload": upload_flow,
+    "export": export_flow,
+}
+
+def make_upload_csv(n_outlets, seed=0):
+    """
+    Build a template-format CSV with n_outlets synthetic outlets
+    """
+    from benchmark import generate_peer_profiles
+    data = generate_peer_profiles(n_outlets, seed=seed).drop(columns='restaurant_type')
+    data.insert(0, "outlet", [f"outlet_{i + 1}" for i in range(len(data))])
+    return data.to_csv(index=False).encode("utf-8")
+
+def _user_script(at, flows, iterations, rng, upload_csv):
+    yield "open", "first_run", at.run
+    for _ in range(iterations):
+        for flow in rng.sample(flows, len(flows)):
+            for item in FLOWS[flow](at, rng, upload_csv):
+                yield (flow,) + item if item else None
+
+def replay_sessions(users=10, iterations=3, flows=None, outlets=200, seed=0, timeout=60):
+    """
+    Replay the flows for `users` sessions that all stay alive in this process
+    AppTest swaps a process-wide runtime on every run, so its sessions cannot
+    rerun in parallel; steps are interleaved round-robin instead, which is also
+    how a single worker ends up serving them. Each rerun's service time is recorded.
+    Returns (records DataFrame, memory report dict, errors)
+    """
+    flows = flows or DEFAULT_FLOWS
+    upload_csv = make_upload_csv(outlets, seed)
+
+    # Warm-up session so model loading and cached resources are not counted as growth
+    warm = AppTest.from_file(APP_PATH, default_timeout=timeout).run()
+    if warm.exception:
+        raise RuntimeError(warm.exception[0].value)
+    del warm
+    baseline = rss_mb()
+    profiler = memprofile.get_memory_profiler()
+    if profiler:
+        profiler.reset()
+
+    sessions, records, errors = {}, [], []
+    for user in range(users):
+        rng = random.Random(seed + user)
+        at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        sessions[user] = (at, _user_script(at, flows, iterations, rng, upload_csv))
+
+    active = list(sessions)
+    while active:
+        ran = False
+        for user in list(active):
+            at, script = sessions[user]
+            try:
+                item = next(script)
+            except StopIteration:
+                active.remove(user)
+                continue
+            except Exception as e:
+                errors.append((user, "script", f"{type(e).__name__}: {e}"))
+                active.remove(user)
+                continue
+            if item is None:
+                continue
+            flow, step, action = item
+            ran = True
+            start = time.perf_counter()
+            try:
+                action()
+            except Exception as e:
+                errors.append((user, flow, f"{type(e).__name__}: {e}"))
+                continue
+            records.append((user, flow, step, time.perf_counter() - start))
+            if at.exception:
+                errors.append((user, flow, at.exception[0].value))
+        if not ran:
+            # Everyone is waiting on background jobs
+            time.sleep(0.05)
+
+    final = rss_mb()
+    memory = {
+        "baseline_rss_mb": round(baseline, 1),
+        "final_rss_mb": round(final, 1),
+        "growth_per_session_mb": round((final - baseline) / users, 2),
+    }
+    return pd.DataFrame(records, columns=["user", "flow", "step", "seconds"]), memory, errors
+
+def latency_table(records):
+    """
+    Rerun service time percentiles in milliseconds per flow step and overall
+    """
+    if records.empty:
+        return pd.DataFrame()
+    frame = records.assign(ms=records["seconds"] * 1000)
+    def stats(values):
+        row = {"reruns": len(values), "mean": values.mean()}
+        row.update({f"p{p}": v for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))})
+        return row
+    rows = {key: stats(group["ms"].to_numpy()) for key, group in frame.groupby(["flow", "step"])}
+    rows[("all", "")] = stats(frame["ms"].to_numpy())
+    return pd.DataFrame.from_dict(rows, orient="index").round(1)
+
+def simulate_worker(service_times, users, think_time=5.0, reruns_per_user=200, seed=0):
+    """
+    Discrete-event model of one worker serving `users` sessions
+    Each user waits an exponential think time, then asks for a rerun whose
+    service time is drawn from the measured ones; reruns are served one at a
+    time (the GIL serializes script execution). Returns response times in seconds
+    """
+    rng = np.random.default_rng(seed)
+    service_times = np.asarray(service_times, dtype=np.float64)
+    arrivals = [(rng.exponential(think_time), user) for user in range(users)]
+    heapq.heapify(arrivals)
+    remaining = np.full(users, reruns_per_user)
+    free_at, responses = 0.0, []
+    while arrivals:
+        arrival, user = heapq.heappop(arrivals)
+        start = max(arrival, free_at)
+        free_at = start + rng.choice(service_times)
+        responses.append(free_at - arrival)
+        remaining[user] -= 1
+        if remaining[user]:
+            heapq.heappush(arrivals, (free_at + rng.exponential(think_time), user))
+    return np.array(responses)
+
+def capacity_table(service_times, user_counts, think_time=5.0, seed=0):
+    """
+    Simulated rerun latency percentiles (ms) and worker utilization per user count
+    """
+    rows = []
+    mean_service = np.mean(service_times)
+    for users in user_counts:
+        responses = simulate_worker(service_times, users, think_time, seed=seed) * 1000
+        row = {"users": users, "offered_load": min(1.0, users * mean_service / (think_time + mean_service))}
+        row.update({f"p{p}": v for p, v in zip(PERCENTILES, np.percentile(responses, PERCENTILES))})
+        rows.append(row)
+    return pd.DataFrame(rows).set_index("users").round(2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline load test: replay dashboard flows through AppTest sessions")
+    parser.add_argument("--users", type=int, default=10, help="Sessions to replay")
+    parser.add_argument("--iterations", type=int, default=3, help="Times each user replays the flows")
+    parser.add_argument("--flows", default=",".join(DEFAULT_FLOWS), help=f"Comma-separated, from {', '.join(FLOWS)}")
+    parser.add_argument("--outlets", type=int, default=200, help="Outlets in the simulated upload")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=int, default=60, help="Seconds allowed per rerun")
+    parser.add_argument("--think-time", type=float, default=5.0, help="Mean seconds between a user's reruns")
+    parser.add_argument("--capacity", default="1,5,10,20,50,100", help="User counts for the single-worker model")
+    parser.add_argument("--slo-ms", type=float, default=1000, help="p95 rerun latency target for the capacity estimate")
+    parser.add_argument("--memory-budget-mb", type=float,
+                        help="Profile with tracemalloc and fail if any session's traced growth exceeds this")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+    if args.memory_budget_mb:
+        memprofile.MEMORY_PROFILE = True
+
+    # The app reads ./media, ./style and ./models relative to the working directory
+    os.chdir(os.path.dirname(APP_PATH))
+    flows = [f.strip() for f in args.flows.split(",") if f.strip()]
+    unknown = set(flows) - set(FLOWS)
+    if unknown:
+        parser.error(f"Unknown flows: {', '.join(sorted(unknown))}")
+
+    start = time.perf_counter()
+    records, memory, errors = replay_sessions(args.users, args.iterations, flows, args.outlets, args.seed, args.timeout)
+    memory["wall_seconds"] = round(time.perf_counter() - start, 1)
+    latency = latency_table(records)
+    user_counts = [int(n) for n in args.capacity.split(",")]
+    capacity = capacity_table(records["seconds"].to_numpy(), user_counts, args.think_time, args.seed) \
+        if not records.empty else pd.DataFrame()
+    within_slo = capacity.index[capacity["p95"] <= args.slo_ms] if not capacity.empty else []
+
+    pd.set_option("display.width", 160)
+    print(f"Rerun service time (ms), {args.users} sessions × {args.iterations} iterations")
+    print(latency.to_string())
+    print()
+    print(f"Single worker model, {args.think_time:.0f} s mean think time (ms)")
+    print(capacity.to_string())
+    print(f"Users within p95 ≤ {args.slo_ms:.0f} ms: {max(within_slo) if len(within_slo) else 0}")
+    print()
+    for key, value in memory.items():
+        print(f"{key}: {value}")
+    if "upload" in flows:
+        print(UPLOAD_NOTE)
+
+    profiler = memprofile.get_memory_profiler()
+    if profiler:
+        sessions = profiler.session_table()
+        over_budget = sessions[sessions["growth_mb"] > args.memory_budget_mb]
+        memory["max_session_growth_mb"] = round(float(sessions["growth_mb"].max()), 2) if len(sessions) else 0.0
+        print()
+        print("Traced memory per app stage (MB)")
+        print(profiler.stage_table().round(3).to_string())
+        print()
+        print("Top growers (MB)")
+        print(profiler.top_growers(10).round(3).to_string(index=False))
+        print()
+        print(f"Per-session traced growth (MB), budget {args.memory_budget_mb:.1f}")
+        print(sessions.round(3).to_string(index=False))
+        for session in over_budget["session"]:
+            errors.append(("-", "memory", f"session {session} grew past the {args.memory_budget_mb:.1f} MB budget"))
+
+    for user, flow, message in errors:
+        print(f"ERROR user {user} flow {flow}: {message}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "latency_ms": latency.rename_axis(["flow", "step"]).reset_index().to_dict("records"),
+                "capacity_ms": capacity.reset_index().to_dict("records"),
+                "memory": memory,
+                "upload_driven": UPLOAD_DRIVEN if "upload" in flows else None,
+                "errors": [{"user": u, "flow": fl, "error": m} for u, fl, m in errors],
+            }, f, indent=2)
+    sys.exit(1 if errors else 0)
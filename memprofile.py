@@ -0,0 +1,206 @@
+import os
+import sys
+import time
+import threading
+import tracemalloc
+from collections import Counter, deque
+
+import numpy as np
+import pandas as pd
+
+# Profiling mode is off unless MEMORY_PROFILE is set (e.g. MEMORY_PROFILE=1 streamlit run app.py)
+MEMORY_PROFILE = os.environ.get("MEMORY_PROFILE", "") not in ("", "0")
+TRACE_FRAMES = int(os.environ.get("MEMORY_PROFILE_FRAMES", 1))
+# Take a tracemalloc snapshot diff every Nth rerun (snapshots cost tens of ms)
+SNAPSHOT_EVERY = int(os.environ.get("MEMORY_PROFILE_SNAPSHOT_EVERY", 5))
+
+def object_size(value, depth=3):
+    """
+    Estimate the memory held by an object: DataFrames and arrays by their
+    buffers, containers and objects by their contents up to `depth` levels
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, 'getbuffer'):  # BytesIO
+        return value.getbuffer().nbytes
+    size = sys.getsizeof(value, 0)
+    if depth <= 0 or isinstance(value, (str, bytes, bytearray)):
+        return size
+    if isinstance(value, dict):
+        return size + sum(object_size(k, 0) + object_size(v, depth - 1) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset, deque)):
+        return size + sum(object_size(v, depth - 1) for v in value)
+    if hasattr(value, '__dict__') and not isinstance(value, type):
+        return size + object_size(vars(value), depth - 1)
+    return size
+
+class MemoryProfiler:
+    """
+    tracemalloc-based profiling of app reruns
+    Each rerun records the change in traced memory per app stage (between
+    marks) and per session. Every SNAPSHOT_EVERY reruns a snapshot taken at
+    the start is diffed against one at the end, and the growth is summed per
+    source line to find the top growers. Traced memory is process-wide, so
+    reruns of other sessions running at the same time blur the attribution;
+    profile with few users or the load-test harness.
+    """
+
+    def __init__(self, frames=TRACE_FRAMES, snapshot_every=SNAPSHOT_EVERY, history=1000):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.snapshot_every = snapshot_every
+        self._lock = threading.Lock()
+        self._open = {}  # thread id -> state of the rerun running on it
+        self._reruns_seen = 0
+        self.reruns = deque(maxlen=history)
+        self.sessions = {}
+        self.growers = Counter()
+
+    def begin_rerun(self, session, stage='Setup'):
+        """
+        Start measuring a rerun of `session` on the current thread, in `stage`
+        A rerun left open (st.rerun, st.stop or an exception) is closed first
+        """
+        thread = threading.get_ident()
+        if thread in self._open:
+            self.end_rerun()
+        with self._lock:
+            self._reruns_seen += 1
+            take_snapshot = self.snapshot_every and self._reruns_seen % self.snapshot_every == 0
+        current = tracemalloc.get_traced_memory()[0]
+        self._open[thread] = {
+            'session': session,
+            'started': time.time(),
+            'start_memory': current,
+            'stage': stage,
+            'stage_memory': current,
+            'stages': {},
+            'snapshot': self._snapshot() if take_snapshot else None,
+        }
+
+    def mark(self, stage):
+        """
+        Close the current stage of this thread's rerun and start `stage`
+        """
+        state = self._open.get(threading.get_ident())
+        if state is None:
+            return
+        current = tracemalloc.get_traced_memory()[0]
+        state['stages'][state['stage']] = state['stages'].get(state['stage'], 0) + current - state['stage_memory']
+        state['stage'], state['stage_memory'] = stage, current
+
+    def end_rerun(self, session_state=None):
+        """
+        Finish this thread's rerun; session_state (if given) is sized as the session footprint
+        """
+        state = self._open.get(threading.get_ident())
+        if state is None:
+            return
+        self.mark('end')
+        del self._open[threading.get_ident()]
+        growth = tracemalloc.get_traced_memory()[0] - state['start_memory']
+        footprint = None
+        if session_state is not None:
+            footprint = sum(object_size(session_state[key]) for key in list(session_state.keys()))
+
+        if state['snapshot'] is not None:
+            diff = self._snapshot().compare_to(state['snapshot'], 'lineno')
+            line_growth = Counter({str(stat.traceback[0]): stat.size_diff for stat in diff if stat.size_diff})
+        else:
+            line_growth = Counter()
+
+        with self._lock:
+            self.reruns.append({
+                'session': state['session'],
+                'started': state['started'],
+                'seconds': time.time() - state['started'],
+                'growth': growth,
+                'stages': state['stages'],
+            })
+            session = self.sessions.setdefault(state['session'], {'reruns': 0, 'growth': 0, 'footprint': None})
+            session['reruns'] += 1
+            session['growth'] += growth
+            session['last_seen'] = time.time()
+            if footprint is not None:
+                session['footprint'] = footprint
+            self.growers.update(line_growth)
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+
+    def stage_table(self):
+        """
+        Traced memory change per stage (MB): mean, max and total over recorded reruns
+        """
+        with self._lock:
+            rows = [(stage, delta) for rerun in self.reruns for stage, delta in rerun['stages'].items()]
+        frame = pd.DataFrame(rows, columns=['stage', 'delta'])
+        frame['delta'] /= 1024 * 1024
+        table = frame.groupby('stage', sort=False)['delta'].agg(['count', 'mean', 'max', 'sum'])
+        return table.rename(columns={'count': 'reruns', 'mean': 'mean_mb', 'max': 'max_mb', 'sum': 'total_mb'})
+
+    def session_table(self):
+        """
+        Per-session reruns, cumulative traced growth and session_state footprint (MB)
+        """
+        with self._lock:
+            rows = [(session, s['reruns'], s['growth'] / 2 ** 20,
+                     s['footprint'] / 2 ** 20 if s['footprint'] is not None else np.nan)
+                    for session, s in self.sessions.items()]
+        table = pd.DataFrame(rows, columns=['session', 'reruns', 'growth_mb', 'footprint_mb'])
+        return table.sort_values('growth_mb', ascending=False).reset_index(drop=True)
+
+    def top_growers(self, limit=20):
+        """
+        Source lines whose allocations grew the most across diffed reruns (MB)
+        """
+        with self._lock:
+            top = [(line, size) for line, size in self.growers.most_common(limit) if size > 0]
+        return pd.DataFrame([(line, size / 2 ** 20) for line, size in top], columns=['line', 'growth_mb'])
+
+    def traced_memory_mb(self):
+        current, peak = tracemalloc.get_traced_memory()
+        return current / 2 ** 20, peak / 2 ** 20
+
+    def reset(self):
+        with self._lock:
+            self.reruns.clear()
+            self.sessions.clear()
+            self.growers.clear()
+        tracemalloc.reset_peak()
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+def get_memory_profiler():
+    """
+    The process-wide profiler, or None when profiling mode is off
+    """
+    global _profiler
+    if not MEMORY_PROFILE:
+        return None
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = MemoryProfiler()
+    return _profiler
+
+# Hooks for the app script, no-ops unless profiling mode is on
+
+def profile_rerun(session, stage='Setup'):
+    profiler = get_memory_profiler()
+    if profiler:
+        profiler.begin_rerun(session, stage)
+
+def profile_stage(stage):
+    if _profiler:
+        _profiler.mark(stage)
+
+def profile_end(session_state=None):
+    if _profiler:
+        _profiler.end_rerun(session_state)
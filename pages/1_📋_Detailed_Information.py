@@ -1,4 +1,5 @@
 import streamlit as st
+from storage import save_submission
 
 st.set_page_config(page_title="Detailed Information", page_icon="📋")
 
@@ -70,11 +71,14 @@ ISO 14064 is an international standard for quantifying and reporting greenhouse
 
 # Contact form for certification
 st.markdown("### Request Certification")
+restaurant_name = st.text_input("Restaurant Name")
 contact_name = st.text_input("Your Name")
 contact_email = st.text_input("Your Email")
 contact_message = st.text_area("Message (please describe your request or questions)")
 if st.button("Contact Auditor"):
-    st.success("Thank you! The auditor will contact you soon regarding your certification request.")
+    if save_submission('audit_request', restaurant_name, {
+            'name': contact_name, 'email': contact_email, 'message': contact_message}):
+        st.success("Thank you! The auditor will contact you soon regarding your certification request.")
 
 # --- Carbon Offset Projects ---
 st.markdown("## 🌳 Carbon Offset Projects")
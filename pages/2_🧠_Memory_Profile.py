@@ -0,0 +1,43 @@
+import streamlit as st
+from admin import require_admin
+from memprofile import get_memory_profiler
+
+st.set_page_config(page_title="Memory Profile", page_icon="🧠")
+
+st.markdown("# 🧠 Memory Profile")
+require_admin()
+
+profiler = get_memory_profiler()
+if profiler is None:
+    st.info("Profiling mode is off. Start the app with `MEMORY_PROFILE=1 streamlit run app.py` to record memory per rerun.")
+    st.stop()
+
+current_mb, peak_mb = profiler.traced_memory_mb()
+col1, col2, col3 = st.columns(3)
+col1.metric("Traced memory", f"{current_mb:.1f} MB")
+col2.metric("Peak traced memory", f"{peak_mb:.1f} MB")
+col3.metric("Sessions seen", f"{len(profiler.sessions)}")
+
+# --- Stages ---
+st.markdown("## Growth per App Stage")
+st.caption("Change in traced memory while each part of the app script ran (MB)")
+st.dataframe(profiler.stage_table().round(3), use_container_width=True)
+
+# --- Sessions ---
+st.markdown("## Sessions")
+st.caption("Cumulative traced growth over each session's reruns and the current size of its session state (MB)")
+st.dataframe(profiler.session_table().round(3), use_container_width=True, hide_index=True)
+
+# --- Top Growers ---
+st.markdown("## Top Growers")
+st.caption("Source lines whose allocations grew the most between the start and end of reruns")
+limit = st.slider("Lines to show", min_value=5, max_value=100, value=20, step=5)
+st.dataframe(profiler.top_growers(limit).round(3), use_container_width=True, hide_index=True)
+
+col1, col2 = st.columns(2)
+with col1:
+    st.button("🔄 Refresh")
+with col2:
+    if st.button("🗑️ Reset Profile"):
+        profiler.reset()
+        st.rerun()
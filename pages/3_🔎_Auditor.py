@@ -0,0 +1,18 @@
+import pandas as pd
+import streamlit as st
+from admin import require_admin
+from storage import get_submission_store
+
+st.set_page_config(page_title="Auditor", page_icon="🔎")
+
+st.markdown("# 🔎 Restaurant Submission History")
+require_admin()
+
+st.caption("Data saves, offset pledges and audit requests stored under a restaurant name, newest first")
+lookup_name = st.text_input("Restaurant name", key="history_lookup")
+if lookup_name:
+    history = get_submission_store().history(lookup_name)
+    if history.empty:
+        st.info("No submissions found for this restaurant.")
+    else:
+        st.dataframe(pd.concat([history[['kind', 'created_at']], pd.json_normalize(history['payload'])], axis=1))
@@ -0,0 +1,165 @@
+from collections import defaultdict
+
+import pandas as pd
+import streamlit as st
+from ingredients import get_ingredient_catalog
+
+RECIPES_PATH = "./catalog/recipes.csv"
+YIELD_UNITS = ('portion', 'kg')
+
+class RecipeBook:
+    """
+    Per-unit footprints of dishes built from catalog ingredients and sub-recipes
+    Recipes form a DAG (a component naming another recipe is a sub-recipe;
+    recipe names take precedence over catalog items). Each recipe's per-ingredient
+    contributions are computed once and memoized; changing an ingredient factor
+    drops only the recipes that depend on it, directly or through sub-recipes
+    """
+
+    def __init__(self, recipes, catalog):
+        missing = [c for c in ('recipe', 'yield_unit', 'component', 'quantity') if c not in recipes.columns]
+        if missing:
+            raise ValueError(f"Recipes are missing columns: {', '.join(missing)}")
+        recipes = recipes.assign(
+            recipe=recipes['recipe'].astype(str).str.strip().str.lower(),
+            component=recipes['component'].astype(str).str.strip().str.lower(),
+            yield_unit=recipes['yield_unit'].astype(str).str.strip().str.lower(),
+            quantity=pd.to_numeric(recipes['quantity'], errors='coerce'),
+        )
+        bad_units = sorted(set(recipes['yield_unit']) - set(YIELD_UNITS))
+        if bad_units:
+            raise ValueError(f"Unknown yield units: {', '.join(bad_units)} (use {' or '.join(YIELD_UNITS)})")
+        if recipes['quantity'].isna().any() or (recipes['quantity'] < 0).any():
+            raise ValueError("Recipe quantities must be non-negative numbers")
+
+        self.catalog = catalog
+        self.units = recipes.groupby('recipe', sort=False)['yield_unit'].first().to_dict()
+        self.components = defaultdict(list)  # recipe -> [(kind, name, quantity)]
+        self.parents = defaultdict(set)      # (kind, name) -> recipes using it directly
+        self.factors = {}                    # catalog item -> kgCO2e per catalog unit
+        unknown = []
+        for recipe, component, quantity in recipes[['recipe', 'component', 'quantity']].itertuples(index=False):
+            if component in self.units:
+                node = ('recipe', component)
+            else:
+                pos, _ = catalog.resolve(component)
+                if pos < 0:
+                    unknown.append(f"{component} (in {recipe})")
+                    continue
+                node = ('ingredient', catalog.items[pos])
+                self.factors.setdefault(catalog.items[pos], float(catalog.factors[pos]))
+            self.components[recipe].append(node + (float(quantity),))
+            self.parents[node].add(recipe)
+        if unknown:
+            raise ValueError(f"Unknown ingredients: {', '.join(unknown)}")
+        self._check_acyclic()
+        self._memo = {}
+        self.evaluations = 0  # recipe contributions computed (not served from the memo)
+
+    @classmethod
+    def from_csv(cls, path=RECIPES_PATH, catalog=None):
+        return cls(pd.read_csv(path), catalog or get_ingredient_catalog())
+
+    def _check_acyclic(self):
+        # Depth-first search; a recipe reached again while still on the stack closes a cycle
+        state = {}
+        for start in self.units:
+            if start in state:
+                continue
+            state[start] = 'open'
+            stack = [(start, iter(self.components[start]))]
+            while stack:
+                recipe, children = stack[-1]
+                for kind, name, _ in children:
+                    if kind != 'recipe':
+                        continue
+                    if state.get(name) == 'open':
+                        path = [r for r, _ in stack]
+                        cycle = path[path.index(name):] + [name]
+                        raise ValueError(f"Recipe cycle: {' -> '.join(cycle)}")
+                    if name not in state:
+                        state[name] = 'open'
+                        stack.append((name, iter(self.components[name])))
+                        break
+                else:
+                    state[recipe] = 'done'
+                    stack.pop()
+
+    def contributions(self, recipe):
+        """
+        kgCO2e per ingredient in one unit (portion or kg) of a recipe, sub-recipes expanded
+        """
+        recipe = recipe.strip().lower()
+        if recipe not in self._memo:
+            if recipe not in self.units:
+                raise KeyError(f"Unknown recipe: {recipe}")
+            totals = defaultdict(float)
+            for kind, name, quantity in self.components[recipe]:
+                if kind == 'ingredient':
+                    totals[name] += quantity * self.factors[name]
+                else:
+                    for item, kg in self.contributions(name).items():
+                        totals[item] += quantity * kg
+            self._memo[recipe] = dict(totals)
+            self.evaluations += 1
+        return self._memo[recipe]
+
+    def footprint(self, recipe):
+        """
+        kgCO2e per unit (portion or kg) of a recipe
+        """
+        return sum(self.contributions(recipe).values())
+
+    def breakdown(self, recipe):
+        """
+        Per-ingredient kgCO2e of one unit of a recipe, largest first
+        """
+        contributions = pd.Series(self.contributions(recipe), dtype=float).rename_axis('ingredient').rename('kgco2e')
+        return contributions.sort_values(ascending=False)
+
+    def dishes(self):
+        """
+        Recipes not used as a sub-recipe of any other recipe
+        """
+        return [recipe for recipe in self.units if not self.parents.get(('recipe', recipe))]
+
+    def footprints(self, dishes_only=False):
+        """
+        Footprint table: recipe, yield_unit, kgco2e (per unit) and whether it is a dish
+        """
+        dishes = set(self.dishes())
+        rows = [(recipe, unit, self.footprint(recipe), recipe in dishes)
+                for recipe, unit in self.units.items() if not dishes_only or recipe in dishes]
+        table = pd.DataFrame(rows, columns=['recipe', 'yield_unit', 'kgco2e', 'dish'])
+        return table.sort_values('kgco2e', ascending=False).reset_index(drop=True)
+
+    def dependents(self, ingredient):
+        """
+        Recipes that use a catalog item directly or through sub-recipes
+        """
+        found, frontier = set(), list(self.parents.get(('ingredient', ingredient), ()))
+        while frontier:
+            recipe = frontier.pop()
+            if recipe not in found:
+                found.add(recipe)
+                frontier.extend(self.parents.get(('recipe', recipe), ()))
+        return found
+
+    def set_factor(self, ingredient, factor):
+        """
+        Change an ingredient's kgCO2e per catalog unit and invalidate only the
+        recipes that depend on it; returns the invalidated recipe names
+        """
+        pos, _ = self.catalog.resolve(ingredient)
+        if pos < 0 or self.catalog.items[pos] not in self.factors:
+            raise KeyError(f"No recipe uses ingredient: {ingredient}")
+        item = self.catalog.items[pos]
+        self.factors[item] = float(factor)
+        invalidated = self.dependents(item)
+        for recipe in invalidated:
+            self._memo.pop(recipe, None)
+        return sorted(invalidated)
+
+@st.cache_data
+def load_recipes(path=RECIPES_PATH):
+    return pd.read_csv(path)
@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+from functions import ACTIVITY_COLUMNS, calculate_emissions
+
+# --- Indicative prices (₹ per activity unit, update as needed) ---
+RESOURCE_PRICES = {
+    'lpg_used': 95.0,           # commercial LPG ≈ ₹1,800 per 19 kg cylinder
+    'generator_fuel': 90.0,     # diesel per liter
+    'owned_vehicle_fuel': 100.0,# petrol per liter
+    'refrigerant_leak': 600.0,  # refrigerant top-up per kg
+    'electricity': 9.0,         # commercial tariff per kWh
+    'chilled_water': 9.0,
+    'rice_kg': 45.0,
+    'lentils_kg': 110.0,
+    'vegetables_kg': 35.0,
+    'milk_liters': 55.0,
+    'ghee_kg': 600.0,
+    'spices_kg': 300.0,
+    'oil_liters': 150.0,
+    'food_waste_kg': 2.0,       # disposal fee
+    'takeaway_containers': 6.0,
+}
+
+# --- Catalog of reduction actions ---
+# scale: activity column -> multiplier
+# add: target column -> (source column, units added per unit of source, before scaling)
+# fixed_cost: ₹/year (annualized equipment, training, services)
+# variable_cost: (basis column, ₹ per unit of basis), e.g. solar lease per kWh consumed
+# group: at most one action per group is recommended
+REDUCTION_ACTIONS = {
+    'efficient_burners': {
+        'label': 'Fit high-efficiency LPG burners',
+        'scale': {'lpg_used': 0.85},
+        'fixed_cost': 6000, 'group': 'cooking',
+    },
+    'induction_cooking': {
+        'label': 'Move half of LPG cooking to induction',
+        'scale': {'lpg_used': 0.5},
+        'add': {'electricity': ('lpg_used', 0.5 * 6.0)},  # ≈ 6 kWh replaces 1 kg LPG (40% vs 85% efficiency)
+        'fixed_cost': 25000, 'group': 'cooking',
+    },
+    'rooftop_solar': {
+        'label': 'Rooftop solar for 30% of electricity',
+        'scale': {'electricity': 0.7},
+        'variable_cost': ('electricity', 0.3 * 4.0),  # ≈ ₹4 per solar kWh
+        'fixed_cost': 5000,
+    },
+    'green_tariff': {
+        'label': 'Green energy tariff for all grid electricity',
+        'scale': {'electricity': 0.0},
+        'variable_cost': ('electricity', 9.0 + 1.0),  # tariff still paid, plus ≈ ₹1/kWh green premium
+        'fixed_cost': 0,
+    },
+    'efficient_equipment': {
+        'label': 'LED lighting and star-rated fridges (-15% electricity)',
+        'scale': {'electricity': 0.85},
+        'fixed_cost': 20000,
+    },
+    'food_waste_program': {
+        'label': 'Food waste tracking and portion control',
+        'scale': {'food_waste_kg': 0.5, 'rice_kg': 0.97, 'lentils_kg': 0.97, 'vegetables_kg': 0.97},
+        'fixed_cost': 12000,
+    },
+    'reusable_containers': {
+        'label': 'Reusable/deposit takeaway containers for half of orders',
+        'scale': {'takeaway_containers': 0.5, 'packaging_waste_kg': 0.9},
+        'fixed_cost': 10000,
+    },
+    'refrigerant_maintenance': {
+        'label': 'Leak checks and servicing for fridges and ACs',
+        'scale': {'refrigerant_leak': 0.3},
+        'fixed_cost': 8000,
+    },
+    'local_sourcing': {
+        'label': 'Source ingredients locally (-40% transport)',
+        'scale': {'upstream_transport_km': 0.6},
+        'fixed_cost': 5000,
+    },
+    'electric_delivery': {
+        'label': 'Electric two-wheelers for own deliveries',
+        'scale': {'owned_vehicle_fuel': 0.0},
+        'add': {'electricity': ('owned_vehicle_fuel', 1.8)},  # ≈ 1.8 kWh per liter of petrol replaced
+        'fixed_cost': 30000, 'group': 'delivery',
+    },
+}
+
+def apply_action(values, action):
+    """
+    Return a copy of the activity frame with one action applied to every row
+    """
+    after = values.copy()
+    for target, (source, rate) in action.get('add', {}).items():
+        after[target] = after[target] + values[source] * rate
+    for column, factor in action.get('scale', {}).items():
+        after[column] = after[column] * factor
+    return after
+
+def action_cost(values, after, action):
+    """
+    Annual cost (₹) of an action per row: fixed and variable costs plus the
+    change in resource spend (negative when the action saves money)
+    """
+    cost = np.full(len(values), float(action.get('fixed_cost', 0)))
+    if 'variable_cost' in action:
+        basis, rate = action['variable_cost']
+        cost += values[basis].to_numpy() * rate
+    for column, price in RESOURCE_PRICES.items():
+        cost += (after[column] - values[column]).to_numpy() * price
+    return cost
+
+def recommend_reductions(data, target_t, actions=None, factors=None):
+    """
+    Find a low-cost set of actions that reaches a target reduction for every outlet
+    Greedy over the catalog, vectorized across outlets: each round evaluates every
+    action on every outlet's current activity and takes, per outlet, the cheapest
+    action that completes the target, or else the lowest ₹ per kgCO2e avoided.
+    Actions that save money are always included.
+    target_t is a scalar or per-outlet array of tCO2e/year
+    Returns a DataFrame with one row per (outlet, chosen action)
+    """
+    actions = REDUCTION_ACTIONS if actions is None else actions
+    if isinstance(data, dict):
+        data = pd.DataFrame([data])
+    values = data.reindex(columns=ACTIVITY_COLUMNS, fill_value=0).fillna(0).astype(float).reset_index(drop=True)
+    keys = list(actions)
+    n = len(values)
+    remaining = np.broadcast_to(np.asarray(target_t, dtype=np.float64) * 1000, (n,)).copy()
+    available = np.ones((n, len(keys)), dtype=bool)
+    groups = [actions[k].get('group') for k in keys]
+    plan = []
+
+    for step in range(len(keys)):
+        current = calculate_emissions(values, factors)['total'].to_numpy()
+        abatement = np.empty((n, len(keys)))
+        cost = np.empty((n, len(keys)))
+        for j, key in enumerate(keys):
+            after = apply_action(values, actions[key])
+            abatement[:, j] = current - calculate_emissions(after, factors)['total'].to_numpy()
+            cost[:, j] = action_cost(values, after, actions[key])
+
+        valid = available & (abatement > 1e-9)
+        no_regret = valid & (cost <= 0)
+        valid &= (remaining > 0)[:, None] | no_regret
+        if not valid.any():
+            break
+
+        ratio = np.where(valid, cost / np.where(valid, abatement, 1), np.inf)
+        best = ratio.argmin(axis=1)
+        completes = valid & (abatement >= remaining[:, None])
+        finisher = np.where(completes, cost, np.inf).argmin(axis=1)
+        rows = np.arange(n)
+        use_finisher = completes.any(axis=1) & (cost[rows, finisher] < cost[rows, best]) & ~no_regret.any(axis=1)
+        choice = np.where(use_finisher, finisher, best)
+        chosen = valid.any(axis=1)
+
+        for j, key in enumerate(keys):
+            mask = chosen & (choice == j)
+            if not mask.any():
+                continue
+            values.loc[mask] = apply_action(values.loc[mask], actions[key])
+            remaining[mask] -= abatement[mask, j]
+            same_group = [i for i, g in enumerate(groups) if i == j or (g is not None and g == groups[j])]
+            available[np.ix_(mask, same_group)] = False
+            plan.append(pd.DataFrame({
+                'outlet': data.index[mask],
+                'step': step + 1,
+                'action': key,
+                'label': actions[key]['label'],
+                'reduction_t': abatement[mask, j] / 1000,
+                'annual_cost_inr': cost[mask, j],
+            }))
+
+    columns = ['outlet', 'step', 'action', 'label', 'reduction_t', 'annual_cost_inr']
+    if not plan:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(plan, ignore_index=True).sort_values(['outlet', 'step'], kind='stable').reset_index(drop=True)
+
+def summarize_plan(plan, data, target_t):
+    """
+    Per-outlet totals of a plan: reduction, cost and whether the target is met
+    """
+    if isinstance(data, dict):
+        data = pd.DataFrame([data])
+    totals = plan.groupby('outlet')[['reduction_t', 'annual_cost_inr']].sum().reindex(data.index, fill_value=0)
+    totals['target_t'] = np.broadcast_to(np.asarray(target_t, dtype=np.float64), (len(data),))
+    totals['target_met'] = totals['reduction_t'] >= totals['target_t'] - 1e-9
+    return totals
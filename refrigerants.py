@@ -0,0 +1,111 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from functions import EMISSION_FACTORS
+
+# 100-year GWP of common refrigerants (IPCC AR5, same basis as EMISSION_FACTORS['refrigerant_kg'])
+GWP = {
+    'R134A': 1300,
+    'R404A': 3943,
+    'R410A': 1924,
+    'R407C': 1624,
+    'R22': 1760,
+    'R32': 677,
+    'R290': 3,     # propane
+    'R600A': 3,    # isobutane
+    'R744': 1,     # CO2
+    'R717': 0,     # ammonia
+}
+GAS_ALIASES = {'PROPANE': 'R290', 'ISOBUTANE': 'R600A', 'CO2': 'R744', 'AMMONIA': 'R717', 'HFC134A': 'R134A'}
+
+# Default annual leak rate (share of charge) per equipment type, from the
+# IPCC 2006 Guidelines (Vol. 3, Table 7.9) operating emission ranges
+LEAK_RATES = {
+    'domestic_fridge': 0.005,   # household-type fridges
+    'reach_in_fridge': 0.08,    # stand-alone commercial: reach-ins, display and bottle coolers, freezers, ice machines
+    'cold_room': 0.20,          # walk-in cold rooms with remote condensing units
+    'split_ac': 0.05,           # split and window air conditioners
+    'chiller': 0.08,            # central chillers
+    'other': 0.10,
+}
+REGISTER_COLUMNS = ['unit', 'equipment', 'gas', 'charge_kg', 'topup_kg', 'leak_rate']
+
+@lru_cache(maxsize=1024)
+def normalize_gas(name):
+    """
+    Canonical refrigerant code: "r-134a", "134a" and "HFC-134a" -> "R134A"
+    """
+    code = re.sub(r'[^0-9A-Z]', '', str(name).upper())
+    code = GAS_ALIASES.get(code, code)
+    return 'R' + code if code[:1].isdigit() else code
+
+def _lookup(values, table, normalize, default=np.nan):
+    # Vectorized join of a column onto a small table: one lookup per distinct value
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object).fillna('').astype(str), sort=False)
+    keys = [normalize(value) for value in uniques]
+    found = np.array([table.get(key, default) for key in keys] + [default], dtype=float)
+    return found[codes], np.array(keys + [''], dtype=object)[codes]
+
+def refrigerant_emissions(register):
+    """
+    Annual refrigerant leaks and kgCO2e per unit of an equipment register
+    Leaked kg per unit is its recorded top-ups for the year when given (mass
+    balance: what was added replaced what leaked), otherwise charge × its
+    stated leak rate, otherwise charge × the default rate of its equipment
+    type. Gases are joined to the GWP table; unknown gases get NaN kgco2e
+    Returns the register with gas_code, gwp, leak_kg, method and kgco2e columns
+    """
+    missing = [c for c in ('equipment', 'gas', 'charge_kg') if c not in register.columns]
+    if missing:
+        raise ValueError(f"Register is missing columns: {', '.join(missing)}")
+    lines = register.reset_index(drop=True).copy()
+    gwp, gas_codes = _lookup(lines['gas'].to_numpy(), GWP, normalize_gas)
+    default_rate, _ = _lookup(lines['equipment'].to_numpy(), LEAK_RATES, lambda e: e.strip().lower().replace(' ', '_'),
+                              default=LEAK_RATES['other'])
+    charge = pd.to_numeric(lines['charge_kg'], errors='coerce').fillna(0.0).to_numpy()
+    topup = pd.to_numeric(lines.get('topup_kg', pd.Series(np.nan, index=lines.index)), errors='coerce').to_numpy()
+    stated = pd.to_numeric(lines.get('leak_rate', pd.Series(np.nan, index=lines.index)), errors='coerce').to_numpy()
+
+    has_topup, has_rate = ~np.isnan(topup), ~np.isnan(stated)
+    lines['gas_code'] = gas_codes
+    lines['gwp'] = gwp
+    lines['leak_kg'] = np.where(has_topup, topup, charge * np.where(has_rate, stated, default_rate))
+    lines['method'] = np.where(has_topup, 'top-up', np.where(has_rate, 'stated rate', 'default rate'))
+    lines['kgco2e'] = lines['leak_kg'].to_numpy() * gwp
+    return lines
+
+def register_summary(lines, by='gas_code'):
+    """
+    Units, charge, leaked kg and kgCO2e per gas (or per outlet/equipment) of an evaluated register
+    """
+    summary = lines.groupby(by).agg(units=('charge_kg', 'size'), charge_kg=('charge_kg', 'sum'),
+                                    leak_kg=('leak_kg', 'sum'), kgco2e=('kgco2e', 'sum'))
+    return summary.sort_values('kgco2e', ascending=False)
+
+def register_factors(lines, factors=None):
+    """
+    Factor table for a restaurant that reports refrigerant from its register:
+    refrigerant_kg becomes the register's kgCO2e per leaked kg (the leak-weighted
+    GWP of its gases), so its total leaked kg as the refrigerant_leak activity
+    gives the register's kgCO2e. Gases with no known GWP count as 0 kgCO2e
+    """
+    factors = dict(EMISSION_FACTORS if factors is None else factors)
+    leak_kg = lines['leak_kg'].sum()
+    if leak_kg > 0:
+        factors['refrigerant_kg'] = float(lines['kgco2e'].sum() / leak_kg)
+    return factors
+
+def sample_register():
+    """
+    Typical equipment of a medium South Indian restaurant
+    """
+    return pd.DataFrame([
+        ['Kitchen reach-in fridge 1', 'reach_in_fridge', 'R134A', 0.3, None, None],
+        ['Kitchen reach-in fridge 2', 'reach_in_fridge', 'R134A', 0.3, None, None],
+        ['Cold room', 'cold_room', 'R404A', 4.0, None, None],
+        ['Dining split AC 1', 'split_ac', 'R410A', 1.2, None, None],
+        ['Dining split AC 2', 'split_ac', 'R410A', 1.2, None, None],
+        ['Bottle cooler', 'reach_in_fridge', 'R290', 0.15, None, None],
+    ], columns=REGISTER_COLUMNS).astype({'topup_kg': float, 'leak_rate': float})
@@ -0,0 +1,129 @@
+import io
+import os
+import sys
+import zipfile
+import tempfile
+import subprocess
+
+import pandas as pd
+from functions import calculate_emissions, card_breakdown
+from recommendations import recommend_reductions
+from scope3 import SCOPE3_CATEGORIES, scope3_categories
+from fingerprints import fingerprint_columns
+from audit_reports import audit_inputs, audit_pdf
+
+def build_excel_report(export_data, summary_lines, progress=None):
+    """
+    Build the three-sheet Excel report (Restaurant Data, Emissions Results, Summary)
+    Returns the workbook as bytes
+    """
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        pd.DataFrame(list(export_data['Restaurant Data'].items()),
+                     columns=['Parameter', 'Value']).to_excel(writer, sheet_name='Restaurant Data', index=False)
+        if progress:
+            progress(0.4, "Restaurant data written")
+        pd.DataFrame(list(export_data['Emissions Results'].items()),
+                     columns=['Parameter', 'Value']).to_excel(writer, sheet_name='Emissions Results', index=False)
+        if progress:
+            progress(0.7, "Emissions results written")
+        pd.DataFrame({'Summary': summary_lines}).to_excel(writer, sheet_name='Summary', index=False)
+    return buffer.getvalue()
+
+def batch_emissions_csv(data, progress=None, chunk_size=10000):
+    """
+    Calculate emissions for every outlet of a multi-row upload
+    Returns a CSV (bytes) of the input columns plus scope totals and the
+    Scope 3 categories in tCO2e, and the reproducibility fingerprint of each row
+    """
+    chunks = []
+    for start in range(0, len(data), chunk_size):
+        chunk = data.iloc[start:start + chunk_size]
+        results = pd.concat([calculate_emissions(chunk), scope3_categories(chunk).add_prefix('scope3_')], axis=1) / 1000
+        results.columns = [f"{col}_tco2e" for col in results.columns]
+        chunks.append(pd.concat([results, fingerprint_columns(chunk)], axis=1))
+        if progress:
+            done = min(start + chunk_size, len(data))
+            progress(done / len(data), f"{done} of {len(data)} outlets")
+    results = pd.concat(chunks) if chunks else pd.DataFrame(
+        columns=[f"{col}_tco2e" for col in ['scope1', 'scope2', 'scope3', 'total'] + [f'scope3_{cat}' for cat in SCOPE3_CATEGORIES]]
+        + ['fingerprint', 'factor_version', 'code_version'])
+    return pd.concat([data, results], axis=1).to_csv(index=False).encode('utf-8')
+
+def outlet_cards(data):
+    """
+    Build (name, breakdown, annual tCO2e) share card inputs for every outlet
+    """
+    breakdowns = card_breakdown(data) / 1000
+    names = data['outlet'] if 'outlet' in data.columns else [f"outlet_{i + 1}" for i in range(len(data))]
+    return [(name, row.to_dict(), row.sum()) for name, (_, row) in zip(names, breakdowns.iterrows())]
+
+def _pool_zip(script, data, progress, message, options, workers):
+    # Run a batch renderer's CLI on the outlets and zip the files it writes
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_path = os.path.join(work_dir, "outlets.csv")
+        out_dir = os.path.join(work_dir, "out")
+        data.to_csv(data_path, index=False)
+        if progress:
+            progress(0.1, message)
+        # Run the pool from a fresh interpreter: inside Streamlit the app script is
+        # registered as __main__ and would be re-executed by every spawned worker
+        command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), script),
+                   data_path, out_dir] + options
+        if workers:
+            command += ["--workers", str(workers)]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"{message} failed: {(result.stderr.strip().splitlines() or ['no error output'])[-1]}")
+        if progress:
+            progress(0.9, "Packing archive")
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for name in sorted(os.listdir(out_dir)):
+                archive.write(os.path.join(out_dir, name), name)
+    return buffer.getvalue()
+
+def outlet_cards_zip(data, progress=None, fmt="png", workers=None):
+    """
+    Render every outlet's share card across a process pool
+    Returns the cards as a zip archive (bytes)
+    """
+    return _pool_zip("cards.py", data, progress, f"Rendering {len(data)} cards", ["--format", fmt], workers)
+
+def outlet_audit_zip(data, progress=None, workers=None):
+    """
+    Write every outlet's PDF audit report across a process pool
+    Returns the reports as a zip archive (bytes)
+    """
+    return _pool_zip("audit_reports.py", data, progress, f"Writing {len(data)} audit reports", [], workers)
+
+def audit_report_pdf(activity, name, factors=None, progress=None):
+    """
+    PDF audit report of one restaurant's activity data
+    Returns the PDF as bytes
+    """
+    report = audit_inputs(pd.DataFrame([{**activity, 'outlet': name}]), factors)[0]
+    if progress:
+        progress(0.3, "Emissions calculated")
+    return audit_pdf(report, factors)
+
+def batch_recommendations_csv(data, target_pct=20, progress=None, chunk_size=10000):
+    """
+    Recommend reduction actions for every outlet to reach target_pct of its emissions
+    Returns a CSV (bytes) with one row per (outlet, action)
+    """
+    names = data['outlet'].reset_index(drop=True) if 'outlet' in data.columns else None
+    plans = []
+    for start in range(0, len(data), chunk_size):
+        chunk = data.iloc[start:start + chunk_size].reset_index(drop=True)
+        target_t = calculate_emissions(chunk)['total'].to_numpy() / 1000 * target_pct / 100
+        plan = recommend_reductions(chunk, target_t)
+        plan['outlet'] += start
+        plans.append(plan)
+        if progress:
+            done = min(start + chunk_size, len(data))
+            progress(done / len(data), f"{done} of {len(data)} outlets")
+    plan = pd.concat(plans, ignore_index=True) if plans else recommend_reductions(data.iloc[:0], 0)
+    if names is not None:
+        plan['outlet'] = names.iloc[plan['outlet'].to_numpy()].to_numpy()
+    return plan.to_csv(index=False).encode('utf-8')
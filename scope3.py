@@ -0,0 +1,97 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from functions import ACTIVITY_COLUMNS, EMISSION_FACTORS, SCOPE_TERMS
+
+# GHG Protocol Scope 3 categories
+SCOPE3_CATEGORIES = {
+    'cat1': 'Purchased goods and services',
+    'cat2': 'Capital goods',
+    'cat3': 'Fuel- and energy-related activities',
+    'cat4': 'Upstream transportation and distribution',
+    'cat5': 'Waste generated in operations',
+    'cat6': 'Business travel',
+    'cat7': 'Employee commuting',
+    'cat8': 'Upstream leased assets',
+    'cat9': 'Downstream transportation and distribution',
+    'cat10': 'Processing of sold products',
+    'cat11': 'Use of sold products',
+    'cat12': 'End-of-life treatment of sold products',
+    'cat13': 'Downstream leased assets',
+    'cat14': 'Franchises',
+    'cat15': 'Investments',
+}
+
+# Scope 3 activity -> {category: share of its emissions}, shares of a column add up to 1
+# 'staff_commute' is staff_count × avg_commute_km × 365 (one-way km per year)
+CATEGORY_MAP = {
+    'rice_kg': {'cat1': 1.0},
+    'lentils_kg': {'cat1': 1.0},
+    'vegetables_kg': {'cat1': 1.0},
+    'milk_liters': {'cat1': 1.0},
+    'ghee_kg': {'cat1': 1.0},
+    'spices_kg': {'cat1': 1.0},
+    'oil_liters': {'cat1': 1.0},
+    'upstream_transport_km': {'cat4': 1.0},
+    'food_waste_kg': {'cat5': 1.0},
+    'packaging_waste_kg': {'cat5': 1.0},
+    'business_travel_km': {'cat6': 1.0},
+    'staff_commute': {'cat7': 1.0},
+    'third_party_deliveries': {'cat9': 1.0},
+    'customer_visits': {'cat9': 1.0},  # customer travel to the restaurant
+    'takeaway_containers': {'cat1': 0.8, 'cat12': 0.2},  # production vs disposal (indicative split)
+}
+
+# Factor key of each mapped activity
+_FACTOR_KEYS = dict(SCOPE_TERMS['scope3'], staff_commute='commute_km')
+
+@lru_cache(maxsize=8)
+def _category_matrix(factor_items):
+    # Sparse (activity × category) factor matrix in compressed-column form:
+    # category k's entries are indices/data[indptr[k]:indptr[k + 1]]
+    factors = dict(factor_items)
+    activities = list(CATEGORY_MAP)
+    entries = sorted((list(SCOPE3_CATEGORIES).index(cat), activities.index(col), factors[_FACTOR_KEYS[col]] * share)
+                     for col, shares in CATEGORY_MAP.items() for cat, share in shares.items())
+    cats = np.array([e[0] for e in entries])
+    indices = np.array([e[1] for e in entries])
+    data = np.array([e[2] for e in entries])
+    indptr = np.searchsorted(cats, np.arange(len(SCOPE3_CATEGORIES) + 1))
+    return activities, indptr, indices, data
+
+def category_matrix(factors=None):
+    """
+    Build (or reuse) the sparse category factor matrix for a factor table
+    Returns (activity names, indptr, indices, data), compressed by category
+    """
+    factors = EMISSION_FACTORS if factors is None else factors
+    return _category_matrix(tuple(sorted(factors.items())))
+
+def scope3_categories(data, factors=None):
+    """
+    Split Scope 3 into the 15 GHG Protocol categories for one or many restaurants
+    One gather-multiply of the activity matrix with the sparse factor matrix,
+    then a per-category sum; empty categories stay 0
+    Returns a DataFrame with columns cat1..cat15 in kgCO2e that sum to scope3
+    """
+    if isinstance(data, dict):
+        data = pd.DataFrame([data])
+    activities, indptr, indices, weights = category_matrix(factors)
+    values = data.reindex(columns=ACTIVITY_COLUMNS, fill_value=0).fillna(0).astype(float)
+    values = values.assign(staff_commute=values['staff_count'] * values['avg_commute_km'] * 365)
+    dense = values[activities].to_numpy()
+
+    result = np.zeros((len(dense), len(SCOPE3_CATEGORIES)))
+    filled = np.flatnonzero(np.diff(indptr))
+    if len(filled) and len(dense):
+        products = dense[:, indices] * weights
+        result[:, filled] = np.add.reduceat(products, indptr[filled], axis=1)
+    return pd.DataFrame(result, columns=list(SCOPE3_CATEGORIES), index=data.index)
+
+def category_labels(columns=None):
+    """
+    Display names like '1. Purchased goods and services' for category columns
+    """
+    columns = list(SCOPE3_CATEGORIES) if columns is None else columns
+    return {col: f"{col[3:]}. {SCOPE3_CATEGORIES[col]}" for col in columns}
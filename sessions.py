@@ -0,0 +1,145 @@
+import os
+import re
+import time
+import shutil
+import logging
+
+import pandas as pd
+import streamlit as st
+
+SESSIONS_DIR = "./data/sessions"
+
+logger = logging.getLogger(__name__)
+
+# Snapshots untouched for longer than this are deleted, override with an environment variable
+SESSION_TTL_HOURS = float(os.environ.get("SESSION_TTL_HOURS", 72))
+
+# Session state keys that hold activity data: single-row dicts or outlet tables
+SNAPSHOT_KEYS = ['uploaded_data', 'quick_data', 'sample_data', 'outlet_table', 'refrigerant_register']
+
+TOKEN_PATTERN = re.compile(r'[0-9a-f]{32}')
+
+class SessionSnapshots:
+    """
+    On-disk snapshots of each session's activity tables, keyed by session token
+    Every table is one Parquet file (columnar, compressed) written atomically,
+    single-row dicts are stored as one-row tables. Reading a session touches
+    its directory, and sessions idle for longer than the TTL are evicted.
+    """
+
+    def __init__(self, directory=SESSIONS_DIR, ttl_hours=SESSION_TTL_HOURS, evict_every=600):
+        self.directory = directory
+        self.ttl = ttl_hours * 3600
+        self.evict_every = evict_every
+        self._last_eviction = 0
+        os.makedirs(directory, exist_ok=True)
+        self.evict_expired()
+
+    def _session_dir(self, token):
+        if not TOKEN_PATTERN.fullmatch(token or ''):
+            raise ValueError(f"Invalid session token: {token!r}")
+        return os.path.join(self.directory, token)
+
+    def save(self, token, name, value):
+        """
+        Write one table (DataFrame) or row (dict) of a session
+        """
+        session_dir = self._session_dir(token)
+        os.makedirs(session_dir, exist_ok=True)
+        if isinstance(value, dict):
+            table, suffix = pd.DataFrame([value]), "row"
+        else:
+            table, suffix = value.reset_index(drop=True), "table"
+        table.columns = [str(col) for col in table.columns]
+        path = os.path.join(session_dir, f"{name}.{suffix}.parquet")
+        table.to_parquet(path + ".tmp", index=False, compression="zstd")
+        os.replace(path + ".tmp", path)
+        # A name is stored as either a row or a table, never both
+        other = os.path.join(session_dir, f"{name}.{'table' if suffix == 'row' else 'row'}.parquet")
+        if os.path.exists(other):
+            os.remove(other)
+        os.utime(session_dir)
+        self._maybe_evict()
+
+    def load(self, token, names=None):
+        """
+        Read a session's snapshot as {name: DataFrame or dict}, empty if none exists
+        names limits which tables are read, the others are not opened
+        """
+        session_dir = self._session_dir(token)
+        if not os.path.isdir(session_dir):
+            return {}
+        os.utime(session_dir)
+        tables = {}
+        for file_name in os.listdir(session_dir):
+            if not file_name.endswith(".parquet"):
+                continue
+            name, suffix, _ = file_name.rsplit(".", 2)
+            if names is not None and name not in names:
+                continue
+            table = pd.read_parquet(os.path.join(session_dir, file_name))
+            tables[name] = table.to_dict('records')[0] if suffix == "row" else table
+        return tables
+
+    def delete(self, token, names=None):
+        """
+        Remove some tables of a session, or the whole snapshot when names is None
+        """
+        session_dir = self._session_dir(token)
+        if names is None:
+            shutil.rmtree(session_dir, ignore_errors=True)
+            return
+        for name in names:
+            for suffix in ("row", "table"):
+                path = os.path.join(session_dir, f"{name}.{suffix}.parquet")
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def evict_expired(self):
+        """
+        Delete snapshots whose session has not been saved or loaded within the TTL
+        Returns the number of sessions removed
+        """
+        self._last_eviction = time.time()
+        cutoff = self._last_eviction - self.ttl
+        removed = 0
+        for token in os.listdir(self.directory):
+            session_dir = os.path.join(self.directory, token)
+            if os.path.isdir(session_dir) and os.path.getmtime(session_dir) < cutoff:
+                shutil.rmtree(session_dir, ignore_errors=True)
+                removed += 1
+        return removed
+
+    def _maybe_evict(self):
+        if time.time() - self._last_eviction > self.evict_every:
+            self.evict_expired()
+
+@st.cache_resource
+def get_session_snapshots():
+    return SessionSnapshots()
+
+def restore_session(token):
+    """
+    Load a session's snapshot into st.session_state once per browser session
+    Keys already set in this session are kept
+    """
+    if st.session_state.get('snapshot_restored') == token:
+        return
+    missing = [key for key in SNAPSHOT_KEYS if key not in st.session_state]
+    if missing:
+        for key, value in get_session_snapshots().load(token, missing).items():
+            st.session_state[key] = value
+    st.session_state.snapshot_restored = token
+
+def snapshot(token, key):
+    """
+    Persist one activity table of st.session_state after it changed
+    A failed write (disk full, a value Parquet cannot store) is logged and the
+    session keeps its in-memory table. Returns True once the snapshot is written
+    """
+    try:
+        get_session_snapshots().save(token, key, st.session_state[key])
+    except Exception:
+        logger.warning("Could not snapshot %s of session %s", key, token, exc_info=True)
+        return False
+    return True
@@ -0,0 +1,178 @@
+import os
+
+import numpy as np
+import pandas as pd
+from functions import EMISSION_FACTORS
+from sessions import SESSIONS_DIR, TOKEN_PATTERN
+
+HOURS = 8760  # leap-day readings are added to 28 February
+BLOCK_ROWS = 256
+
+# Indicative shape of India's grid intensity: lower at midday when solar
+# generates, higher at the evening peak, lower in the monsoon (hydro, wind)
+HOUR_SHAPE = np.array([1.02] * 6 + [1.0] * 4 + [0.88] * 6 + [0.97] * 2 + [1.08] * 5 + [1.03])
+MONTH_SHAPE = np.array([1.02, 1.02, 1.0, 1.0, 1.0, 0.98, 0.94, 0.94, 0.94, 1.02, 1.02, 1.02])
+DAYS_IN_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+# Load-shifting what-ifs: a share of the load in from_hours moves to to_hours of the same day
+LOAD_SHIFTS = {
+    'evening_to_midday': {
+        'label': 'Evening prep (6–11 pm) moved to midday (10 am–4 pm)',
+        'from_hours': list(range(18, 23)),
+        'to_hours': list(range(10, 16)),
+    },
+    'night_to_midday': {
+        'label': 'Night loads (ice making, water heating) moved to midday',
+        'from_hours': list(range(0, 6)),
+        'to_hours': list(range(10, 16)),
+    },
+}
+
+def grid_intensity_profile(mean=None):
+    """
+    Hourly grid intensity (kgCO2e/kWh) for a 365-day year, scaled so its
+    average equals the flat factor used elsewhere in the app
+    """
+    mean = EMISSION_FACTORS['electricity_kwh'] if mean is None else mean
+    months = np.repeat(np.arange(12), DAYS_IN_MONTH)
+    profile = (MONTH_SHAPE[months][:, None] * HOUR_SHAPE[None, :]).ravel()
+    return profile * mean / profile.mean()
+
+def load_profile(values):
+    """
+    Grid intensity profile from 8,760 hourly values or one 24-hour day (repeated)
+    """
+    values = np.asarray(values, dtype=np.float64).ravel()
+    if len(values) == 24:
+        return np.tile(values, 365)
+    if len(values) != HOURS:
+        raise ValueError(f"Grid profile needs 24 or {HOURS} hourly values, got {len(values)}")
+    return values
+
+def ingest_readings(readings, timestamp_column='timestamp', kwh_column='kwh', outlet_column='outlet'):
+    """
+    Sum interval meter readings (15-minute, half-hourly or hourly kWh of one
+    year) into an outlets × 8,760 hour float32 matrix
+    Readings without an outlet column belong to one outlet named 'Restaurant'
+    Hours are indexed by day of year, so only the 12 months up to the latest
+    reading are kept; older readings would land on the same hours
+    Returns (outlet names, matrix, share of hours with at least one reading per
+    outlet, number of older readings dropped)
+    """
+    missing = [c for c in (timestamp_column, kwh_column) if c not in readings.columns]
+    if missing:
+        raise ValueError(f"Meter data is missing columns: {', '.join(missing)}")
+    stamps = pd.to_datetime(readings[timestamp_column], errors='coerce')
+    kwh = pd.to_numeric(readings[kwh_column], errors='coerce')
+    outlets = readings[outlet_column].astype(str) if outlet_column in readings.columns else pd.Series('Restaurant', index=readings.index)
+    readable = (stamps.notna() & kwh.notna()).to_numpy()
+    valid = readable.copy()
+    if readable.any():
+        # The year starts the day after the latest reading's date one year earlier
+        start = (stamps[readable].max() - pd.DateOffset(years=1)).normalize() + pd.Timedelta(days=1)
+        valid &= (stamps >= start).to_numpy()
+    dropped = int(readable.sum() - valid.sum())
+    stamps, kwh, outlets = stamps[valid], kwh[valid].to_numpy(), outlets[valid]
+
+    day = stamps.dt.dayofyear.to_numpy() - 1
+    day = np.where(stamps.dt.is_leap_year.to_numpy() & (day >= 59), day - 1, day)
+    hour = day * 24 + stamps.dt.hour.to_numpy()
+    codes, names = pd.factorize(outlets, sort=True)
+    flat = codes.astype(np.int64) * HOURS + hour
+    size = len(names) * HOURS
+    matrix = np.bincount(flat, weights=kwh, minlength=size).reshape(len(names), HOURS).astype(np.float32)
+    coverage = (np.bincount(flat, minlength=size).reshape(len(names), HOURS) > 0).mean(axis=1)
+    return list(names), matrix, coverage, dropped
+
+class MeterStore:
+    """
+    Hourly meter matrices saved next to each session's snapshot, so they share
+    its TTL eviction and deletion. The .npy file is opened memory-mapped:
+    hundreds of outlets are read block by block without loading the whole matrix
+    """
+
+    def __init__(self, directory=SESSIONS_DIR):
+        self.directory = directory
+
+    def _paths(self, token):
+        if not TOKEN_PATTERN.fullmatch(token or ''):
+            raise ValueError(f"Invalid session token: {token!r}")
+        session_dir = os.path.join(self.directory, token)
+        return session_dir, os.path.join(session_dir, "meters.npy"), os.path.join(session_dir, "meters.outlets.csv")
+
+    def save(self, token, outlets, matrix):
+        session_dir, matrix_path, outlets_path = self._paths(token)
+        os.makedirs(session_dir, exist_ok=True)
+        stored = np.lib.format.open_memmap(matrix_path + ".tmp", mode='w+', dtype=np.float32, shape=matrix.shape)
+        stored[:] = matrix
+        stored.flush()
+        del stored
+        pd.DataFrame({'outlet': outlets}).to_csv(outlets_path + ".tmp", index=False)
+        # Renamed into place so a reader never opens a half-written file
+        os.replace(matrix_path + ".tmp", matrix_path)
+        os.replace(outlets_path + ".tmp", outlets_path)
+
+    def load(self, token):
+        """
+        (outlet names, read-only memory-mapped matrix), or None if the session has no meter data
+        """
+        _, matrix_path, outlets_path = self._paths(token)
+        if not os.path.exists(matrix_path):
+            return None
+        outlets = pd.read_csv(outlets_path, dtype=str, keep_default_na=False)['outlet'].tolist()
+        return outlets, np.load(matrix_path, mmap_mode='r')
+
+    def delete(self, token):
+        for path in self._paths(token)[1:]:
+            if os.path.exists(path):
+                os.remove(path)
+
+def shift_weights(profile, from_hours, to_hours):
+    """
+    Change in kgCO2e per kWh moved, for every hour of the year: a kWh in one
+    of from_hours spread evenly over to_hours of the same day; 0 elsewhere
+    """
+    daily = profile.reshape(365, 24)
+    weights = np.zeros((365, 24))
+    weights[:, from_hours] = daily[:, to_hours].mean(axis=1, keepdims=True) - daily[:, from_hours]
+    return weights.ravel()
+
+def time_of_use_scope2(readings, outlets, profile=None, shifts=None, block_rows=BLOCK_ROWS):
+    """
+    Scope 2 per outlet from hourly kWh × hourly grid intensity, next to the flat
+    factor, plus the savings of load-shifting what-ifs
+    kWh, time-of-use kgCO2e and every what-if are columns of one hours ×
+    measures matrix, so each block of outlets is a single matrix product
+    shifts maps LOAD_SHIFTS names to the share of from-hours load moved
+    Returns a DataFrame per outlet with kwh, scope2_flat_kg, scope2_tou_kg
+    and one <shift>_saving_kg column per what-if
+    """
+    profile = grid_intensity_profile() if profile is None else profile
+    shifts = shifts or {}
+    columns = [np.ones(HOURS), profile]
+    for name, share in shifts.items():
+        spec = LOAD_SHIFTS[name]
+        columns.append(-share * shift_weights(profile, spec['from_hours'], spec['to_hours']))
+    measures = np.column_stack(columns)
+
+    result = np.empty((len(readings), measures.shape[1]))
+    for start in range(0, len(readings), block_rows):
+        block = np.asarray(readings[start:start + block_rows], dtype=np.float64)
+        result[start:start + block_rows] = block @ measures
+
+    table = pd.DataFrame({'outlet': outlets, 'kwh': result[:, 0]})
+    table['scope2_flat_kg'] = table['kwh'] * EMISSION_FACTORS['electricity_kwh']
+    table['scope2_tou_kg'] = result[:, 1]
+    for i, name in enumerate(shifts):
+        table[f'{name}_saving_kg'] = result[:, 2 + i]
+    return table
+
+def average_day(readings, block_rows=BLOCK_ROWS):
+    """
+    Mean kWh per hour of day across all outlets and days
+    """
+    totals = np.zeros(24)
+    for start in range(0, len(readings), block_rows):
+        block = np.asarray(readings[start:start + block_rows], dtype=np.float64)
+        totals += block.reshape(len(block), 365, 24).sum(axis=(0, 1))
+    return totals / max(len(readings) * 365, 1)
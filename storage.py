@@ -0,0 +1,140 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import datetime
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+DB_PATH = "./data/submissions.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    restaurant TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_restaurant
+    ON submissions (restaurant, created_at);
+"""
+
+def _json_default(value):
+    # numpy scalars from uploaded DataFrames
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+class SubmissionStore:
+    """
+    SQLite store for form submissions (data saves, offset pledges, audit requests)
+    Writes go through one writer thread that commits queued rows in batches,
+    reads use a small pool of WAL-mode connections so they never block writers
+    """
+
+    def __init__(self, path=DB_PATH, pool_size=4, batch_size=200):
+        self.path = path
+        self.batch_size = batch_size
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+        self._pending = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="submission-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            batch = [self._pending.get()]
+            # Group every submission that arrived meanwhile into the same transaction
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            rows = [row for row, _ in batch]
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO submissions (kind, restaurant, created_at, payload) VALUES (?, ?, ?, ?)",
+                        rows)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for _, future in batch:
+                    future.set_result(True)
+
+    def submit(self, kind, restaurant, payload):
+        """
+        Queue a submission for the writer thread
+        Returns a Future that resolves once the row is committed
+        """
+        row = (kind, restaurant.strip(), datetime.datetime.now().isoformat(timespec='seconds'),
+               json.dumps(payload, default=_json_default))
+        future = Future()
+        self._pending.put((row, future))
+        return future
+
+    def history(self, restaurant, kind=None, limit=100):
+        """
+        Fetch the most recent submissions for a restaurant (uses the restaurant index)
+        Returns a DataFrame with kind, created_at and the decoded payload
+        """
+        query = "SELECT kind, created_at, payload FROM submissions WHERE restaurant = ?"
+        params = [restaurant.strip()]
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind)
+        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        with self._connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        history = pd.DataFrame(rows, columns=['kind', 'created_at', 'payload'])
+        history['payload'] = history['payload'].map(json.loads)
+        return history
+
+@st.cache_resource
+def get_submission_store():
+    # One store (and writer thread) per server process, shared by all sessions and pages
+    return SubmissionStore()
+
+def save_submission(kind, restaurant, payload, timeout=10):
+    """
+    Store a form submission under the restaurant name
+    Returns True once it is written, otherwise shows why and returns False
+    """
+    if not restaurant.strip():
+        st.warning("Please enter your restaurant name first.")
+        return False
+    try:
+        get_submission_store().submit(kind, restaurant, payload).result(timeout=timeout)
+    except FutureTimeoutError:
+        st.error("Saving is taking longer than usual. Please try again in a moment.")
+        return False
+    return True
@@ -0,0 +1,199 @@
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+from functions import ACTIVITY_COLUMNS, create_sample_data, validate_restaurant_data
+
+# Share of each create_sample_data archetype among generated restaurants
+ARCHETYPE_WEIGHTS = {
+    "Small Dosa Shop": 0.35,
+    "Medium Restaurant": 0.30,
+    "Large Restaurant": 0.10,
+    "Food Court Stall": 0.25,
+}
+# Fields create_sample_data sets per archetype; drawn with lognormal noise around them
+DRIVERS = ['lpg_used', 'generator_fuel', 'electricity', 'rice_kg', 'vegetables_kg', 'milk_liters', 'staff_count', 'customer_visits']
+# Fields create_sample_data derives from a driver: column -> (driver, ratio); the ratio gets its own noise
+RATIOS = {
+    'lentils_kg': ('rice_kg', 0.25),
+    'ghee_kg': ('milk_liters', 0.2),
+    'spices_kg': ('vegetables_kg', 0.1),
+    'oil_liters': ('vegetables_kg', 0.2),
+    'upstream_transport_km': ('rice_kg', 2),
+    'food_waste_kg': ('rice_kg', 0.25),
+    'packaging_waste_kg': ('customer_visits', 0.02),
+    'third_party_deliveries': ('customer_visits', 0.3),
+    'takeaway_containers': ('customer_visits', 0.4),
+}
+# Fields create_sample_data leaves at a constant: column -> (share of restaurants with any, typical value)
+OPTIONAL = {
+    'refrigerant_leak': (0.6, 2.0),
+    'owned_vehicle_fuel': (0.2, 300.0),
+    'chilled_water': (0.05, 1500.0),
+    'avg_commute_km': (1.0, 5.0),
+    'business_travel_km': (0.7, 100.0),
+}
+INTEGER_COLUMNS = ['staff_count', 'customer_visits', 'third_party_deliveries', 'takeaway_containers']
+DRIVER_SIGMA = 0.3
+RATIO_SIGMA = 0.15
+CHUNK_ROWS = 1000000
+
+# Injected data-entry errors: kind -> what happens to one random activity field
+OUTLIER_KINDS = {
+    'negative': 'value made negative',
+    'spike': 'value multiplied by 20-100',
+    'unit_error': 'value entered in grams/Wh (× 1000)',
+    'zero_required': 'LPG, electricity, rice or vegetables set to 0',
+    'missing': 'value left blank',
+}
+REQUIRED = ['lpg_used', 'electricity', 'rice_kg', 'vegetables_kg']
+
+def _archetype_table():
+    types = list(ARCHETYPE_WEIGHTS)
+    table = pd.DataFrame([create_sample_data(t) for t in types], index=types)
+    return types, table[DRIVERS].to_numpy(dtype=np.float64)
+
+def generate_chunk(rng, rows, outlier_rate=0.01, first_id=0):
+    """
+    One DataFrame of synthetic restaurants drawn with a numpy Generator
+    Columns: outlet_id, restaurant_type, every activity column and outlier
+    (the injected error kind, empty for clean rows)
+    """
+    types, bases = _archetype_table()
+    weights = np.array([ARCHETYPE_WEIGHTS[t] for t in types])
+    kind = rng.choice(len(types), size=rows, p=weights / weights.sum())
+
+    values = {}
+    drivers = bases[kind] * rng.lognormal(0.0, DRIVER_SIGMA, size=(rows, len(DRIVERS)))
+    for j, column in enumerate(DRIVERS):
+        values[column] = drivers[:, j]
+    for column, (driver, ratio) in RATIOS.items():
+        values[column] = values[driver] * ratio * rng.lognormal(0.0, RATIO_SIGMA, size=rows)
+    for column, (share, typical) in OPTIONAL.items():
+        present = rng.random(rows) < share
+        values[column] = np.where(present, typical * rng.lognormal(0.0, DRIVER_SIGMA, size=rows), 0.0)
+    for column in values:
+        if column in INTEGER_COLUMNS:
+            values[column] = np.maximum(np.rint(values[column]), 1 if column == 'staff_count' else 0)
+        else:
+            values[column] = np.round(values[column], 2)  # as entered; also compresses far better
+
+    frame = pd.DataFrame(values)[ACTIVITY_COLUMNS]
+    frame.insert(0, 'restaurant_type', pd.Categorical.from_codes(kind, types))
+    frame.insert(0, 'outlet_id', np.arange(first_id, first_id + rows, dtype=np.int64))
+    frame['outlier'] = inject_outliers(rng, frame, outlier_rate)
+    return frame
+
+def inject_outliers(rng, frame, rate):
+    """
+    Corrupt about `rate` of the rows in place, one field each
+    Returns the injected kind per row ('' for clean rows)
+    """
+    rows = len(frame)
+    labels = np.full(rows, '', dtype=object)
+    hit = np.flatnonzero(rng.random(rows) < rate)
+    if not len(hit):
+        return labels
+    kinds = np.array(list(OUTLIER_KINDS))[rng.integers(0, len(OUTLIER_KINDS), len(hit))]
+    labels[hit] = kinds
+    values = frame[ACTIVITY_COLUMNS].to_numpy(dtype=np.float64, copy=True)
+    fields = rng.integers(0, len(ACTIVITY_COLUMNS), len(hit))
+    required = np.array([ACTIVITY_COLUMNS.index(c) for c in REQUIRED])
+    fields = np.where(kinds == 'zero_required', required[rng.integers(0, len(required), len(hit))], fields)
+
+    current = values[hit, fields]
+    corrupted = current.copy()
+    negative, spike, unit_error = kinds == 'negative', kinds == 'spike', kinds == 'unit_error'
+    corrupted[negative] = np.where(current[negative] > 0, -current[negative], -1.0)
+    corrupted[spike] = current[spike] * rng.uniform(20, 100, spike.sum())
+    corrupted[unit_error] = current[unit_error] * 1000
+    corrupted[kinds == 'zero_required'] = 0.0
+    corrupted[kinds == 'missing'] = np.nan
+    values[hit, fields] = corrupted
+    frame[ACTIVITY_COLUMNS] = values
+    return labels
+
+def generate_restaurants(rows, seed=42, chunk_size=CHUNK_ROWS, outlier_rate=0.01):
+    """
+    Yield DataFrames of up to chunk_size synthetic restaurants, `rows` in total
+    Each chunk has its own RNG stream spawned from the seed, so a (seed,
+    chunk_size) pair always gives the same dataset
+    """
+    chunks = max(1, -(-rows // chunk_size))
+    for index, child in enumerate(np.random.SeedSequence(seed).spawn(chunks)):
+        start = index * chunk_size
+        size = min(chunk_size, rows - start)
+        if size > 0:
+            yield generate_chunk(np.random.default_rng(child), size, outlier_rate, first_id=start)
+
+def write_dataset(path, rows, seed=42, chunk_size=CHUNK_ROWS, outlier_rate=0.01, progress=None):
+    """
+    Write a synthetic dataset to .csv or .parquet one chunk at a time
+    The file is written under a temporary name and renamed when complete
+    Returns the number of rows written
+    """
+    parquet = path.endswith('.parquet')
+    if not parquet and not path.endswith('.csv'):
+        raise ValueError("Output must be a .csv or .parquet file")
+    if parquet:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    temporary = path + ".tmp"
+    written, writer = 0, None
+    try:
+        for chunk in generate_restaurants(rows, seed, chunk_size, outlier_rate):
+            if parquet:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(temporary, table.schema, compression='zstd')
+                writer.write_table(table)
+            else:
+                chunk.to_csv(temporary, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+            written += len(chunk)
+            if progress:
+                progress(written / rows)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(temporary, path)
+    return written
+
+def detection_report(frame):
+    """
+    How many rows of each injected kind validate_restaurant_data flags
+    (any error or range warning), next to the clean-row flag rate
+    """
+    rows = []
+    for outlier, group in frame.groupby('outlier'):
+        flagged = 0
+        for record in group[ACTIVITY_COLUMNS].to_dict('records'):
+            is_valid, warnings, errors = validate_restaurant_data(record)
+            flagged += bool(errors) or any('seems high' in w or 'Value is 0' in w for w in warnings)
+        rows.append((outlier or 'clean', len(group), flagged / len(group)))
+    return pd.DataFrame(rows, columns=['outlier', 'rows', 'flagged_share'])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic restaurant dataset around the create_sample_data archetypes")
+    parser.add_argument("path", help="output .csv or .parquet file")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--outlier-rate", type=float, default=0.01, help="share of rows with one injected data-entry error")
+    parser.add_argument("--check-rows", type=int, default=0, help="run validate_restaurant_data on this many rows and report detection per outlier kind")
+    args = parser.parse_args(argv)
+
+    started = time.time()
+    written = write_dataset(args.path, args.rows, args.seed, args.chunk_size, args.outlier_rate)
+    elapsed = time.time() - started
+    print(f"Wrote {written:,} restaurants to {args.path} in {elapsed:.1f}s ({written / max(elapsed, 1e-9):,.0f} rows/s, "
+          f"{os.path.getsize(args.path) / 2 ** 20:.1f} MB)")
+    if args.check_rows:
+        sample = next(generate_restaurants(min(args.check_rows, args.rows), args.seed, args.chunk_size, args.outlier_rate))
+        print(detection_report(sample).to_string(index=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+import os
+
+# Modules open media, models and fonts by paths relative to the repository root
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,73 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from allocation import allocate, allocate_sales, cooking_energy, order_intensities
+from ingredients import IngredientCatalog
+from recipes import RecipeBook
+
+CATALOG = IngredientCatalog(pd.DataFrame({
+    'item': ['rice', 'urad dal', 'tomato', 'ghee'],
+    'category': ['Grains', 'Pulses', 'Vegetables', 'Dairy'],
+    'unit': ['kg', 'kg', 'kg', 'kg'],
+    'kgco2e_per_unit': [2.7, 1.8, 0.7, 12.0],
+    'aliases': ['', '', '', ''],
+}))
+
+BOOK = RecipeBook(pd.DataFrame([
+    ('dosa batter', 'kg', 'rice', 0.7), ('dosa batter', 'kg', 'urad dal', 0.3),
+    ('plain dosa', 'portion', 'dosa batter', 0.1), ('plain dosa', 'portion', 'ghee', 0.01),
+    ('tomato rice', 'portion', 'rice', 0.15), ('tomato rice', 'portion', 'tomato', 0.05),
+], columns=['recipe', 'yield_unit', 'component', 'quantity']), CATALOG)
+ENERGY = {'dosa batter': 0.2, 'plain dosa': 0.5, 'tomato rice': 1.0}
+SCOPES = (1000.0, 2000.0, 3000.0)
+
+def _volumes(**portions):
+    return pd.Series({item.replace('_', ' '): float(n) for item, n in portions.items()})
+
+def test_cooking_energy_includes_sub_recipes():
+    assert cooking_energy(BOOK, ENERGY)['plain dosa'] == pytest.approx(0.5 + 0.1 * 0.2)
+
+def test_shares_add_up_to_the_scope_totals():
+    table = allocate(_volumes(plain_dosa=300, tomato_rice=100, coffee=50), BOOK, ENERGY, *SCOPES).set_index('item')
+    assert table[['scope1_kg', 'scope2_kg', 'scope3_kg']].sum().tolist() == pytest.approx(list(SCOPES))
+    assert table.loc['plain dosa', 'scope1_kg'] / table.loc['tomato rice', 'scope1_kg'] == pytest.approx(300 * 0.52 / (100 * 1.0))
+    assert table.loc['plain dosa', 'scope3_kg'] / table.loc['tomato rice', 'scope3_kg'] == pytest.approx(
+        300 * BOOK.footprint('plain dosa') / (100 * BOOK.footprint('tomato rice')))
+    assert table.loc['coffee', ['total_kg', 'kg_per_portion']].tolist() == [0, 0]
+    assert not table.loc['coffee', 'allocated'] and pd.isna(table.loc['coffee', 'recipe'])
+
+def test_kg_yield_recipes_are_flagged_not_allocated():
+    table = allocate(_volumes(plain_dosa=10, dosa_batter=5), BOOK, ENERGY, *SCOPES).set_index('item')
+    assert table.loc['dosa batter', 'recipe'] == 'dosa batter'
+    assert not table.loc['dosa batter', 'allocated']
+    assert table.loc['dosa batter', 'total_kg'] == 0
+    assert table.loc['plain dosa', 'total_kg'] == pytest.approx(sum(SCOPES))
+
+def test_portions_share_scope_1_and_2_without_energy_data():
+    table = allocate(_volumes(plain_dosa=300, tomato_rice=100, coffee=50), BOOK, {}, *SCOPES).set_index('item')
+    assert table.loc['plain dosa', 'scope1_kg'] == pytest.approx(750)
+    assert table.loc['tomato rice', 'scope2_kg'] == pytest.approx(500)
+    assert table.loc['coffee', 'scope1_kg'] == 0
+
+def test_orders_split_across_chunks_are_carried_over():
+    rows = [(1, 'a', 1), (1, 'b', 2), (1, 'a', 1), (2, 'b', 1), (3, 'a', 3), (3, 'a', 1), (3, 'b', 1), (4, 'c', 5)]
+    sales = pd.DataFrame(rows, columns=['order_id', 'item', 'quantity']).to_csv(index=False)
+    per_portion = {'a': 0.5, 'b': 2.0}
+    whole = order_intensities(io.StringIO(sales), per_portion)
+    for chunksize in (1, 2, 3):
+        assert order_intensities(io.StringIO(sales), per_portion, chunksize=chunksize) == whole
+    assert whole['orders'] == 4
+    assert whole['mean_kg'] == pytest.approx((5 + 2 + 4 + 0) / 4)
+    assert whole['max_kg'] == pytest.approx(5)
+    assert whole['p50_kg'] == pytest.approx(2, rel=0.03)
+
+def test_allocate_sales_reads_pos_columns_and_reports_matches():
+    sales = "Order_ID,Item,Quantity\n1,Plain Dosa,2\n1,Coffee,1\n2,Tomato Rice,1\n2,Dosa Batter,1\n"
+    dishes, summary = allocate_sales(io.StringIO(sales), BOOK, *SCOPES, energy=ENERGY, chunksize=3)
+    assert summary['lines'] == 4 and summary['orders'] == 2
+    assert summary['matched_share'] == pytest.approx(3 / 5)
+    assert dishes['total_kg'].sum() == pytest.approx(sum(SCOPES))
+    assert summary['mean_kg'] == pytest.approx(sum(SCOPES) / 2)
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from anomalies import detect_anomalies, robust_z
+from functions import create_sample_data
+
+def _outlets(rng, n=20, months=6):
+    rows = []
+    for i in range(n):
+        base = create_sample_data("Medium Restaurant")
+        for month in range(months):
+            rows.append({'outlet': f"outlet_{i}", 'month': f"2024-{month + 1:02d}",
+                         'restaurant_type': "cafe" if i % 2 else "diner",
+                         **{k: v * rng.uniform(0.95, 1.05) for k, v in base.items()}})
+    return pd.DataFrame(rows)
+
+def test_robust_z_matches_the_definition():
+    values = np.array([1.0, 2.0, 3.0, 4.0, 100.0, np.nan])
+    expected = 0.6745 * (values - 3.0) / 1.0
+    np.testing.assert_allclose(robust_z(values, min_count=3), expected)
+    assert np.isnan(robust_z(np.array([1.0, 1.0, 1.0]), min_count=3)).all()
+
+def test_peer_outlier_and_month_jump_are_flagged():
+    data = _outlets(np.random.default_rng(0))
+    data.loc[(data['outlet'] == 'outlet_3'), 'lpg_used'] *= 3
+    data.loc[(data['outlet'] == 'outlet_8') & (data['month'] == '2024-04'), 'electricity'] *= 4
+
+    flags = detect_anomalies(data)
+    peer = flags[(flags['check'] == 'peer') & (flags['metric'] == 'lpg_used')]
+    assert set(peer['outlet']) == {'outlet_3'}
+    jump = flags[(flags['check'] == 'jump') & (flags['metric'] == 'electricity')]
+    assert ('outlet_8', '2024-04') in set(zip(jump['outlet'], jump['month']))
+
+def test_peer_groups_include_outlets_without_a_group():
+    data = _outlets(np.random.default_rng(1), n=24, months=1)
+    data.loc[data['outlet'].isin([f"outlet_{i}" for i in range(8)]), 'restaurant_type'] = np.nan
+    data.loc[data['outlet'] == 'outlet_2', 'rice_kg'] *= 5
+
+    flags = detect_anomalies(data, group_column='restaurant_type').set_index(['outlet', 'metric'])
+    # Scored against the other ungrouped outlets
+    ungrouped = data.loc[data['restaurant_type'].isna() & (data['outlet'] != 'outlet_2'), 'rice_kg']
+    reference = flags.loc[('outlet_2', 'rice_kg'), 'reference']
+    assert ungrouped.min() < reference < ungrouped.max()
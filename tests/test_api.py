@@ -0,0 +1,64 @@
+import os
+import json
+import threading
+import http.client
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from api import TARGETS, CalculationService, bench, make_server
+from functions import ACTIVITY_COLUMNS, calculate_emissions, create_sample_data
+
+@pytest.fixture(scope="module")
+def server():
+    server = make_server("127.0.0.1", 0, CalculationService())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address
+    server.shutdown()
+    server.server_close()
+
+def _post(address, path, payload):
+    connection = http.client.HTTPConnection(*address, timeout=30)
+    connection.request("POST", path, body=json.dumps(payload).encode(), headers={"Content-Type": "application/json"})
+    response = connection.getresponse()
+    result = response.status, json.loads(response.read())
+    connection.close()
+    return result
+
+def test_calculate_and_batch_match_calculate_emissions(server):
+    rng = np.random.default_rng(5)
+    restaurants = [dict(zip(ACTIVITY_COLUMNS, row), id=i)
+                   for i, row in enumerate(rng.uniform(0, 1000, (25, len(ACTIVITY_COLUMNS))).tolist())]
+    expected = calculate_emissions(pd.DataFrame(restaurants))
+
+    status, single = _post(server, "/calculate", restaurants[0])
+    assert status == 200
+    assert single['total'] == pytest.approx(expected['total'][0])
+
+    status, batch = _post(server, "/batch", {'restaurants': restaurants, 'validate': True})
+    assert status == 200 and batch['count'] == 25
+    np.testing.assert_allclose([r['scope3'] for r in batch['results']], expected['scope3'])
+    assert [r['id'] for r in batch['results']] == list(range(25))
+    assert batch['totals']['total'] == pytest.approx(expected['total'].sum())
+    assert {'valid', 'warnings', 'errors'} <= set(batch['results'][0])
+
+def test_bad_requests_get_400(server):
+    assert _post(server, "/calculate", [1, 2])[0] == 400
+    assert _post(server, "/calculate", {'electricity': "lots"})[0] == 400
+    assert _post(server, "/batch", {'outlets': []})[0] == 400
+    assert _post(server, "/nowhere", {})[0] == 404
+
+# Throughput and latency depend on the machine, so their targets are only checked on request
+CHECK_LOAD_TARGETS = os.environ.get("API_LOAD_TARGETS") == "1"
+
+@pytest.mark.parametrize("name", list(TARGETS))
+def test_load_scenarios_run_without_errors(server, name):
+    target = TARGETS[name]
+    bench(*server, name, **dict(target, requests=target['clients'] * 5))  # warm-up
+    result = bench(*server, name, **target)
+    assert result['errors'] == 0
+    assert result['requests'] == target['requests']
+    if CHECK_LOAD_TARGETS:
+        assert result['rps'] >= target['min_rps']
+        assert result['p95_ms'] <= target['p95_ms']
@@ -0,0 +1,66 @@
+import os
+import shutil
+
+import pytest
+from PIL import Image
+
+import assets
+from assets import build_assets, font_path
+
+@pytest.fixture
+def sources(tmp_path, monkeypatch):
+    banner = tmp_path / "banner.jpg"
+    Image.new('RGB', (1200, 600), (41, 173, 159)).save(banner)
+    font = tmp_path / "font.ttf"
+    shutil.copy("./style/arialuni.ttf", font)
+    monkeypatch.setattr(assets, 'BANNERS', {'banner': {'source': str(banner), 'widths': [480, 1920], 'fallback_width': 960}})
+    monkeypatch.setattr(assets, 'FONTS', {'card': {'source': str(font), 'text': "0123456789 kgCO₂e"}})
+    return banner, tmp_path / "out"
+
+def _mtimes(out_dir):
+    return {name: os.stat(out_dir / name).st_mtime_ns for name in os.listdir(out_dir) if name != assets.MANIFEST}
+
+def test_unchanged_sources_are_not_rebuilt(sources):
+    _, out_dir = sources
+    manifest = build_assets(str(out_dir))
+    assert list(manifest['banners']['banner']['webp']) == ['480', '1200']
+    assert manifest['banners']['banner']['jpeg'].endswith("-960.jpg")
+    before = _mtimes(out_dir)
+    assert build_assets(str(out_dir)) == manifest
+    assert _mtimes(out_dir) == before
+    build_assets(str(out_dir), force=True)
+    assert all(_mtimes(out_dir)[name] >= before[name] for name in before)
+
+def test_a_changed_source_gets_new_file_names(sources):
+    banner, out_dir = sources
+    old = build_assets(str(out_dir))['banners']['banner']
+    Image.new('RGB', (1200, 600), (0, 0, 0)).save(banner)
+    new = build_assets(str(out_dir))['banners']['banner']
+    assert new['source_hash'] != old['source_hash']
+    files = set(os.listdir(out_dir))
+    assert set(new['webp'].values()) <= files
+    assert not set(old['webp'].values()) & files
+
+def test_only_outdated_built_files_are_removed(sources):
+    _, out_dir = sources
+    out_dir.mkdir()
+    for name in ("notes.txt", "logo-0123456789.png", "banner-0123456789-480.webp", "card-0123456789.ttf"):
+        (out_dir / name).write_bytes(b"x")
+    build_assets(str(out_dir))
+    files = set(os.listdir(out_dir))
+    assert {"notes.txt", "logo-0123456789.png"} <= files
+    assert not {"banner-0123456789-480.webp", "card-0123456789.ttf"} & files
+
+def test_font_path_falls_back_to_the_full_font(sources, monkeypatch):
+    _, out_dir = sources
+    manifest = build_assets(str(out_dir))
+    monkeypatch.setattr(assets, 'ASSETS_DIR', str(out_dir))
+    monkeypatch.setattr(assets, 'load_manifest', lambda: manifest)
+    subset = str(out_dir / manifest['fonts']['card']['file'])
+    full = assets.FONTS['card']['source']
+    assert font_path('card', "12 kgCO₂e") == subset
+    assert font_path('card', "12 tCO₂e") == full
+    os.remove(subset)
+    assert font_path('card', "12") == full
+    monkeypatch.setattr(assets, 'load_manifest', lambda: None)
+    assert font_path('card') == full
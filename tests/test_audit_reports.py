@@ -0,0 +1,47 @@
+import re
+import zlib
+
+import pandas as pd
+
+from audit_reports import audit_inputs, audit_pdf, page2_stream, render_audits_batch
+from functions import EMISSION_FACTOR_SOURCES, EMISSION_FACTORS, create_sample_data
+
+def _page_text(stream):
+    # Decompressed content stream of a page, as text
+    return zlib.decompress(stream.split(b"stream\n", 1)[1].rsplit(b"\nendstream", 1)[0]).decode('cp1252')
+
+def _object(pdf, number):
+    # Body of one indirect object, located through the xref table
+    xref = int(re.search(rb"startxref\s+(\d+)", pdf).group(1))
+    offsets = [int(offset) for offset in re.findall(rb"(\d{10}) 00000 n", pdf[xref:])]
+    return pdf[offsets[number - 1]:offsets[number]]
+
+def test_every_factor_has_a_source():
+    assert set(EMISSION_FACTOR_SOURCES) == set(EMISSION_FACTORS)
+    assert all(EMISSION_FACTOR_SOURCES.values())
+
+def test_factor_page_lists_sources_and_marks_custom_values():
+    factors = dict(EMISSION_FACTORS, refrigerant_kg=2500.0)
+    text = _page_text(page2_stream(tuple(factors.items())))
+    assert "India GHG Platform" in text
+    assert r"custom value \(default 1300" in text  # parentheses are escaped in PDF strings
+
+def test_pdf_has_two_pages_and_the_fingerprint():
+    report = audit_inputs(pd.DataFrame([{'outlet': "Anna Nagar", **create_sample_data("Medium Restaurant")}]))[0]
+    pdf = audit_pdf(report)
+    assert pdf.startswith(b"%PDF-") and pdf.rstrip().endswith(b"%%EOF")
+    assert len(re.findall(rb"/Type\s*/Page\b", pdf)) == 2
+    offset = int(re.search(rb"startxref\s+(\d+)", pdf).group(1))
+    assert pdf[offset:offset + 4] == b"xref"
+    # Page 1 (object 8) draws the shared template (6) and the outlet's own stream (7)
+    assert b"/Contents [6 0 R 7 0 R]" in _object(pdf, 8)
+    page1 = _page_text(_object(pdf, 7))
+    assert len(report['fingerprint']) >= 16
+    assert f"Fingerprint {report['fingerprint']}" in page1
+    assert "Anna Nagar" in page1
+
+def test_batch_writes_one_file_per_outlet_with_distinct_names(tmp_path):
+    names = ['x', 'x_2', 'x']
+    data = pd.DataFrame([{'outlet': name, **create_sample_data("Small Dosa Shop")} for name in names])
+    paths = render_audits_batch(audit_inputs(data), str(tmp_path), workers=1)
+    assert sorted(p.rsplit('/', 1)[1] for p in paths) == ['x.pdf', 'x_2.pdf', 'x_3.pdf']
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from baselines import Baseline, BaselineStore, compare_years, yoy_summary
+from functions import EMISSION_FACTORS, calculate_emissions, create_sample_data
+
+def _outlets(names, scale=1.0):
+    return pd.DataFrame([{'outlet': name, **{k: v * scale for k, v in create_sample_data("Medium Restaurant").items()}}
+                         for name in names])
+
+def test_store_round_trip_and_restatement_of_affected_outlets(tmp_path):
+    store = BaselineStore(str(tmp_path))
+    base = _outlets(['A', 'B'])
+    base.loc[1, 'generator_fuel'] = 0
+    store.save("Saravana Bhavan", Baseline(base, 2023))
+
+    reported, restated, recomputed = store.load("saravana bhavan", EMISSION_FACTORS)
+    assert reported.year == 2023 and recomputed == []
+    pd.testing.assert_frame_equal(reported.scope_totals(), calculate_emissions(base.set_index('outlet'))[['scope1', 'scope2', 'scope3', 'total']],
+                                  check_names=False)
+
+    factors = dict(EMISSION_FACTORS, diesel_l=EMISSION_FACTORS['diesel_l'] * 2)
+    _, restated, recomputed = store.load("Saravana Bhavan", factors)
+    assert recomputed == ['A']
+    np.testing.assert_allclose(restated.scope_totals()['total'], calculate_emissions(base, factors)['total'])
+    assert store.load("Saravana Bhavan", factors)[1] is restated  # cached per factor version
+    assert store.load("Unknown") is None
+
+def test_change_splits_into_activity_and_factor_effects():
+    baseline = Baseline(_outlets(['A', 'B']), 2023)
+    factors = {key: value * 1.1 for key, value in EMISSION_FACTORS.items()}
+    current = _outlets(['A', 'C'], scale=1.2)
+
+    comparison = compare_years(baseline, current, factors)
+    np.testing.assert_allclose(comparison['activity_effect_kg'] + comparison['factor_effect_kg'], comparison['change_kg'])
+    assert dict(comparison.groupby('outlet', observed=True)['status'].first().astype(str)) == {'A': 'both', 'B': 'closed', 'C': 'new'}
+
+    by_scope = yoy_summary(comparison)
+    expected = calculate_emissions(current, factors)[['scope1', 'scope2', 'scope3']].sum()
+    np.testing.assert_allclose(by_scope['current_kg'], expected.loc[by_scope.index])
+    assert by_scope['change_kg'].sum() == pytest.approx(expected.sum() - baseline.emissions.sum())
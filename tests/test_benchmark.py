@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+from benchmark import build_benchmark_index, generate_peer_profiles, percentile_rank, rank_against_peers
+from functions import ACTIVITY_COLUMNS, create_sample_data
+from synthetic import generate_chunk
+
+def test_peers_come_from_the_synthetic_generator():
+    peers = generate_peer_profiles(500, seed=3)
+    expected = generate_chunk(np.random.default_rng(3), 500, outlier_rate=0.0)
+    pd.testing.assert_frame_equal(peers[ACTIVITY_COLUMNS], expected[ACTIVITY_COLUMNS])
+    assert (peers[ACTIVITY_COLUMNS] >= 0).all().all()
+
+def test_index_is_sorted_per_metric():
+    index = build_benchmark_index(generate_peer_profiles(1000))
+    for values in index.values():
+        assert len(values) > 0
+        assert np.all(np.diff(values) >= 0)
+
+def test_percentile_rank_counts_ties_half():
+    values = np.array([1.0, 2.0, 2.0, 3.0])
+    assert percentile_rank(values, 0.5) == 0
+    assert percentile_rank(values, 2.0) == 50
+    assert percentile_rank(values, 4.0) == 100
+    assert np.isnan(percentile_rank(np.array([]), 1.0))
+
+def test_zero_denominator_gives_nan_rank():
+    index = build_benchmark_index(generate_peer_profiles(1000))
+    restaurant = dict(create_sample_data("Medium Restaurant"), rice_kg=0)
+    ranks = rank_against_peers(index, restaurant).iloc[0]
+    assert np.isnan(ranks['kg_per_rice_kg'])
+    assert 0 <= ranks['kg_per_visit'] <= 100
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from calc_graph import EmissionsGraph
+from functions import ACTIVITY_COLUMNS, calculate_emissions
+
+def _table(rng, n=20):
+    return pd.DataFrame(rng.uniform(0, 1000, (n, len(ACTIVITY_COLUMNS))), columns=ACTIVITY_COLUMNS)
+
+def test_random_edits_match_a_full_recalculation():
+    rng = np.random.default_rng(7)
+    table = _table(rng)
+    graph = EmissionsGraph(table)
+    for _ in range(500):
+        row, column = rng.integers(len(table)), ACTIVITY_COLUMNS[rng.integers(len(ACTIVITY_COLUMNS))]
+        value = 0.0 if rng.random() < 0.1 else rng.uniform(0, 5000)
+        table.loc[row, column] = value
+        graph.update(row, column, value)
+
+    expected = calculate_emissions(table)
+    pd.testing.assert_frame_equal(graph.emissions(), expected, rtol=1e-9)
+    assert graph.fleet_totals()['total'] == pytest.approx(expected['total'].sum(), rel=1e-9)
+
+def test_blank_values_count_as_zero():
+    rng = np.random.default_rng(1)
+    table = _table(rng, n=3)
+    graph = EmissionsGraph(table)
+    graph.update(1, 'electricity', np.nan)
+    graph.update(1, 'lpg_used', None)
+    assert np.isfinite(graph.totals).all()
+    graph.update(1, 'electricity', 1200)
+
+    table.loc[1, 'electricity'] = 1200
+    table.loc[1, 'lpg_used'] = 0
+    assert np.allclose(graph.emissions().to_numpy(), calculate_emissions(table).to_numpy())
+
+def test_sync_applies_only_the_edited_cells():
+    rng = np.random.default_rng(3)
+    table = _table(rng, n=5)
+    graph = EmissionsGraph(table)
+    edited = table.copy()
+    edited.loc[2, 'rice_kg'] = np.nan
+    edited.loc[4, 'staff_count'] = 12
+    graph.sync(edited)
+    assert graph.verify()
+    assert np.allclose(graph.emissions().to_numpy(), calculate_emissions(edited).to_numpy())
+
+    with pytest.raises(ValueError):
+        graph.sync(edited.drop(index=0))
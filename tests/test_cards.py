@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from cards import CARD_COLORS, PIE_CENTER, PIE_RADIUS, file_stem, render_card, unique_file_stems
+
+def _wedge_shares(breakdown):
+    # Share of each wedge colour in a ring of the pie outside the overlay and the labels
+    pixels = np.asarray(render_card(breakdown, 1000))[..., :3]
+    y, x = np.indices(pixels.shape[:2])
+    radius = np.hypot(x - PIE_CENTER[0], y - PIE_CENTER[1]) / PIE_RADIUS
+    ring = pixels[(radius > 0.85) & (radius < 0.95)]
+    colors = [tuple(int(c[i:i + 2], 16) for i in (1, 3, 5)) for c in CARD_COLORS[:len(breakdown)]]
+    return np.array([np.all(ring == color, axis=1).mean() for color in colors])
+
+def test_file_stem_keeps_safe_characters_only():
+    assert file_stem("Anna Nagar / Branch #2") == "Anna_Nagar_Branch_2"
+    assert file_stem("  ") == "outlet"
+
+def test_unique_file_stems_number_repeats_and_skip_taken_stems():
+    assert unique_file_stems(['x', 'x_2', 'x']) == ['x', 'x_2', 'x_3']
+    assert unique_file_stems(['a', 'a', 'a', 'b']) == ['a', 'a_2', 'a_3', 'b']
+    assert unique_file_stems(['a b', 'a_b', '']) == ['a_b', 'a_b_2', 'outlet']
+
+@pytest.mark.parametrize("breakdown, shares", [
+    ({'Scope 1': 1, 'Scope 2': 2, 'Scope 3': 0, 'Other': 1}, [0.25, 0.5, 0, 0.25]),
+    ({'Scope 1': 30, 'Scope 2': 70}, [0.3, 0.7]),
+    ({'Scope 1': 5}, [1.0]),
+])
+def test_wedge_areas_follow_the_shares(breakdown, shares):
+    np.testing.assert_allclose(_wedge_shares(breakdown), shares, atol=0.02)
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from fingerprints import MerkleTree, fingerprints, verify_fingerprint
+from functions import ACTIVITY_COLUMNS, EMISSION_FACTORS, create_sample_data
+from synthetic import generate_chunk
+
+def test_fingerprints_ignore_layout_but_not_values_or_factors():
+    row = create_sample_data("Medium Restaurant")
+    reported = fingerprints(pd.DataFrame([row])).iloc[0]
+    shuffled = pd.DataFrame([row])[list(reversed(list(row)))].assign(note="extra column")
+    assert fingerprints(shuffled).iloc[0] == reported
+    assert verify_fingerprint(dict(row, staff_count=float(row['staff_count'])), reported)
+    assert not verify_fingerprint(dict(row, lpg_used=row['lpg_used'] + 1), reported)
+    factors = dict(EMISSION_FACTORS, lpg_kg=EMISSION_FACTORS['lpg_kg'] + 0.1)
+    assert fingerprints(pd.DataFrame([row]), factors).iloc[0] != reported
+
+def test_merkle_diff_finds_an_edit_an_insert_and_a_delete():
+    data = generate_chunk(np.random.default_rng(0), 20000, outlier_rate=0.0).rename(columns={'outlet_id': 'outlet'})
+    before = MerkleTree(data, key='outlet', chunk_rows=256)
+    assert before.root == MerkleTree(data.copy(), key='outlet', chunk_rows=256).root
+
+    edited = data.copy()
+    edited.loc[100, 'electricity'] += 1
+    inserted = data.iloc[[0]].assign(outlet=-1)
+    after = pd.concat([edited.iloc[:5000], inserted, edited.iloc[5000:12000], edited.iloc[12001:]], ignore_index=True)
+    tree = MerkleTree(after, key='outlet', chunk_rows=256)
+
+    only_before, only_after = before.diff(tree)
+    assert list(only_before) == [100, 12000]
+    assert list(only_after) == [100, 5000]
+    assert len(before.changed_chunks(tree)) <= 3 < len(before.leaves) // 10
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingredients import IngredientCatalog, ledger_summary, normalize_name, unmatched_items
+
+CATALOG = pd.DataFrame({
+    'item': ['rice', 'basmati rice', 'semolina', 'tomato', 'ghee'],
+    'category': ['Grains', 'Grains', 'Grains', 'Vegetables', 'Dairy'],
+    'unit': ['kg', 'kg', 'kg', 'kg', 'kg'],
+    'kgco2e_per_unit': [2.7, 2.7, 0.9, 0.7, 12.0],
+    'aliases': ['chawal|arisi', 'basmati', 'rava|sooji', 'tamatar', ''],
+})
+
+def test_catalog_file_loads_and_indexes_aliases():
+    catalog = IngredientCatalog.from_csv()
+    assert len(catalog.catalog) > 200
+    assert catalog.catalog['kgco2e_per_unit'].notna().all()
+    assert catalog.items[catalog.resolve('Chawal')[0]] == 'rice'
+
+def test_normalized_names_drop_pack_sizes_and_plurals():
+    assert normalize_name("Fresh Tomatoes 5kg") == "tomato"
+    assert normalize_name("Pure Ghee 500 ml") == "ghee"
+
+@pytest.mark.parametrize("name, item, method", [
+    ("Rice", 'rice', 'exact'),
+    ("Sooji 1kg", 'semolina', 'exact'),
+    ("India Gate Basmati Rice 25 kg", 'basmati rice', 'words'),
+    ("Semolnia", 'semolina', 'fuzzy'),
+    ("Dish soap", None, 'none'),
+    ("", None, 'none'),
+])
+def test_names_resolve_exact_alias_words_and_fuzzy(name, item, method):
+    catalog = IngredientCatalog(CATALOG)
+    positions, methods = catalog.match([name])
+    assert catalog.items[positions[0]] == item
+    assert methods[0] == method
+
+def test_ledger_footprint_totals_and_unmatched_report():
+    ledger = pd.DataFrame({
+        'item': ['Rice', 'Chawal', 'Tomatoes', 'Pure Ghee', 'Dish soap', 'Dish soap', 'Tamatar'],
+        'quantity': [100, 50, 20, 5, 3, 4, 'n/a'],
+    })
+    lines = IngredientCatalog(CATALOG).ledger_footprint(ledger)
+    np.testing.assert_allclose(lines['kgco2e'], [270, 135, 14, 60, np.nan, np.nan, np.nan])
+    assert list(lines['matched_item'].iloc[:4]) == ['rice', 'rice', 'tomato', 'ghee']
+
+    summary = ledger_summary(lines)
+    assert summary.loc['Grains', 'kgco2e'] == pytest.approx(405)
+    assert summary.loc['Vegetables', 'lines'] == 2
+    assert list(summary.index) == ['Grains', 'Dairy', 'Vegetables']
+    assert unmatched_items(lines).to_dict('records') == [{'item': 'Dish soap', 'lines': 2}]
+
+def test_ledger_needs_item_and_quantity_columns():
+    with pytest.raises(ValueError, match="quantity"):
+        IngredientCatalog(CATALOG).ledger_footprint(pd.DataFrame({'item': ['rice']}))
@@ -0,0 +1,52 @@
+import os
+import time
+
+from jobs import JobQueue
+
+def _wait(queue, job_ids, timeout=10):
+    deadline = time.time() + timeout
+    while queue.pending(job_ids) and time.time() < deadline:
+        time.sleep(0.02)
+
+def _queue(tmp_path, **kwargs):
+    return JobQueue(str(tmp_path / "jobs.db"), str(tmp_path / "artifacts"), **kwargs)
+
+def test_finished_job_reports_progress_and_serves_its_artifact(tmp_path):
+    queue = _queue(tmp_path)
+
+    def work(rows, progress):
+        progress(0.5, "halfway")
+        return ",".join(rows)
+
+    job_id = queue.submit('tenant', 'Report', work, ['a', 'b'], filename="report.csv")
+    _wait(queue, [job_id])
+    assert queue.status(job_id)['status'] == 'done'
+    assert queue.artifact(job_id) == (b"a,b", "report.csv")
+    assert not queue.pending([job_id])
+
+def test_failed_job_keeps_its_error(tmp_path):
+    queue = _queue(tmp_path)
+
+    def work(progress):
+        raise ValueError("bad input")
+
+    job_id = queue.submit('tenant', 'Report', work)
+    _wait(queue, [job_id])
+    job = queue.status(job_id)
+    assert (job['status'], job['error']) == ('failed', "bad input")
+    assert queue.artifact(job_id) is None
+
+def test_eviction_removes_expired_jobs_and_orphaned_files(tmp_path):
+    queue = _queue(tmp_path, ttl_hours=1)
+    job_id = queue.submit('tenant', 'Report', lambda progress: b"data", filename="report.csv")
+    _wait(queue, [job_id])
+    orphan = tmp_path / "artifacts" / "orphan.bin"
+    orphan.write_bytes(b"x")
+    assert queue.evict_expired() == 0
+
+    old = time.time() - 2 * 3600
+    os.utime(orphan, (old, old))
+    queue._execute("UPDATE jobs SET finished_at = '2000-01-01T00:00:00' WHERE id = ?", (job_id,))
+    assert queue.evict_expired() == 2
+    assert queue.status(job_id) is None
+    assert os.listdir(tmp_path / "artifacts") == []
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from ingredients import IngredientCatalog
+from recipes import RecipeBook
+
+CATALOG = IngredientCatalog(pd.DataFrame({
+    'item': ['rice', 'semolina', 'tomato', 'ghee'],
+    'category': ['Grains', 'Grains', 'Vegetables', 'Dairy'],
+    'unit': ['kg', 'kg', 'kg', 'kg'],
+    'kgco2e_per_unit': [2.7, 0.9, 0.7, 12.0],
+    'aliases': ['chawal', 'rava', 'tamatar', ''],
+}))
+
+RECIPES = pd.DataFrame([
+    ('batter', 'kg', 'rice', 0.6), ('batter', 'kg', 'rava', 0.4),
+    ('dosa', 'portion', 'batter', 0.1), ('dosa', 'portion', 'ghee', 0.01),
+    ('uttapam', 'portion', 'batter', 0.15), ('uttapam', 'portion', 'tomato', 0.03),
+    ('tomato rice', 'portion', 'rice', 0.15), ('tomato rice', 'portion', 'tomato', 0.05),
+], columns=['recipe', 'yield_unit', 'component', 'quantity'])
+
+def _recipes(*rows):
+    return pd.DataFrame(list(rows), columns=['recipe', 'yield_unit', 'component', 'quantity'])
+
+def test_nested_recipes_add_up_their_parts():
+    book = RecipeBook(RECIPES, CATALOG)
+    assert book.footprint('batter') == pytest.approx(0.6 * 2.7 + 0.4 * 0.9)
+    assert book.footprint('Dosa ') == pytest.approx(0.1 * book.footprint('batter') + 0.01 * 12.0)
+    assert book.breakdown('dosa').to_dict() == pytest.approx({'ghee': 0.12, 'rice': 0.162, 'semolina': 0.036})
+    assert sorted(book.dishes()) == ['dosa', 'tomato rice', 'uttapam']
+
+def test_sub_recipes_are_evaluated_once():
+    book = RecipeBook(RECIPES, CATALOG)
+    book.footprints()
+    assert book.evaluations == 4
+    book.footprint('dosa')
+    book.footprints(dishes_only=True)
+    assert book.evaluations == 4
+
+def test_a_factor_change_invalidates_only_dependent_recipes():
+    book = RecipeBook(RECIPES, CATALOG)
+    before = book.footprints().set_index('recipe')['kgco2e']
+    assert book.set_factor('Tamatar', 1.7) == ['tomato rice', 'uttapam']
+    after = book.footprints().set_index('recipe')['kgco2e']
+    assert book.evaluations == 6
+    assert after['uttapam'] - before['uttapam'] == pytest.approx(0.03)
+    assert after['dosa'] == before['dosa']
+    assert book.set_factor('rice', 3.0) == ['batter', 'dosa', 'tomato rice', 'uttapam']
+    with pytest.raises(KeyError):
+        book.set_factor('unobtainium', 1.0)
+
+def test_cycles_unknown_ingredients_and_units_are_rejected():
+    with pytest.raises(ValueError, match="Recipe cycle: a -> b -> a"):
+        RecipeBook(_recipes(('a', 'kg', 'b', 0.5), ('b', 'kg', 'a', 0.5), ('b', 'kg', 'rice', 0.5)), CATALOG)
+    with pytest.raises(ValueError, match=r"Unknown ingredients: unobtainium \(in a\)"):
+        RecipeBook(_recipes(('a', 'kg', 'unobtainium', 0.5)), CATALOG)
+    with pytest.raises(ValueError, match="Unknown yield units: litre"):
+        RecipeBook(_recipes(('a', 'litre', 'rice', 0.5)), CATALOG)
+    with pytest.raises(ValueError, match="non-negative"):
+        RecipeBook(_recipes(('a', 'kg', 'rice', -1)), CATALOG)
+
+def test_shipped_recipes_resolve_against_the_catalog():
+    book = RecipeBook.from_csv(catalog=IngredientCatalog.from_csv())
+    table = book.footprints(dishes_only=True)
+    assert len(table) and (table['kgco2e'] > 0).all()
@@ -0,0 +1,47 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from functions import ACTIVITY_COLUMNS, calculate_emissions, create_sample_data
+from recommendations import REDUCTION_ACTIONS, recommend_reductions, summarize_plan
+from reports import batch_recommendations_csv
+
+TYPES = ["Small Dosa Shop", "Medium Restaurant", "Large Restaurant", "Food Court Stall"]
+
+def _outlets():
+    data = pd.DataFrame([create_sample_data(kind) for kind in TYPES])
+    data['outlet'] = TYPES
+    return data
+
+def _targets(data, pct):
+    return calculate_emissions(data)['total'].to_numpy() / 1000 * pct / 100
+
+def test_ranking_on_a_known_outlet():
+    outlet = create_sample_data("Medium Restaurant")
+    target_t = _targets(pd.DataFrame([outlet]), 20)
+    plan = recommend_reductions(outlet, target_t)
+    # Money-saving actions first, then the cheapest per kgCO2e until the target is met
+    assert list(plan['action']) == ['reusable_containers', 'efficient_burners', 'rooftop_solar', 'green_tariff']
+    np.testing.assert_allclose(plan['reduction_t'], [0.225, 0.223725, 2.952, 6.888], rtol=1e-6)
+    np.testing.assert_allclose(plan['annual_cost_inr'], [-8000, -1125, -13000, 8400])
+    pd.testing.assert_frame_equal(recommend_reductions(outlet, target_t), plan)
+    assert summarize_plan(plan, outlet, target_t)['target_met'].all()
+
+def test_no_action_saves_more_than_its_drivers_emit():
+    data = _outlets()
+    plan = recommend_reductions(data, _targets(data, 60))
+    values = data.reindex(columns=ACTIVITY_COLUMNS, fill_value=0)
+    for row in plan.itertuples():
+        drivers = list(REDUCTION_ACTIONS[row.action]['scale'])
+        driver_values = values.loc[[row.outlet]].copy()
+        driver_values[[col for col in ACTIVITY_COLUMNS if col not in drivers]] = 0
+        assert row.reduction_t <= calculate_emissions(driver_values)['total'].iloc[0] / 1000 + 1e-9
+
+def test_batch_csv_names_each_outlets_plan():
+    data = _outlets()
+    plan = pd.read_csv(io.BytesIO(batch_recommendations_csv(data, target_pct=30, chunk_size=3)))
+    direct = recommend_reductions(data.drop(columns='outlet'), _targets(data, 30))
+    assert list(plan['outlet']) == [TYPES[i] for i in direct['outlet']]
+    assert list(plan['action']) == list(direct['action'])
+    np.testing.assert_allclose(plan['reduction_t'], direct['reduction_t'])
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from functions import EMISSION_FACTORS, calculate_emission_terms
+from refrigerants import GWP, normalize_gas, refrigerant_emissions, register_factors, sample_register
+
+def test_gas_names_are_normalized():
+    assert {normalize_gas(name) for name in ["r-134a", "134a", "HFC-134a", "R134A"]} == {'R134A'}
+    assert normalize_gas("propane") == 'R290'
+
+def test_leaks_use_top_ups_then_stated_then_default_rates():
+    register = pd.DataFrame({
+        'equipment': ['cold_room', 'cold_room', 'Cold Room', 'mystery'],
+        'gas': ['R404A', 'R404A', 'R404A', 'R999'],
+        'charge_kg': [4.0, 4.0, 4.0, 2.0],
+        'topup_kg': [1.5, np.nan, np.nan, np.nan],
+        'leak_rate': [np.nan, 0.1, np.nan, np.nan],
+    })
+    lines = refrigerant_emissions(register)
+    assert list(lines['method']) == ['top-up', 'stated rate', 'default rate', 'default rate']
+    np.testing.assert_allclose(lines['leak_kg'], [1.5, 0.4, 0.8, 0.2])
+    np.testing.assert_allclose(lines['kgco2e'][:3], lines['leak_kg'][:3] * GWP['R404A'])
+    assert np.isnan(lines['kgco2e'][3])
+
+def test_register_factor_keeps_physical_kg_and_register_emissions():
+    lines = refrigerant_emissions(sample_register())
+    factors = register_factors(lines)
+    leak_kg = lines['leak_kg'].sum()
+
+    terms = calculate_emission_terms({'refrigerant_leak': leak_kg}, factors).iloc[0]
+    assert terms['refrigerant_leak'] == pytest.approx(lines['kgco2e'].sum())
+    assert {k: v for k, v in factors.items() if k != 'refrigerant_kg'} == \
+        {k: v for k, v in EMISSION_FACTORS.items() if k != 'refrigerant_kg'}
+
+def test_register_without_leaks_keeps_the_default_factor():
+    lines = refrigerant_emissions(sample_register().assign(topup_kg=0.0))
+    assert register_factors(lines) == EMISSION_FACTORS
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from functions import ACTIVITY_COLUMNS, EMISSION_FACTORS, SCOPE_TERMS, calculate_emissions
+from scope3 import CATEGORY_MAP, SCOPE3_CATEGORIES, scope3_categories
+
+def test_every_scope3_term_is_fully_mapped():
+    assert set(CATEGORY_MAP) == set(SCOPE_TERMS['scope3']) | {'staff_commute'}
+    for shares in CATEGORY_MAP.values():
+        assert set(shares) <= set(SCOPE3_CATEGORIES)
+        assert sum(shares.values()) == pytest.approx(1.0)
+
+@pytest.mark.parametrize("scale", [None, 1.7])
+def test_categories_sum_to_scope3(scale):
+    rng = np.random.default_rng(11)
+    data = pd.DataFrame(rng.uniform(0, 2000, (50, len(ACTIVITY_COLUMNS))), columns=ACTIVITY_COLUMNS)
+    data.iloc[3, 5] = np.nan
+    factors = None if scale is None else {key: value * scale for key, value in EMISSION_FACTORS.items()}
+
+    categories = scope3_categories(data, factors)
+    assert list(categories.columns) == list(SCOPE3_CATEGORIES)
+    np.testing.assert_allclose(categories.sum(axis=1), calculate_emissions(data, factors)['scope3'], rtol=1e-12)
+
+def test_single_restaurant_dict_and_empty_categories():
+    row = {'rice_kg': 100.0, 'takeaway_containers': 1000}
+    categories = scope3_categories(row).iloc[0]
+    assert categories['cat1'] == pytest.approx(100 * EMISSION_FACTORS['rice_kg'] + 800 * EMISSION_FACTORS['takeaway_container'])
+    assert categories['cat12'] == pytest.approx(200 * EMISSION_FACTORS['takeaway_container'])
+    assert categories[['cat2', 'cat3', 'cat8', 'cat15']].eq(0).all()
@@ -0,0 +1,49 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+import streamlit as st
+
+import sessions
+from sessions import SessionSnapshots, snapshot
+
+TOKEN = "0123456789abcdef0123456789abcdef"
+
+def test_tables_and_rows_round_trip(tmp_path):
+    snapshots = SessionSnapshots(str(tmp_path))
+    table = pd.DataFrame({'outlet': ['A', 'B'], 'lpg_used': [500.0, 620.5]}, index=[3, 7])
+    snapshots.save(TOKEN, 'outlet_table', table)
+    snapshots.save(TOKEN, 'quick_data', {'lpg_used': 500.0, 'staff_count': 8})
+
+    restored = snapshots.load(TOKEN)
+    pd.testing.assert_frame_equal(restored['outlet_table'], table.reset_index(drop=True))
+    assert restored['quick_data'] == {'lpg_used': 500.0, 'staff_count': 8}
+    assert list(snapshots.load(TOKEN, names=['quick_data'])) == ['quick_data']
+
+    snapshots.save(TOKEN, 'outlet_table', {'lpg_used': 1.0})
+    assert snapshots.load(TOKEN)['outlet_table'] == {'lpg_used': 1.0}
+
+def test_invalid_tokens_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        SessionSnapshots(str(tmp_path)).load("../etc")
+
+def test_idle_sessions_are_evicted(tmp_path):
+    snapshots = SessionSnapshots(str(tmp_path), ttl_hours=1)
+    snapshots.save(TOKEN, 'quick_data', {'lpg_used': 500.0})
+    old = time.time() - 2 * 3600
+    os.utime(tmp_path / TOKEN, (old, old))
+    assert snapshots.evict_expired() == 1
+    assert snapshots.load(TOKEN) == {}
+
+def test_failed_snapshots_keep_the_session_state(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(sessions, 'get_session_snapshots', lambda: SessionSnapshots(str(tmp_path)))
+    table = pd.DataFrame({'outlet': ['A'], 'lpg_used': [object()]})
+    st.session_state['outlet_table'] = table
+    assert snapshot(TOKEN, 'outlet_table') is False
+    assert "Could not snapshot outlet_table" in caplog.text
+    assert st.session_state['outlet_table'] is table
+
+    st.session_state['quick_data'] = {'lpg_used': 500.0}
+    assert snapshot(TOKEN, 'quick_data') is True
+    assert SessionSnapshots(str(tmp_path)).load(TOKEN) == {'quick_data': {'lpg_used': 500.0}}
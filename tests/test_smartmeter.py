@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from smartmeter import HOURS, average_day, grid_intensity_profile, ingest_readings, time_of_use_scope2
+
+def _readings(start, periods, freq, kwh, outlet=None):
+    readings = pd.DataFrame({'timestamp': pd.date_range(start, periods=periods, freq=freq), 'kwh': kwh})
+    if outlet is not None:
+        readings['outlet'] = outlet
+    return readings
+
+def test_quarter_hours_are_summed_into_hours():
+    names, matrix, coverage, dropped = ingest_readings(_readings("2023-01-01", 4 * HOURS, "15min", 0.25))
+    assert names == ['Restaurant'] and matrix.shape == (1, HOURS) and matrix.dtype == np.float32
+    np.testing.assert_allclose(matrix, 1.0)
+    assert coverage.tolist() == [1.0] and dropped == 0
+
+def test_hourly_readings_land_on_their_hour_of_the_year():
+    readings = pd.DataFrame({
+        'timestamp': ["2023-01-02 05:00", "2023-01-02 05:30", "2023-12-31 23:00", "not a date", "2023-03-01 00:10"],
+        'kwh': [2.0, 1.0, 4.0, 9.0, "n/a"],
+        'outlet': ['B', 'B', 'A', 'A', 'A'],
+    })
+    names, matrix, coverage, _ = ingest_readings(readings)
+    assert names == ['A', 'B']
+    assert matrix[1, 24 + 5] == 3.0 and matrix[0, HOURS - 1] == 4.0
+    assert matrix.sum() == 7.0
+    np.testing.assert_allclose(coverage, [1 / HOURS, 1 / HOURS])
+
+def test_leap_day_is_added_to_the_28th_of_february():
+    readings = pd.DataFrame({'timestamp': ["2024-02-28 10:00", "2024-02-29 10:00", "2024-03-01 10:00"], 'kwh': [1.0, 2.0, 5.0]})
+    _, matrix, _, _ = ingest_readings(readings)
+    assert matrix[0, 58 * 24 + 10] == 3.0
+    assert matrix[0, 59 * 24 + 10] == 5.0
+
+def test_only_the_latest_year_is_kept():
+    readings = pd.concat([_readings("2021-01-01", 2 * HOURS, "h", 1.0, "A"), _readings("2022-06-01", 10, "h", 1.0, "B")])
+    names, matrix, coverage, dropped = ingest_readings(readings)
+    assert dropped == HOURS
+    np.testing.assert_allclose(matrix[0], 1.0)
+    assert matrix[1].sum() == 10 and coverage[0] == 1.0
+
+def test_missing_columns_are_reported():
+    with pytest.raises(ValueError, match="kwh"):
+        ingest_readings(pd.DataFrame({'timestamp': ["2023-01-01"]}))
+
+def test_time_of_use_matches_a_flat_intensity_by_hand():
+    _, matrix, _, _ = ingest_readings(_readings("2023-01-01", HOURS, "h", np.tile(np.arange(24, dtype=float), 365)))
+    flat = np.full(HOURS, 0.5)
+    table = time_of_use_scope2(matrix, ['Restaurant'], profile=flat, shifts={'evening_to_midday': 0.2}, block_rows=1)
+    kwh = 365 * sum(range(24))
+    assert table['kwh'][0] == pytest.approx(kwh)
+    assert table['scope2_tou_kg'][0] == pytest.approx(kwh * 0.5)
+    assert table['evening_to_midday_saving_kg'][0] == pytest.approx(0)
+    np.testing.assert_allclose(average_day(matrix), np.arange(24))
+
+def test_load_shifting_saves_the_intensity_difference():
+    matrix = np.zeros((2, HOURS), dtype=np.float32)
+    matrix[0, 20] = 10.0  # 8 pm on 1 January
+    profile = np.ones(HOURS)
+    profile[10:16] = 0.4
+    table = time_of_use_scope2(matrix, ['A', 'B'], profile=profile, shifts={'evening_to_midday': 0.5})
+    assert table['evening_to_midday_saving_kg'].tolist() == pytest.approx([0.5 * 10 * (1.0 - 0.4), 0])
+    assert grid_intensity_profile(0.82).mean() == pytest.approx(0.82)
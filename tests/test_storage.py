@@ -0,0 +1,22 @@
+from streamlit.testing.v1 import AppTest
+
+from storage import SubmissionStore
+
+def test_history_returns_a_restaurants_submissions_newest_first(tmp_path):
+    store = SubmissionStore(str(tmp_path / "submissions.db"))
+    store.submit('data', 'Saravana Bhavan', {'lpg_used': 500}).result(timeout=10)
+    store.submit('pledge', ' Saravana Bhavan ', {'project': 'Reforestation Initiative'}).result(timeout=10)
+    store.submit('data', 'Other Outlet', {'lpg_used': 1}).result(timeout=10)
+
+    history = store.history('Saravana Bhavan')
+    assert list(history['kind']) == ['pledge', 'data']
+    assert history['payload'].iloc[1] == {'lpg_used': 500}
+    assert list(store.history('Saravana Bhavan', kind='data')['kind']) == ['data']
+    assert store.history('Unknown').empty
+
+def test_audit_request_needs_a_restaurant_name():
+    at = AppTest.from_file("../pages/1_📋_Detailed_Information.py", default_timeout=30).run()
+    at.button[0].click().run()
+    assert not at.exception
+    assert "restaurant name" in at.warning[0].value
+    assert not at.success
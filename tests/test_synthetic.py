@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from functions import ACTIVITY_COLUMNS
+from synthetic import OUTLIER_KINDS, generate_restaurants, write_dataset
+
+def _dataset(rows, **kwargs):
+    return pd.concat(generate_restaurants(rows, **kwargs), ignore_index=True)
+
+def test_same_seed_and_chunk_size_give_the_same_rows():
+    first = _dataset(5000, seed=7, chunk_size=2000)
+    pd.testing.assert_frame_equal(first, _dataset(5000, seed=7, chunk_size=2000))
+    assert not first.equals(_dataset(5000, seed=8, chunk_size=2000))
+    assert list(first['outlet_id']) == list(range(5000))
+    assert list(first.columns) == ['outlet_id', 'restaurant_type'] + ACTIVITY_COLUMNS + ['outlier']
+
+def test_outliers_are_injected_at_about_the_rate_and_clean_rows_are_valid():
+    data = _dataset(20000, seed=1, outlier_rate=0.05)
+    labels = data['outlier']
+    assert 0.04 < (labels != '').mean() < 0.06
+    assert set(labels[labels != '']) == set(OUTLIER_KINDS)
+    clean = data.loc[labels == '', ACTIVITY_COLUMNS]
+    assert clean.notna().all().all() and (clean >= 0).all().all()
+    assert data.loc[labels == 'missing', ACTIVITY_COLUMNS].isna().any(axis=1).all()
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_write_dataset_round_trips(tmp_path, suffix):
+    path = str(tmp_path / f"restaurants{suffix}")
+    assert write_dataset(path, 2500, seed=3, chunk_size=1000) == 2500
+    written = pd.read_csv(path) if suffix == ".csv" else pd.read_parquet(path)
+    expected = _dataset(2500, seed=3, chunk_size=1000)
+    np.testing.assert_allclose(written[ACTIVITY_COLUMNS].to_numpy(dtype=float), expected[ACTIVITY_COLUMNS].to_numpy(dtype=float))
+    assert list(written['restaurant_type'].astype(str)) == list(expected['restaurant_type'].astype(str))
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from functions import ACTIVITY_COLUMNS, EMISSION_FACTORS
+from units import NATURAL_GAS_KG_PER_SCM, accepted_units, normalize_units, template_column, unit_key
+
+def test_unit_spellings_map_to_registry_names():
+    assert [unit_key(u) for u in ['MWh', 'Ltrs', 'm³', 'Cyl-19', 'units']] == ['mwh', 'l', 'm3', 'cylinder_19', 'kwh']
+
+def test_header_tags_convert_whole_columns():
+    data = pd.DataFrame({'electricity[MWh]': [1.5, 2.0], 'lpg_used[cylinder_19]': [10, 0], 'rice_kg': [100.0, 200.0]})
+    frame, converted = normalize_units(data)
+    assert list(frame.columns) == ['electricity', 'lpg_used', 'rice_kg']
+    np.testing.assert_allclose(frame['electricity'], [1500.0, 2000.0])
+    np.testing.assert_allclose(frame['lpg_used'], [190.0, 0.0])
+    assert set(converted) == {'electricity', 'lpg_used'}
+
+def test_row_units_mix_blank_and_missing_units():
+    data = pd.DataFrame({'lpg_used': [14.2, 3.0, 500.0, 7.0], 'lpg_used_unit': ['kg', 'cylinder_19', '', None],
+                         'generator_fuel': [10.0, 10.0, 10.0, 10.0], 'generator_fuel_unit': ['l', 'kg', 'ml', 'L']})
+    frame, converted = normalize_units(data)
+    assert 'lpg_used_unit' not in frame.columns
+    np.testing.assert_allclose(frame['lpg_used'], [14.2, 57.0, 500.0, 7.0])
+    np.testing.assert_allclose(frame['generator_fuel'], [10.0, 10 / 0.832, 0.01, 10.0])
+    assert converted == {'lpg_used': ['cylinder_19'], 'generator_fuel': ['kg', 'ml']}
+
+def test_natural_gas_follows_the_lpg_factor():
+    frame, _ = normalize_units(pd.DataFrame({'lpg_used[scm]': [100.0]}))
+    assert frame['lpg_used'][0] * EMISSION_FACTORS['lpg_kg'] == pytest.approx(100 * NATURAL_GAS_KG_PER_SCM)
+
+def test_unknown_units_are_rejected_and_untagged_data_passes_through():
+    with pytest.raises(ValueError, match="electricity: 'furlongs'"):
+        normalize_units(pd.DataFrame({'electricity': [1.0], 'electricity_unit': ['furlongs']}))
+    data = pd.DataFrame({'electricity': [1.0]})
+    assert normalize_units(data)[0] is data
+
+def test_template_headers_round_trip():
+    headers = [template_column(col) for col in ACTIVITY_COLUMNS]
+    frame, converted = normalize_units(pd.DataFrame([np.ones(len(headers))], columns=headers))
+    assert list(frame.columns) == ACTIVITY_COLUMNS and converted == {}
+    assert accepted_units('electricity')[:3] == ['kWh', 'Wh', 'MWh']
+
+def test_values_that_are_not_numbers_are_reported():
+    data = pd.DataFrame({'electricity[MWh]': [1, '1,000', None, ''], 'lpg_used': [1, 2, 3, '12 kg'], 'lpg_used_unit': ['kg'] * 4})
+    with pytest.raises(ValueError, match="electricity row 2: '1,000', lpg_used row 4: '12 kg'"):
+        normalize_units(data)
+    frame, _ = normalize_units(pd.DataFrame({'electricity[MWh]': [1, None, ' ']}))
+    np.testing.assert_allclose(frame['electricity'], [1000.0, np.nan, np.nan])
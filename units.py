@@ -0,0 +1,169 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from functions import ACTIVITY_COLUMNS, EMISSION_FACTORS
+
+# Canonical unit of every activity column (the unit the emission factors are per)
+CANONICAL_UNITS = {
+    'lpg_used': 'kg', 'generator_fuel': 'l', 'refrigerant_leak': 'kg', 'owned_vehicle_fuel': 'l',
+    'electricity': 'kwh', 'chilled_water': 'kwh', 'rice_kg': 'kg', 'lentils_kg': 'kg',
+    'vegetables_kg': 'kg', 'milk_liters': 'l', 'ghee_kg': 'kg', 'spices_kg': 'kg', 'oil_liters': 'l',
+    'upstream_transport_km': 'km', 'food_waste_kg': 'kg', 'packaging_waste_kg': 'kg',
+    'staff_count': 'people', 'avg_commute_km': 'km', 'business_travel_km': 'km',
+    'third_party_deliveries': 'orders', 'customer_visits': 'visits', 'takeaway_containers': 'containers',
+}
+
+# Units of one dimension, as multiples of the canonical unit
+DIMENSIONS = {
+    'kg': {'kg': 1.0, 'g': 0.001, 'quintal': 100.0, 'tonne': 1000.0},
+    'l': {'l': 1.0, 'ml': 0.001, 'kl': 1000.0},
+    'kwh': {'kwh': 1.0, 'wh': 0.001, 'mwh': 1000.0},
+    'km': {'km': 1.0, 'm': 0.001, 'mile': 1.609344},
+}
+# Display spelling of unit names
+UNIT_LABELS = {'kwh': 'kWh', 'mwh': 'MWh', 'wh': 'Wh', 'l': 'L', 'ml': 'mL', 'kl': 'kL'}
+
+# Natural gas for cooking is reported in the LPG column as kg of LPG with the same emissions
+NATURAL_GAS_KG_PER_SCM = 2.1  # kgCO2e per standard m³ of piped natural gas (IPCC 56.1 tCO2/TJ × ~37.7 MJ/SCM)
+
+# Column-specific units: a number, or a function of the factor table
+EXTRA_UNITS = {
+    'lpg_used': {
+        'cylinder_14.2': 14.2,  # domestic cylinder
+        'cylinder_19': 19.0,    # commercial cylinder
+        'cylinder_47.5': 47.5,  # commercial cylinder
+        'scm': lambda factors: NATURAL_GAS_KG_PER_SCM / factors['lpg_kg'],
+        'm3': lambda factors: NATURAL_GAS_KG_PER_SCM / factors['lpg_kg'],
+    },
+    'generator_fuel': {'kg': 1 / 0.832},  # diesel density 0.832 kg/l
+    'owned_vehicle_fuel': {'kg': 1 / 0.745},  # petrol density 0.745 kg/l
+    'milk_liters': {'kg': 1 / 1.03},
+    'oil_liters': {'kg': 1 / 0.92},
+}
+
+# Spellings found on bills, mapped to the unit names above (matched lower-case, without spaces)
+UNIT_ALIASES = {
+    'kgs': 'kg', 'kilogram': 'kg', 'kilograms': 'kg', 'gram': 'g', 'grams': 'g', 'gm': 'g',
+    't': 'tonne', 'ton': 'tonne', 'tons': 'tonne', 'tonnes': 'tonne', 'mt': 'tonne', 'qtl': 'quintal',
+    'liter': 'l', 'liters': 'l', 'litre': 'l', 'litres': 'l', 'ltr': 'l', 'ltrs': 'l',
+    'kiloliter': 'kl', 'kilolitre': 'kl', 'units': 'kwh', 'unit': 'kwh',
+    'miles': 'mile', 'mi': 'mile', 'sm3': 'scm', 'cubicmeter': 'm3', 'cum': 'm3',
+    'cylinder': 'cylinder_14.2', 'cylinder_14': 'cylinder_14.2', 'cyl_14.2': 'cylinder_14.2', 'cyl_19': 'cylinder_19',
+}
+
+# "lpg_used[cylinder_19]": a whole column in one unit
+TAGGED_COLUMN = re.compile(r'^\s*(\w+?)\s*\[\s*([^\]]+?)\s*\]\s*$')
+UNIT_SUFFIX = "_unit"  # "lpg_used_unit": a unit per row
+
+def unit_key(unit):
+    """
+    Registry name of a unit as written on a bill ('MWh', 'Ltrs', 'm³' -> 'mwh', 'l', 'm3')
+    """
+    key = re.sub(r'\s+', '', str(unit).lower()).replace('³', '3').replace('-', '_')
+    return UNIT_ALIASES.get(key, key)
+
+@lru_cache(maxsize=8)
+def _compile_units(factor_items):
+    factors = dict(factor_items)
+    registry = {}
+    for column, canonical in CANONICAL_UNITS.items():
+        units = dict(DIMENSIONS.get(canonical, {canonical: 1.0}))
+        for unit, scale in EXTRA_UNITS.get(column, {}).items():
+            units[unit] = scale(factors) if callable(scale) else scale
+        registry[column] = units
+    return registry
+
+def unit_registry(factors=None):
+    """
+    Accepted units of every activity column with their scale to the canonical
+    unit, compiled once per factor table (natural gas depends on the LPG factor)
+    """
+    factors = EMISSION_FACTORS if factors is None else factors
+    return _compile_units(tuple(sorted(factors.items())))
+
+def _scales(column, units, registry):
+    # Scale of each unit name, NaN for units the column does not accept
+    accepted = registry[column]
+    return np.array([accepted.get(unit_key(unit), np.nan) for unit in units], dtype=np.float64)
+
+def normalize_units(data, factors=None):
+    """
+    Convert unit-tagged activity columns to the canonical units
+    - a header tag converts a whole column: 'electricity[MWh]', 'lpg_used[cylinder_19]'
+    - a '<column>_unit' column gives a unit per row (blank means canonical),
+      for ledgers that mix units
+    Every scale is looked up once per distinct unit, then the activity block is
+    multiplied by its scales in one pass. Untagged columns pass through unchanged
+    Returns (DataFrame with canonical column names and no unit columns,
+    {column: units converted}); raises ValueError for unknown units and for
+    values of the converted columns that are not numbers
+    """
+    registry = unit_registry(factors)
+    renames, header_units = {}, {}
+    for name in data.columns:
+        match = TAGGED_COLUMN.match(str(name))
+        if match and match.group(1) in CANONICAL_UNITS:
+            renames[name] = match.group(1)
+            header_units[match.group(1)] = match.group(2)
+    row_unit_columns = [col for col in ACTIVITY_COLUMNS if f"{col}{UNIT_SUFFIX}" in data.columns]
+    if not renames and not row_unit_columns:
+        return data, {}
+
+    frame = data.rename(columns=renames)
+    columns = [col for col in ACTIVITY_COLUMNS if col in header_units or col in row_unit_columns]
+    columns = [col for col in columns if col in frame.columns]
+    scales = np.ones((len(frame), len(columns)))
+    unknown, converted = [], {}
+    for j, column in enumerate(columns):
+        if column in header_units:
+            scale = _scales(column, [header_units[column]], registry)[0]
+            if np.isnan(scale):
+                unknown.append(f"{column}: '{header_units[column]}'")
+            scales[:, j] = scale
+            if unit_key(header_units[column]) != CANONICAL_UNITS[column]:
+                converted[column] = [header_units[column]]
+        if column in row_unit_columns:
+            # Factorize the per-row units: scales are looked up for the distinct units only
+            codes, units = pd.factorize(frame[f"{column}{UNIT_SUFFIX}"])  # missing units get code -1
+            table = _scales(column, units, registry)
+            blank = np.array([str(unit).strip() == '' for unit in units], dtype=bool)
+            table[blank] = 1.0
+            unknown += [f"{column}: '{unit}'" for unit, bad in zip(units, np.isnan(table)) if bad]
+            scales[:, j] *= np.append(table, 1.0)[codes]  # code -1 (missing unit) reads the appended 1.0
+            other = [unit for unit, is_blank in zip(units, blank) if not is_blank and unit_key(unit) != CANONICAL_UNITS[column]]
+            if other:
+                converted[column] = converted.get(column, []) + other
+    if unknown:
+        raise ValueError(f"Unknown units: {', '.join(unknown)}. The accepted units are listed in the Excel template's instructions")
+
+    raw = frame[columns]
+    values = raw.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+    # Cells that hold something other than a number ("1,000", "12 kWh") would silently become 0
+    filled = raw.notna().to_numpy() & (raw.astype(str).apply(lambda col: col.str.strip()) != '').to_numpy()
+    rows, cols = np.nonzero(filled & np.isnan(values))
+    if len(rows):
+        cells = [f"{columns[j]} row {i + 1}: '{raw.iat[i, j]}'" for i, j in zip(rows[:10], cols[:10])]
+        more = f" and {len(rows) - 10} more" if len(rows) > 10 else ""
+        raise ValueError(f"Not a number: {', '.join(cells)}{more}. Enter plain numbers without thousands separators or units")
+    frame = frame.drop(columns=[f"{col}{UNIT_SUFFIX}" for col in row_unit_columns])
+    frame[columns] = values * scales
+    return frame, converted
+
+def accepted_units(column, factors=None):
+    """
+    Units a column accepts, canonical unit first, as shown in the template
+    """
+    canonical = CANONICAL_UNITS[column]
+    units = [canonical] + [unit for unit in unit_registry(factors)[column] if unit != canonical]
+    return [UNIT_LABELS.get(unit, unit) for unit in units]
+
+def template_column(column):
+    """
+    Unit-tagged template header of a column ('electricity[kWh]'); counts stay untagged
+    """
+    canonical = CANONICAL_UNITS[column]
+    if canonical not in DIMENSIONS:
+        return column
+    return f"{column}[{UNIT_LABELS.get(canonical, canonical)}]"